@@ -0,0 +1,113 @@
+"""
+Benchmark del Bloque 2 (enriquecimiento) contra el stub local de Google Books.
+
+Ejecuta `enrich_books` con distintos niveles de concurrencia, mide el
+rendimiento (libros/s), las peticiones y los bytes recibidos, y verifica que
+el CSV generado es idéntico en todos los casos (mismo orden y esquema).
+Con `--dup-rate` una parte de los libros repite la query de otro (mismo ISBN
+o mismo título + autor); `--full-response` pide la respuesta completa con
+`maxResults=5`, como antes de las respuestas parciales.
+
+Uso (desde books_pipeline/):
+    python benchmarks/bench_enrichment.py --books 200 --workers 1 4 16 --dup-rate 0.3
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import enrich_googlebooks  # noqa: E402
+from stub_googlebooks import start_stub  # noqa: E402
+
+
+def make_goodreads_books(n_books, dup_rate=0.0):
+    """Libros sintéticos; a partir del nº `n_books * (1 - dup_rate)` repiten uno anterior."""
+    n_distinct = max(1, round(n_books * (1 - dup_rate)))
+    books = []
+    for i in range(n_books):
+        j = i if i < n_distinct else (i * 7919) % n_distinct
+        has_isbn = j % 3 != 0
+        books.append(
+            {
+                "title": f"Synthetic Book {j}",
+                "author": f"Author {j % 50}",
+                "rating": 4.0,
+                "ratings_count": i,
+                "book_url": f"https://www.goodreads.com/book/show/{i}",
+                "isbn10": None,
+                "isbn13": f"978{j:010d}" if has_isbn else None,
+            }
+        )
+    return books
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--books", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--rps", type=float, default=0, help="0 = sin límite")
+    parser.add_argument("--latency", type=float, default=0.05, help="latencia del stub (s)")
+    parser.add_argument("--dup-rate", type=float, default=0.0, help="fracción de libros repetidos")
+    parser.add_argument(
+        "--full-response",
+        action="store_true",
+        help="sin respuesta parcial (fields) y con maxResults=5",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="usar una caché temporal compartida (la 1ª pasada la calienta)",
+    )
+    args = parser.parse_args()
+
+    server, url = start_stub(latency=args.latency)
+    enrich_googlebooks.GOOGLE_BOOKS_BASE_URL = url
+    enrich_googlebooks.API_KEY = None
+    if args.full_response:
+        enrich_googlebooks.MAX_RESULTS = 5
+        enrich_googlebooks.VOLUME_FIELDS = None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        input_json = tmp / "goodreads_books.json"
+        input_json.write_text(json.dumps(make_goodreads_books(args.books, args.dup_rate)), encoding="utf-8")
+
+        print(f"{'hilos':>6} {'tiempo (s)':>11} {'libros/s':>9} {'peticiones':>11} "
+              f"{'KiB recibidos':>14} {'conexiones':>11}  csv")
+        reference = None
+        for workers in args.workers:
+            output_csv = tmp / f"googlebooks_{workers}.csv"
+            server.requests, server.connections, server.bytes_sent = 0, set(), 0
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                enrich_googlebooks.enrich_books(
+                    workers=workers,
+                    requests_per_second=args.rps,
+                    input_path=input_json,
+                    output_path=output_csv,
+                    cache_path=tmp / "cache.sqlite" if args.cache else None,
+                )
+            elapsed = time.perf_counter() - start
+
+            content = output_csv.read_bytes()
+            reference = reference or content
+            same = "idéntico" if content == reference else "DIFERENTE"
+            print(
+                f"{workers:>6} {elapsed:11.2f} {args.books / elapsed:9.1f} "
+                f"{server.requests:>11} {server.bytes_sent / 1024:14.1f} "
+                f"{len(server.connections):>11}  {same}"
+            )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
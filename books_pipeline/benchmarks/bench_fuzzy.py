@@ -0,0 +1,137 @@
+"""
+Benchmark del casado aproximado de libros sin ISBN (Bloque 3, paso 5b).
+
+Genera un df_all sintético con duplicados conocidos (mismo libro con
+subtítulo, edición, paréntesis o mayúsculas distintas, con y sin ISBN) y
+títulos parecidos de libros distintos, ejecuta `merge_near_duplicates` y
+muestra el tiempo y la precisión / exhaustividad por pares frente a la
+verdad. Hasta `--exhaustive-max-rows` filas compara
+además con puntuar todos los pares (O(n²)) para medir lo que pierde LSH.
+
+Uso (desde books_pipeline/):
+    python benchmarks/bench_fuzzy.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import fuzzy_match  # noqa: E402
+
+VOCABULARY = np.array(
+    [f"{stem}{suffix}" for stem in (
+        "data", "python", "learn", "model", "graph", "cloud", "deep", "stat", "code", "system",
+        "design", "network", "vision", "market", "finance", "health", "theory", "method",
+        "signal", "robot", "query", "stream", "scale", "secure", "mobile", "agile", "lean",
+        "web", "game", "music",
+    ) for suffix in ("", "s", "ing", "ed", "er", "ics", "ion", "al", "ive", "ness")],
+    dtype=object,
+)
+VARIANTS = [
+    lambda t: t,
+    lambda t: f"{t}: A Practical Guide",
+    lambda t: f"{t} (Paperback)",
+    lambda t: f"{t}, 2nd Edition",
+    lambda t: t.upper(),
+    lambda t: f"{t}: Tools and Techniques for Everyone",
+    lambda t: t.rsplit(" ", 1)[0],  # falta una palabra: con títulos cortos no llega al umbral
+]
+
+
+def make_df_all(n_rows, dup_rate=0.3, seed=7):
+    """df_all sintético: (title, authors_list, author_principal) + verdad (`book`) e ISBN."""
+    rng = np.random.default_rng(seed)
+    n_books = max(1, int(n_rows / (1 + dup_rate)))
+
+    # Títulos de 3–6 palabras; ~10 % comparten todas menos la primera con otro libro
+    lengths = rng.integers(3, 7, n_books)
+    words = rng.integers(0, len(VOCABULARY), (n_books, 6))
+    near = np.flatnonzero(rng.random(n_books) < 0.1)
+    words[near, 1:] = words[near - 1, 1:]
+    titles = [" ".join(VOCABULARY[w[:k]]).title() for w, k in zip(words, lengths)]
+    author_ids = rng.integers(0, n_books // 3 + 1, n_books)
+    author_ids[near] = author_ids[near - 1]  # y del mismo autor (falsos positivos posibles)
+    authors = [f"Author{a} Surname{a}" for a in author_ids]
+
+    book = np.concatenate([np.arange(n_books), rng.integers(0, n_books, n_rows - n_books)])
+    variant = np.where(np.arange(n_rows) < n_books, 0, rng.integers(1, len(VARIANTS), n_rows))
+    title = [VARIANTS[v](titles[b]) for b, v in zip(book, variant)]
+    author = [authors[b] for b in book]
+
+    # El registro original tiene ISBN la mitad de las veces; los duplicados, nunca
+    has_isbn = (np.arange(n_rows) < n_books) & (book % 2 == 0)
+    keys = np.where(
+        has_isbn,
+        (9780000000000 + book).astype(str),
+        pd.Series(title).str.lower().str.replace(r"\s+", "_", regex=True) + "_" + author,
+    )
+    df = pd.DataFrame(
+        {
+            "title": title,
+            "author_principal": author,
+            "authors_list": [[a] for a in author],
+            "book": book,
+        }
+    )
+    return df, pd.Series(keys, dtype="str"), has_isbn
+
+
+def pair_metrics(book, keys):
+    """Precisión y exhaustividad por pares de filas: mismo libro ⇔ misma clave."""
+    truth = pd.DataFrame({"book": book, "key": pd.factorize(keys)[0]})
+    both = truth.groupby(["book", "key"]).size()
+    same_both = int((both * (both - 1) // 2).sum())
+    by_book = truth.groupby("book").size()
+    by_key = truth.groupby("key").size()
+    true_pairs = int((by_book * (by_book - 1) // 2).sum())
+    found_pairs = int((by_key * (by_key - 1) // 2).sum())
+    precision = same_both / found_pairs if found_pairs else 1.0
+    recall = same_both / true_pairs if true_pairs else 1.0
+    return precision, recall
+
+
+def exhaustive_keys(df, keys, has_isbn):
+    """Mismo casado puntuando todos los pares (solo para n pequeño)."""
+    n = len(df)
+    i, j = np.triu_indices(n, k=1)
+    original = fuzzy_match.lsh_candidate_pairs
+    fuzzy_match.lsh_candidate_pairs = lambda *args, **kwargs: np.column_stack((i, j))
+    try:
+        return fuzzy_match.merge_near_duplicates(df, keys, has_isbn)
+    finally:
+        fuzzy_match.lsh_candidate_pairs = original
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--exhaustive-max-rows", type=int, default=3_000)
+    args = parser.parse_args()
+
+    print(f"{'filas':>10} {'tiempo (s)':>11} {'claves antes':>13} {'claves después':>15} "
+          f"{'precisión':>10} {'exhaustiv.':>11}  frente a O(n²)")
+    for n_rows in args.sizes:
+        df, keys, has_isbn = make_df_all(n_rows)
+
+        start = time.perf_counter()
+        merged = fuzzy_match.merge_near_duplicates(df, keys, has_isbn)
+        elapsed = time.perf_counter() - start
+
+        precision, recall = pair_metrics(df["book"], merged)
+        if n_rows <= args.exhaustive_max_rows:
+            _, exhaustive_recall = pair_metrics(df["book"], exhaustive_keys(df, keys, has_isbn))
+            versus = f"exhaustiv. O(n²) = {exhaustive_recall:.4f}"
+        else:
+            versus = "-"
+        print(f"{n_rows:>10} {elapsed:11.2f} {keys.nunique():>13} {merged.nunique():>15} "
+              f"{precision:10.4f} {recall:11.4f}  {versus}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark de la lectura del landing (pasos 1–3 del Bloque 3).
+
+Lee y normaliza un landing sintético (Goodreads en JSON Lines + CSV de
+Google Books) con los backends "pandas" y "arrow" de `integrate_pipeline`,
+cada uno en un proceso nuevo, y muestra tiempo y pico de RSS.
+
+Uso (desde books_pipeline/):
+    python benchmarks/bench_ingest.py --books 500000
+"""
+
+import argparse
+import multiprocessing as mp
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import integrate_pipeline  # noqa: E402
+from bench_integration import write_landing  # noqa: E402
+
+
+def _run(backend, landing, queue):
+    gd_path, gb_path = landing
+    integrate_pipeline.INGEST_BACKEND = backend
+
+    start = time.perf_counter()
+    df_gd = integrate_pipeline.load_source(
+        integrate_pipeline.iter_goodreads_chunks(gd_path),
+        "goodreads",
+        integrate_pipeline.normalize_goodreads,
+    )
+    df_gb = integrate_pipeline.load_source(
+        integrate_pipeline.iter_googlebooks_chunks(gb_path),
+        "googlebooks",
+        integrate_pipeline.normalize_googlebooks,
+    )
+    elapsed = time.perf_counter() - start
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    queue.put((elapsed, rss, len(df_gd), len(df_gb)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--books", type=int, default=500_000)
+    parser.add_argument("--backends", nargs="+", default=["pandas", "arrow"])
+    args = parser.parse_args()
+
+    ctx = mp.get_context("fork")
+    with tempfile.TemporaryDirectory() as tmp:
+        landing = write_landing(Path(tmp), args.books)
+        size_mb = sum(p.stat().st_size for p in landing) / 2**20
+        print(f"landing: {size_mb:.0f} MiB")
+
+        print(f"{'backend':>8} {'tiempo (s)':>11} {'filas/s':>10} {'RSS (MiB)':>10}")
+        for backend in args.backends:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run, args=(backend, landing, queue))
+            proc.start()
+            elapsed, rss, n_gd, n_gb = queue.get()
+            proc.join()
+            print(f"{backend:>8} {elapsed:11.2f} {(n_gd + n_gb) / elapsed:10.0f} {rss:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark del Bloque 3 (integración) en modo en memoria y particionado.
+
+Genera un landing sintético (Goodreads en JSON Lines + CSV de Google Books),
+ejecuta `integrate_pipeline` con distintos nº de shards/procesos, mide el
+tiempo y el pico de memoria (RSS) del proceso principal y de los procesos
+del pool, y verifica que dim_book y book_source_detail coinciden con los
+del modo en memoria.
+
+Uso (desde books_pipeline/):
+    python benchmarks/bench_integration.py --books 200000 --partitions 8 32 --workers 1 4 8
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import multiprocessing as mp
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import integrate_pipeline  # noqa: E402
+
+GB_FIELDS = [
+    "gb_id", "title", "subtitle", "authors", "publisher", "pub_date", "language",
+    "categories", "isbn13", "isbn10", "price_amount", "price_currency",
+]
+PUBLISHERS = ["O'Reilly Media", "MIT Press", "Wiley", "Manning", ""]
+LANGS = ["en", "es", "fr", "de", ""]
+CATEGORIES = ["Computers", "Science", "Business & Economics", "Mathematics"]
+
+
+def isbn13_for(i):
+    body = f"978{i:09d}"
+    check = (10 - sum(int(d) * (1 if k % 2 == 0 else 3) for k, d in enumerate(body)) % 10) % 10
+    return body + str(check)
+
+
+def isbn10_for(isbn13):
+    body = isbn13[3:12]
+    check = (11 - sum(int(d) * (10 - k) for k, d in enumerate(body)) % 11) % 11
+    return body + ("X" if check == 10 else str(check))
+
+
+def write_landing(landing_dir, n_books):
+    """Landing sintético: un registro de Goodreads por libro y ~85 % con ficha en Google Books."""
+    gd_path = landing_dir / "goodreads_books.jsonl"
+    gb_path = landing_dir / "googlebooks_books.csv"
+
+    with open(gd_path, "w", encoding="utf-8") as f:
+        for i in range(n_books):
+            isbn13 = isbn13_for(i) if i % 3 else None
+            record = {
+                "title": f"Synthetic Book {i}",
+                "author": f"Author {i % 997}",
+                "rating": round(3 + (i % 200) / 100, 2),
+                "ratings_count": i % 5000,
+                "book_url": f"https://www.goodreads.com/book/show/{i}",
+                "isbn10": None,
+                "isbn13": isbn13,
+            }
+            f.write(json.dumps(record) + "\n")
+
+    with open(gb_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(GB_FIELDS)
+        for i in range(n_books):
+            if i % 7 == 0:
+                continue
+            isbn13 = isbn13_for(i)
+            writer.writerow(
+                [
+                    f"gb{i}",
+                    f"Synthetic Book {i}: Extended Edition" if i % 2 else f"Synthetic Book {i}",
+                    "",
+                    f"Author {i % 997} | Coauthor {i % 13}",
+                    PUBLISHERS[i % len(PUBLISHERS)],
+                    f"{2000 + i % 24}-{1 + i % 12:02d}" if i % 4 else "",
+                    LANGS[i % len(LANGS)],
+                    " | ".join(CATEGORIES[: 1 + i % len(CATEGORIES)]),
+                    isbn13 if i % 5 else "",
+                    isbn10_for(isbn13),
+                    f"{5 + i % 50}.99" if i % 3 == 0 else "",
+                    "EUR" if i % 3 == 0 else "",
+                ]
+            )
+    return gd_path, gb_path
+
+
+def _run(landing, out_dir, partitions, workers, queue):
+    gd_path, gb_path = landing
+    integrate_pipeline.goodreads_landing_path = lambda: gd_path
+    integrate_pipeline.googlebooks_landing_path = lambda: gb_path
+    integrate_pipeline.UNION_CACHE = False
+    integrate_pipeline.DIM_BOOK_PARQUET = out_dir / "dim_book.parquet"
+    integrate_pipeline.DETAIL_PARQUET = out_dir / "book_source_detail.parquet"
+    integrate_pipeline.QUALITY_JSON = out_dir / "quality_metrics.json"
+    integrate_pipeline.SCHEMA_MD = out_dir / "schema.md"
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        integrate_pipeline.integrate_pipeline(partitions, workers, "merged")
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss en KiB (Linux)
+    rss_main = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    rss_pool = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    queue.put((elapsed, rss_main, rss_pool))
+
+
+def run_isolated(landing, out_dir, partitions, workers):
+    """Ejecuta una configuración en un proceso nuevo para medir su pico de RSS por separado."""
+    ctx = mp.get_context("fork")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(landing, out_dir, partitions, workers, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def read_output(out_dir):
+    return [
+        pq.read_table(out_dir / f"{name}.parquet").drop([ts])
+        for name, ts in (
+            ("dim_book", "ts_ultima_actualizacion"),
+            ("book_source_detail", "timestamp_ingesta"),
+        )
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--books", type=int, default=200_000)
+    parser.add_argument("--partitions", type=int, nargs="*", default=[8, 32])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        landing = write_landing(tmp, args.books)
+
+        configs = [(1, 1)] + [(k, w) for k in args.partitions for w in args.workers]
+        print(f"{'shards':>7} {'procesos':>9} {'tiempo (s)':>11} {'RSS ppal (MiB)':>15} "
+              f"{'RSS pool (MiB)':>15}  salida")
+        reference = None
+        for partitions, workers in configs:
+            out_dir = tmp / f"out_{partitions}_{workers}"
+            out_dir.mkdir()
+            elapsed, rss_main, rss_pool = run_isolated(landing, out_dir, partitions, workers)
+
+            tables = read_output(out_dir)
+            if reference is None:
+                reference, status = tables, "referencia"
+            else:
+                same = all(a.equals(b, check_metadata=True) for a, b in zip(reference, tables))
+                status = "idéntica" if same else "DISTINTA"
+            pool = f"{rss_pool:15.0f}" if partitions > 1 else f"{'-':>15}"
+            print(f"{partitions:>7} {workers:>9} {elapsed:11.2f} {rss_main:15.0f} {pool}  {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Micro-benchmark de los parsers HTML del Bloque 1 sobre las páginas guardadas
+en `fixtures/goodreads/`.
+
+Compara el backend BeautifulSoup (selectores CSS sobre el árbol completo) con
+el backend lxml (XPath precompilado sobre los subárboles necesarios) y
+verifica que ambos extraen exactamente los mismos datos.
+
+Uso (desde books_pipeline/):
+    python benchmarks/bench_parsing.py --repeat 200
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import scrape_goodreads  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "goodreads"
+
+CASES = [
+    ("búsqueda", "search_page.html", "parse_search_page"),
+    ("ficha libro", "book_page.html", "parse_isbns"),
+]
+
+
+def per_call_ms(fn, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(html)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'página':<12} {'KB':>6} {'bs4 (ms)':>9} {'lxml (ms)':>10} {'speedup':>8}  resultado")
+    for label, fixture, func in CASES:
+        html = (FIXTURES_DIR / fixture).read_text(encoding="utf-8")
+        fn_bs4 = getattr(scrape_goodreads, f"{func}_bs4")
+        fn_lxml = getattr(scrape_goodreads, f"{func}_lxml")
+
+        same = "idéntico" if fn_bs4(html) == fn_lxml(html) else "DIFERENTE"
+        t_bs4 = per_call_ms(fn_bs4, html, args.repeat)
+        t_lxml = per_call_ms(fn_lxml, html, args.repeat)
+        print(
+            f"{label:<12} {len(html) / 1024:6.1f} {t_bs4:9.2f} {t_lxml:10.2f} "
+            f"{t_bs4 / t_lxml:7.1f}x  {same}"
+        )
+
+
+if __name__ == "__main__":
+    main()
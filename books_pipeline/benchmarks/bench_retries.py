@@ -0,0 +1,114 @@
+"""
+Benchmark de los reintentos del Bloque 2 contra un stub de Google Books con fallos.
+
+Ejecuta `enrich_books` primero contra el stub sin fallos (referencia) y
+después contra `start_faulty_stub`, que inyecta 429 con `Retry-After`, 5xx,
+timeouts, conexiones cortadas y, con `--storm`, unos segundos en los que todo
+responde 429 y que el cortacircuitos debe absorber pausando todos los hilos.
+Muestra tiempo, peticiones, fallos inyectados, contadores de error por tipo,
+reintentos y aperturas del cortacircuitos, y comprueba que el CSV coincide
+con la referencia (con `--p404` no puede: el 404 es definitivo y esos libros
+se quedan sin fila).
+
+Uso (desde books_pipeline/):
+    python benchmarks/bench_retries.py --books 200 --p429 0.1 --p5xx 0.1 --storm 0.5 1.5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import enrich_googlebooks  # noqa: E402
+from bench_enrichment import make_goodreads_books  # noqa: E402
+from stub_googlebooks import start_faulty_stub, start_stub  # noqa: E402
+from utils_metrics import METRICS  # noqa: E402
+
+
+def run(url, input_json, output_csv, workers):
+    enrich_googlebooks.GOOGLE_BOOKS_BASE_URL = url
+    METRICS.reset()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        enrich_googlebooks.enrich_books(
+            workers=workers,
+            requests_per_second=0,
+            input_path=input_json,
+            output_path=output_csv,
+            cache_path=None,
+        )
+    return time.perf_counter() - start, dict(METRICS.counters)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--books", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--p429", type=float, default=0.1, help="prob. de 429 por intento")
+    parser.add_argument("--p5xx", type=float, default=0.1, help="prob. de 500/503 por intento")
+    parser.add_argument("--ptimeout", type=float, default=0.03)
+    parser.add_argument("--preset", type=float, default=0.03, help="prob. de conexión cortada")
+    parser.add_argument("--p404", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.5, help="Retry-After de los 429 (s)")
+    parser.add_argument(
+        "--storm", type=float, nargs=2, default=(0, 0), metavar=("DESDE", "HASTA"),
+        help="segundos (desde la primera petición) en los que todo responde 429",
+    )
+    args = parser.parse_args()
+
+    # Reintentos y pausas cortos para que el benchmark dure segundos
+    enrich_googlebooks.API_KEY = None
+    enrich_googlebooks.TIMEOUT = 0.3
+    enrich_googlebooks.RETRY_BASE_DELAY = 0.05
+    enrich_googlebooks.RETRY_MAX_DELAY = 1.0
+    enrich_googlebooks.BREAKER_COOLDOWN = 1.0
+    enrich_googlebooks.BREAKER_MAX_COOLDOWN = 4.0
+
+    faults = {
+        "429": args.p429,
+        "503": args.p5xx / 2,
+        "500": args.p5xx / 2,
+        "timeout": args.ptimeout,
+        "reset": args.preset,
+        "404": args.p404,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        input_json = tmp / "goodreads_books.json"
+        input_json.write_text(json.dumps(make_goodreads_books(args.books)), encoding="utf-8")
+
+        server, url = start_stub(latency=0.0)
+        elapsed, _ = run(url, input_json, tmp / "reference.csv", args.workers)
+        server.shutdown()
+        print(f"[INFO] Sin fallos: {elapsed:.2f} s, {server.requests} peticiones")
+
+        server, url = start_faulty_stub(
+            faults,
+            retry_after=args.retry_after,
+            timeout_delay=2 * enrich_googlebooks.TIMEOUT,
+            faulty_attempts=enrich_googlebooks.MAX_RETRIES - 1,
+            storm=tuple(args.storm),
+        )
+        elapsed, counters = run(url, input_json, tmp / "faulty.csv", args.workers)
+        server.shutdown()
+
+        print(f"[INFO] Con fallos: {elapsed:.2f} s, {server.requests} peticiones")
+        print(f"[INFO] Fallos inyectados: {dict(server.injected)}")
+        for name, n in sorted(counters.items()):
+            if name.startswith(("googlebooks.errores", "googlebooks.reintentos",
+                                "googlebooks.cortacircuitos", "googlebooks.consultas_fallidas")):
+                print(f"    {name:<45} {n:>6}")
+
+        same = (tmp / "faulty.csv").read_bytes() == (tmp / "reference.csv").read_bytes()
+        print(f"[{'OK' if same else 'WARN'}] CSV {'idéntico' if same else 'DISTINTO'} "
+              "al de la referencia sin fallos")
+
+
+if __name__ == "__main__":
+    main()
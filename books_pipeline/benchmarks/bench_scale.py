@@ -0,0 +1,278 @@
+"""
+Benchmark de escala del Bloque 3: lectura + normalizadores, integración y calidad.
+
+Para cada tamaño genera un landing sintético con `synth_catalog` (misma
+semilla → mismos datos), ejecuta `integrate_pipeline` en un proceso nuevo y
+recoge los pasos de `utils_metrics` (lectura y normalización por fuente,
+id candidato, supervivencia, escritura + perfil de calidad…), el perfil de
+`utils_quality` por separado sobre las tablas escritas y el pico de RSS.
+
+El resultado se compara con la línea base guardada (`baseline_scale.json`):
+un paso es regresión si tarda más de `--tolerance` (relativo) y más de
+`--min-seconds` (absoluto) que en la base; la memoria, igual con `--min-mib`.
+Los contadores (filas por fuente, libros en dim_book) deben coincidir: si no,
+la salida ha cambiado. Con regresiones el script termina con código 1.
+
+10M filas no caben en memoria con 6 GB: usar `--partitions` (integración por
+shards, con salida por shards: la unión final también sería en memoria).
+
+Uso (desde books_pipeline/):
+    python benchmarks/bench_scale.py --sizes 10000 100000 1000000
+    python benchmarks/bench_scale.py --sizes 10000 100000 1000000 --save-baseline
+    python benchmarks/bench_scale.py --sizes 10000000 --partitions 32 --workers 1
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from queue import Empty
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import integrate_pipeline  # noqa: E402
+from synth_catalog import CatalogConfig, write_catalog  # noqa: E402
+from utils_metrics import METRICS, step  # noqa: E402
+
+BASELINE_JSON = Path(__file__).resolve().parent / "baseline_scale.json"
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+QUALITY_STEP = "calidad (utils_quality sobre la salida)"
+
+
+def _run(landing, out_dir, partitions, workers, output, queue):
+    gd_path, gb_path = landing
+    integrate_pipeline.goodreads_landing_path = lambda: gd_path
+    integrate_pipeline.googlebooks_landing_path = lambda: gb_path
+    integrate_pipeline.UNION_CACHE = False
+    integrate_pipeline.DIM_BOOK_PARQUET = out_dir / "dim_book.parquet"
+    integrate_pipeline.DETAIL_PARQUET = out_dir / "book_source_detail.parquet"
+    integrate_pipeline.DIM_BOOK_DIR = out_dir / "dim_book"
+    integrate_pipeline.DETAIL_DIR = out_dir / "book_source_detail"
+    integrate_pipeline.QUALITY_JSON = out_dir / "quality_metrics.json"
+    integrate_pipeline.SCHEMA_MD = out_dir / "schema.md"
+
+    METRICS.reset()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        integrate_pipeline.integrate_pipeline(partitions, workers, output)
+    elapsed = time.perf_counter() - start
+
+    # utils_quality aislado: perfil completo de las dos tablas ya escritas
+    dim_profile, detail_profile = integrate_pipeline.quality_profiles()
+    for profile, path in (
+        (dim_profile, integrate_pipeline.DIM_BOOK_PARQUET),
+        (detail_profile, integrate_pipeline.DETAIL_PARQUET),
+    ):
+        parts = [path] if path.exists() else sorted(path.with_suffix("").glob("part-*.parquet"))
+        for part in parts:
+            for batch in pq.ParquetFile(part).iter_batches():
+                with step(QUALITY_STEP):
+                    profile.update(batch)
+
+    snapshot = METRICS.snapshot()
+    queue.put(
+        {
+            "segundos": round(elapsed, 3),
+            # ru_maxrss en KiB (Linux); el pool de shards cuenta aparte
+            "rss_max_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "rss_max_pool_mib": round(
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1
+            ),
+            "pasos": {
+                name: round(entry["segundos"], 3) for name, entry in snapshot["pasos"].items()
+            },
+            "contadores": snapshot["contadores"],
+        }
+    )
+
+
+def run_isolated(landing, out_dir, partitions, workers, output):
+    """
+    Una integración en un proceso nuevo: pico de RSS propio y registro de
+    métricas limpio. None si el proceso muere (p. ej. sin memoria).
+    """
+    ctx = mp.get_context("fork")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(landing, out_dir, partitions, workers, output, queue))
+    proc.start()
+    while True:
+        try:
+            result = queue.get(timeout=5)
+            break
+        except Empty:
+            if not proc.is_alive():
+                return None
+    proc.join()
+    return result
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "pyarrow": pa.__version__,
+        "cpus": os.cpu_count(),
+        "maquina": platform.machine(),
+    }
+
+
+# -----------------------------------------------------------
+# COMPARACIÓN CON LA LÍNEA BASE
+# -----------------------------------------------------------
+
+def compare(current, baseline, tolerance, min_seconds, min_mib):
+    """Líneas de informe y nº de regresiones de `current` frente a `baseline`."""
+    lines, regressions = [], 0
+    if current["catalogo"] != baseline["catalogo"]:
+        lines.append("[WARN] El generador no usa la misma configuración que la base.")
+    if current["entorno"] != baseline["entorno"]:
+        lines.append(f"[WARN] Entorno distinto al de la base: {baseline['entorno']}")
+
+    for size, run in current["tamanos"].items():
+        base = baseline["tamanos"].get(size)
+        if base is None:
+            lines.append(f"[INFO] {size} filas: sin línea base")
+            continue
+
+        rows = [("total", run["segundos"], base["segundos"])] + [
+            (name, seconds, base["pasos"][name])
+            for name, seconds in run["pasos"].items()
+            if name in base["pasos"]
+        ]
+        for name, seconds, before in rows:
+            slower = seconds > before * (1 + tolerance) and seconds - before > min_seconds
+            regressions += slower
+            flag = "REGRESIÓN" if slower else ""
+            ratio = seconds / before if before else float("inf")
+            lines.append(
+                f"{size:>10} {name[:44]:<44} {before:9.3f} {seconds:9.3f} {ratio:7.2f}x  {flag}"
+            )
+
+        rss, before = run["rss_max_mib"], base["rss_max_mib"]
+        more = rss > before * (1 + tolerance) and rss - before > min_mib
+        regressions += more
+        lines.append(
+            f"{size:>10} {'RSS máx. (MiB)':<44} {before:9.0f} {rss:9.0f} {rss / before:7.2f}x  "
+            f"{'REGRESIÓN' if more else ''}"
+        )
+
+        changed = {
+            name: (base["contadores"].get(name), n)
+            for name, n in run["contadores"].items()
+            if base["contadores"].get(name) != n
+        }
+        if changed:
+            regressions += 1
+            lines.append(f"[WARN] {size} filas: la salida cambia (base, actual): {changed}")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--partitions", type=int, default=1, help="1 = integración en memoria")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--output",
+        choices=["merged", "shards"],
+        default="shards",
+        help="salida de la integración por shards (merged une todo en memoria)",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_JSON)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="guarda este resultado como línea base"
+    )
+    parser.add_argument("--json", type=Path, help="guarda también el resultado en este fichero")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-seconds", type=float, default=0.1)
+    parser.add_argument("--min-mib", type=float, default=32)
+    for name, default in asdict(CatalogConfig()).items():
+        if name != "rows":
+            parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args()
+
+    catalog = {name: getattr(args, name) for name in asdict(CatalogConfig()) if name != "rows"}
+    mode = (
+        "memoria"
+        if args.partitions <= 1
+        else f"{args.partitions} shards/{args.workers} procesos/{args.output}"
+    )
+    result = {"entorno": environment(), "catalogo": catalog, "tamanos": {}}
+
+    print(f"{'filas':>10} {'landing (MiB)':>14} {'generación (s)':>15} {'integración (s)':>16} "
+          f"{'RSS máx. (MiB)':>15}")
+    for n_rows in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            start = time.perf_counter()
+            landing = write_catalog(tmp / "landing", CatalogConfig(rows=n_rows, **catalog))
+            generation = time.perf_counter() - start
+            size_mb = sum(p.stat().st_size for p in landing) / 2**20
+
+            out_dir = tmp / "standard"
+            out_dir.mkdir()
+            run = run_isolated(landing, out_dir, args.partitions, args.workers, args.output)
+
+        if run is None:
+            print(f"{n_rows:>10} {size_mb:14.0f} {generation:15.1f}  [WARN] la integración "
+                  f"terminó sin resultado (¿sin memoria? probar con más --partitions)")
+            continue
+        # Cada modo tiene su propia entrada en la base
+        key = str(n_rows) if args.partitions <= 1 else f"{n_rows} ({mode})"
+        result["tamanos"][key] = {"modo": mode, **run}
+        rss = max(run["rss_max_mib"], run["rss_max_pool_mib"] if args.partitions > 1 else 0)
+        print(f"{n_rows:>10} {size_mb:14.0f} {generation:15.1f} {run['segundos']:16.2f} "
+              f"{rss:15.0f}")
+
+    print(f"\n{'filas':>10} {'paso':<44} {'s':>9}")
+    for size, run in result["tamanos"].items():
+        for name, seconds in run["pasos"].items():
+            print(f"{size:>10} {name[:44]:<44} {seconds:9.3f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=4, ensure_ascii=False), encoding="utf-8")
+        print(f"\n[OK] Resultado → {args.json}")
+
+    if args.save_baseline:
+        # Se conservan los tamaños de la base que no se han vuelto a medir
+        baseline = {"tamanos": {}}
+        if args.baseline.exists():
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        sizes = {**baseline["tamanos"], **result["tamanos"]}
+        result["tamanos"] = {k: sizes[k] for k in sorted(sizes, key=lambda k: int(k.split()[0]))}
+        args.baseline.write_text(
+            json.dumps(result, indent=4, ensure_ascii=False), encoding="utf-8"
+        )
+        print(f"\n[OK] Línea base → {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"\n[INFO] Sin línea base en {args.baseline} (usar --save-baseline)")
+        return
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    lines, regressions = compare(
+        result, baseline, args.tolerance, args.min_seconds, args.min_mib
+    )
+    print(f"\n{'filas':>10} {'paso':<44} {'base (s)':>9} {'ahora':>9} {'ratio':>8}")
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n[WARN] {regressions} regresiones frente a la línea base")
+        sys.exit(1)
+    print("\n[OK] Sin regresiones frente a la línea base")
+
+
+if __name__ == "__main__":
+    main()
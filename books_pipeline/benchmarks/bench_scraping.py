@@ -0,0 +1,71 @@
+"""
+Benchmark del Bloque 1 (scraping) contra el stub local de Goodreads.
+
+Ejecuta `scrape_goodreads` con distintos niveles de concurrencia sobre las
+páginas guardadas en `fixtures/goodreads/` y verifica que el JSON generado es
+idéntico en todos los casos.
+
+Uso (desde books_pipeline/):
+    python benchmarks/bench_scraping.py --pages 3 --concurrency 1 4 8
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import scrape_goodreads  # noqa: E402
+from stub_goodreads import start_stub  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--rps", type=float, default=0, help="0 = sin límite")
+    parser.add_argument("--latency", type=float, default=0.05, help="latencia del stub (s)")
+    args = parser.parse_args()
+
+    server, base_url = start_stub(latency=args.latency)
+    scrape_goodreads.GOODREADS_BASE_URL = base_url
+    scrape_goodreads.BASE_SEARCH_URL = f"{base_url}/search"
+    scrape_goodreads.PAGES_TO_SCRAPE = args.pages
+    scrape_goodreads.MAX_BOOKS = 20 * args.pages
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(
+            f"{'concurrencia':>12} {'tiempo (s)':>11} {'libros/s':>9} "
+            f"{'conexiones':>11} {'máx. en vuelo':>14}  json"
+        )
+        reference = None
+        for concurrency in args.concurrency:
+            output = Path(tmp) / f"goodreads_{concurrency}.jsonl"
+            scrape_goodreads.OUTPUT_PATH = output
+            server.connections, server.max_in_flight = set(), 0
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                scrape_goodreads.scrape_goodreads(
+                    max_concurrency=concurrency, requests_per_second=args.rps
+                )
+            elapsed = time.perf_counter() - start
+
+            content = output.read_bytes()
+            reference = reference or content
+            same = "idéntico" if content == reference else "DIFERENTE"
+            n_books = scrape_goodreads.MAX_BOOKS
+            print(
+                f"{concurrency:>12} {elapsed:11.2f} {n_books / elapsed:9.1f} "
+                f"{len(server.connections):>11} {server.max_in_flight:>14}  {same}"
+            )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark del paso 6 (deduplicación + supervivencia) del Bloque 3.
+
+Compara el bucle de referencia por grupo (`apply_survivorship_loop`) con el motor
+columnar (`apply_survivorship`) sobre un df_all sintético y verifica que el
+Parquet resultante de dim_book es idéntico byte a byte. Por encima de
+`--loop-max-rows` el bucle no se ejecuta: su tiempo se extrapola linealmente
+desde el mayor tamaño medido y se marca con `~` y `(extrap.)`.
+
+Uso (desde books_pipeline/):
+    python benchmarks/bench_survivorship.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from integrate_pipeline import build_dim_book  # noqa: E402
+from survivorship import apply_survivorship, apply_survivorship_loop  # noqa: E402
+
+FIXED_TS = "2000-01-01T00:00:00Z"
+
+LANGS = np.array(["en", "es", "fr", "de", None], dtype=object)
+CURRENCIES = np.array(["EUR", "USD", "GBP", None], dtype=object)
+PUBLISHERS = np.array(["O'Reilly Media", "MIT Press", "Wiley", "Manning", None], dtype=object)
+CATEGORIES = np.array(["Computers", "Science", "Business & Economics", "Mathematics"], dtype=object)
+
+
+def make_df_all(n_rows, dup_rate=0.4, seed=42):
+    """Genera un df_all sintético con la forma de la salida del paso 5."""
+    rng = np.random.default_rng(seed)
+    n_books = max(1, int(n_rows * (1 - dup_rate)))
+    book = rng.integers(0, n_books, n_rows)
+
+    isbn13 = np.where(
+        book % 2 == 0, (9780000000000 + book).astype(float), np.nan
+    )
+    key = np.where(
+        np.isnan(isbn13),
+        np.char.add("title_", book.astype(str)).astype(object),
+        np.nan_to_num(isbn13).astype("int64").astype(str).astype(object),
+    )
+
+    title_len = rng.integers(5, 60, n_rows)
+    titles = np.array([f"Book {b} " + "x" * l for b, l in zip(book, title_len)], dtype=object)
+    titles[rng.random(n_rows) < 0.05] = None
+
+    source = np.where(rng.random(n_rows) < 0.5, "goodreads", "googlebooks").astype(object)
+    authors = [[f"Author {b % 997}", f"Author {(b + i) % 991}"][: 1 + i % 2] for i, b in enumerate(book)]
+    categories = [
+        list(CATEGORIES[rng.integers(0, len(CATEGORIES), k)]) for k in rng.integers(0, 3, n_rows)
+    ]
+
+    author_p = np.array([a[0] for a in authors], dtype=object)
+    author_p[rng.random(n_rows) < 0.3] = None
+
+    year = rng.integers(1990, 2025, n_rows)
+    dates = np.char.add(year.astype(str), "-01-01").astype(object)
+    dates[rng.random(n_rows) < 0.3] = None
+
+    price = np.round(rng.random(n_rows) * 80, 2)
+    price[rng.random(n_rows) < 0.6] = np.nan
+
+    isbn10 = np.array([str(1000000000 + b) for b in book], dtype=object)
+    isbn10[source == "goodreads"] = np.nan
+
+    return pd.DataFrame(
+        {
+            "title": pd.array(titles, dtype="str"),
+            "author_principal": pd.array(author_p, dtype="str"),
+            "rating": rng.random(n_rows) * 5,
+            "isbn10": isbn10,
+            "isbn13": isbn13,
+            "source": pd.array(source, dtype="str"),
+            "authors_list": authors,
+            "categories_list": categories,
+            "pub_date_normalized": dates,
+            "language_normalized": LANGS[rng.integers(0, len(LANGS), n_rows)],
+            "price_currency_normalized": CURRENCIES[rng.integers(0, len(CURRENCIES), n_rows)],
+            "publisher": pd.array(PUBLISHERS[rng.integers(0, len(PUBLISHERS), n_rows)], dtype="str"),
+            "price_amount": price,
+            "book_id_candidato": key,
+        }
+    )
+
+
+def dim_parquet_bytes(df_dim):
+    df_out = build_dim_book(df_dim)
+    df_out["ts_ultima_actualizacion"] = FIXED_TS
+    buf = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(df_out), buf)
+    return buf.getvalue()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument(
+        "--loop-max-rows",
+        type=int,
+        default=100_000,
+        help="No ejecutar el bucle de referencia por encima de este tamaño (100k tarda ~10 min)",
+    )
+    args = parser.parse_args()
+
+    print(f"{'filas':>10} {'grupos':>10} {'bucle (s)':>10} {'columnar (s)':>13} {'speedup':>8}  parquet")
+    loop_rate = None  # segundos por fila del bucle en el mayor tamaño medido
+    for n_rows in sorted(args.sizes):
+        df_all = make_df_all(n_rows)
+        df_fast, t_fast = timed(apply_survivorship, df_all)
+
+        if n_rows <= args.loop_max_rows:
+            df_loop, t_loop = timed(apply_survivorship_loop, df_all)
+            loop_rate = t_loop / n_rows
+            same = "idéntico" if dim_parquet_bytes(df_loop) == dim_parquet_bytes(df_fast) else "DIFERENTE"
+            loop_txt, speedup = f"{t_loop:10.2f}", f"{t_loop / t_fast:7.1f}x"
+        elif loop_rate is not None:
+            t_loop = loop_rate * n_rows
+            same = "(extrap.)"
+            loop_txt, speedup = f"{f'~{t_loop:.0f}':>10}", f"{f'~{t_loop / t_fast:.0f}x':>8}"
+        else:
+            same, loop_txt, speedup = "-", f"{'-':>10}", f"{'-':>8}"
+        print(f"{n_rows:>10} {len(df_fast):>10} {loop_txt} {t_fast:13.2f} {speedup}  {same}")
+
+
+if __name__ == "__main__":
+    main()
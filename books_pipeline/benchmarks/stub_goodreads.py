@@ -0,0 +1,71 @@
+"""
+Servidor HTTP local que sirve las páginas de Goodreads guardadas en
+`fixtures/goodreads/` (búsqueda y ficha de libro).
+
+Cada página de búsqueda reescribe los enlaces `/book/show/<id>` con el número
+de página para que las URLs de detalle no se repitan entre páginas. Registra
+peticiones, conexiones TCP y el máximo de peticiones simultáneas observadas.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "goodreads"
+SEARCH_PAGE = (FIXTURES_DIR / "search_page.html").read_text(encoding="utf-8")
+BOOK_PAGE = (FIXTURES_DIR / "book_page.html").read_text(encoding="utf-8")
+
+
+class GoodreadsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+
+        try:
+            time.sleep(server.latency)
+            url = urlparse(self.path)
+            if url.path == "/search":
+                page = parse_qs(url.query).get("page", ["1"])[0]
+                html = SEARCH_PAGE.replace("/book/show/", f"/book/show/p{page}-")
+            elif url.path.startswith("/book/show/"):
+                html = BOOK_PAGE
+            else:
+                self.send_error(404)
+                return
+
+            body = html.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(latency=0.05):
+    """Arranca el stub en un hilo y devuelve (server, url_base)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GoodreadsHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.connections = set()
+    server.in_flight = 0
+    server.max_in_flight = 0
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
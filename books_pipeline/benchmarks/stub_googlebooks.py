@@ -0,0 +1,252 @@
+"""
+Servidor HTTP local que imita el endpoint `volumes` de Google Books.
+
+Responde de forma determinista a partir de la query (`q`), con una latencia
+configurable, y registra cuántas conexiones TCP distintas se han abierto para
+poder comprobar la reutilización keep-alive. Respeta `maxResults` y las
+respuestas parciales (`fields=items(id,volumeInfo(title))`) y cuenta los
+bytes enviados.
+
+`start_faulty_stub` arranca una variante que inyecta fallos (429 con
+`Retry-After`, 5xx, 404, timeouts y conexiones cortadas) de forma
+determinista por query e intento, y opcionalmente una "tormenta": unos
+segundos en los que todo responde 429, para probar el cortacircuitos.
+"""
+
+import json
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_volume(query, rank=0):
+    """Volumen sintético estable para una query (y posición); None simula 'sin resultados'."""
+    h = zlib.crc32(query.encode("utf-8"))
+    if h % 10 == 0:
+        return None
+    if rank:
+        h = zlib.crc32(f"{query}#{rank}".encode("utf-8"))
+
+    isbn13 = f"978{h % 10**10:010d}"
+    return {
+        "kind": "books#volume",
+        "id": f"stub{h:08x}",
+        "etag": f"{h:x}",
+        "selfLink": f"https://www.googleapis.com/books/v1/volumes/stub{h:08x}",
+        "volumeInfo": {
+            "title": f"Libro {h % 1000}",
+            "authors": [f"Autor {h % 97}", f"Autor {h % 89}"],
+            "publisher": "Editorial Stub",
+            "publishedDate": f"{1990 + h % 35}-0{1 + h % 9}",
+            "language": "en",
+            "categories": ["Computers"],
+            "industryIdentifiers": [
+                {"type": "ISBN_13", "identifier": isbn13},
+                {"type": "ISBN_10", "identifier": isbn13[3:]},
+            ],
+            # Campos que la API devuelve y el enriquecimiento no usa
+            "description": " ".join(["Descripción sintética del libro."] * 20),
+            "pageCount": 100 + h % 900,
+            "printType": "BOOK",
+            "maturityRating": "NOT_MATURE",
+            "imageLinks": {
+                "smallThumbnail": f"http://books.google.com/books/content?id=stub{h:08x}&zoom=5",
+                "thumbnail": f"http://books.google.com/books/content?id=stub{h:08x}&zoom=1",
+            },
+            "previewLink": f"http://books.google.com/books?id=stub{h:08x}&hl=&source=gbs_api",
+            "infoLink": f"http://books.google.com/books?id=stub{h:08x}&source=gbs_api",
+        },
+        "saleInfo": {
+            "country": "ES",
+            "saleability": "FOR_SALE",
+            "listPrice": {"amount": (h % 5000) / 100, "currencyCode": "EUR"},
+        },
+        "accessInfo": {"country": "ES", "viewability": "PARTIAL", "embeddable": True},
+        "searchInfo": {"textSnippet": "Fragmento sintético de la búsqueda."},
+    }
+
+
+def parse_fields(spec):
+    """`a,b(c,d(e))` → {"a": None, "b": {"c": None, "d": {"e": None}}}."""
+    tree, stack, name = {}, [], ""
+    for ch in spec + ",":
+        if ch in ",()":
+            if name:
+                tree[name.strip()] = None
+            if ch == "(":
+                stack.append((tree, name.strip()))
+                tree = {}
+            elif ch == ")":
+                parent, key = stack.pop()
+                parent[key] = tree
+                tree = parent
+            name = ""
+        else:
+            name += ch
+    return tree
+
+
+def apply_fields(value, tree):
+    """Poda `value` a los campos de `tree` (None = el campo entero)."""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [apply_fields(v, tree) for v in value]
+    if not isinstance(value, dict):
+        return value
+    return {k: apply_fields(value[k], sub) for k, sub in tree.items() if k in value}
+
+
+class VolumesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+
+        time.sleep(server.latency)
+        self.send_volumes(parse_qs(urlparse(self.path).query))
+
+    def send_volumes(self, params):
+        server = self.server
+        query = params.get("q", [""])[0]
+        max_results = int(params.get("maxResults", ["10"])[0])
+        volumes = [make_volume(query, rank) for rank in range(max_results)]
+        if volumes and volumes[0]:
+            payload = {"kind": "books#volumes", "totalItems": 1000, "items": volumes}
+        else:
+            payload = {"kind": "books#volumes", "totalItems": 0}
+        if "fields" in params:
+            payload = apply_fields(payload, parse_fields(params["fields"][0]))
+        body = json.dumps(payload).encode("utf-8")
+        with server.lock:
+            server.bytes_sent += len(body)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, reason, headers=None):
+        body = json.dumps(
+            {"error": {"code": status, "message": reason, "errors": [{"reason": reason}]}}
+        ).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+# Fallos inyectables y su respuesta
+FAULTS = ("429", "503", "500", "timeout", "reset", "404")
+
+
+class FaultyVolumesHandler(VolumesHandler):
+    """
+    Como VolumesHandler, pero cada intento de una query puede fallar con
+    probabilidad `server.faults[tipo]`. Solo fallan los `server.faulty_attempts`
+    primeros intentos de cada query, así que con suficientes reintentos todas
+    acaban respondiendo (salvo el 404, que es definitivo).
+    """
+
+    def do_GET(self):
+        server = self.server
+        params = parse_qs(urlparse(self.path).query)
+        query = params.get("q", [""])[0]
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+            server.attempts[query] += 1
+            attempt = server.attempts[query]
+            server.started = server.started or time.monotonic()
+            elapsed = time.monotonic() - server.started
+
+        fault = None
+        if server.storm[0] <= elapsed < server.storm[1]:
+            fault = "429"
+        elif attempt <= server.faulty_attempts:
+            draw = zlib.crc32(f"{query}|{attempt}".encode("utf-8")) / 2**32
+            for name in FAULTS:
+                draw -= server.faults.get(name, 0)
+                if draw < 0:
+                    fault = name
+                    break
+        if fault:
+            with server.lock:
+                server.injected[fault] += 1
+
+        time.sleep(server.latency)
+        if fault == "429":
+            self.send_error_json(
+                429, "rateLimitExceeded", {"Retry-After": f"{server.retry_after:g}"}
+            )
+        elif fault in ("500", "503", "404"):
+            self.send_error_json(int(fault), "backendError" if fault != "404" else "notFound")
+        elif fault in ("reset", "timeout"):
+            if fault == "timeout":
+                time.sleep(server.timeout_delay)  # el cliente deja de esperar antes
+            self.close_connection = True  # sin respuesta
+        else:
+            self.send_volumes(params)
+
+
+def start_stub(latency=0.05, handler=VolumesHandler):
+    """Arranca el stub en un hilo y devuelve (server, url_volumes)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.connections = set()
+    server.bytes_sent = 0
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}/books/v1/volumes"
+
+
+def start_faulty_stub(
+    faults,
+    latency=0.0,
+    retry_after=1.0,
+    timeout_delay=1.0,
+    faulty_attempts=2,
+    storm=(0, 0),
+):
+    """
+    Stub con fallos: `faults` = {"429": 0.1, "503": 0.05, …} (probabilidad por
+    intento), `storm` = (desde, hasta) en segundos desde la primera petición
+    durante los que todas las peticiones responden 429.
+    Devuelve (server, url_volumes); `server.injected` cuenta los fallos.
+    """
+    server, url = start_stub(latency=latency, handler=FaultyVolumesHandler)
+    server.faults = faults
+    server.retry_after = retry_after
+    server.timeout_delay = timeout_delay
+    server.faulty_attempts = faulty_attempts
+    server.storm = storm
+    server.attempts = Counter()
+    server.injected = Counter()
+    server.started = None
+    return server, url
+
+
+if __name__ == "__main__":
+    srv, url = start_stub()
+    print(f"[INFO] Stub Google Books escuchando en {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -0,0 +1,302 @@
+"""
+Generador sintético del landing (Goodreads en JSON Lines + CSV de Google Books).
+
+Reproducible con semilla y pensado para tamaños de producción (hasta decenas
+de millones de filas): los atributos de cada libro se sortean una sola vez
+y los registros se generan y escriben por bloques, con un coste de memoria
+acotado por `CHUNK_ROWS`.
+
+Parámetros (`CatalogConfig`):
+    - dup_rate: fracción de registros extra que repiten un libro ya emitido
+      (en la misma fuente o en la otra), con variantes de título;
+    - missing_isbn_rate: fracción de registros sin ISBN (ni 13 ni 10);
+    - max_authors / max_categories: longitud máxima de las listas `a | b | c`;
+    - invalid_date_rate / invalid_currency_rate: fechas y monedas que los
+      normalizadores deben rechazar.
+
+Uso como script (desde books_pipeline/):
+    python benchmarks/synth_catalog.py --rows 1000000 --out /tmp/landing
+"""
+
+import argparse
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 500_000
+ISBN_OFFSET = 100_000_000  # ISBN con aspecto real (no 978000000…)
+
+GB_FIELDS = [
+    "gb_id", "title", "subtitle", "authors", "publisher", "pub_date", "language",
+    "categories", "isbn13", "isbn10", "price_amount", "price_currency",
+]
+
+VOCABULARY = np.array(
+    [f"{stem}{suffix}" for stem in (
+        "data", "python", "learn", "model", "graph", "cloud", "deep", "stat", "code", "system",
+        "design", "network", "vision", "market", "finance", "health", "theory", "method",
+        "signal", "robot", "query", "stream", "scale", "secure", "mobile", "agile", "lean",
+        "web", "game", "music",
+    ) for suffix in ("", "s", "ing", "ed", "er", "ics", "ion", "al", "ive", "ness")],
+    dtype=object,
+)
+SUBTITLES = np.array(
+    ["", "A Practical Guide", "Principles and Practice", "An Introduction", "Second Edition"],
+    dtype=object,
+)
+PUBLISHERS = np.array(
+    ["O'Reilly Media", "MIT Press", "John Wiley & Sons", "Manning", "Packt", "Apress", ""],
+    dtype=object,
+)
+CATEGORIES = np.array(
+    ["Computers", "Science", "Business & Economics", "Mathematics", "Technology & Engineering",
+     "Education", "Medical", "Psychology", "Social Science", "Reference"],
+    dtype=object,
+)
+# Variantes reales que los normalizadores aceptan (y alguna vacía)
+LANGUAGES = np.array(["en", "EN", "eng", "English", "es", "spa", "fr-FR", "pt_BR", "de", ""],
+                     dtype=object)
+CURRENCIES = np.array(["EUR", "USD", "GBP", "eur", "€", "$", "US$"], dtype=object)
+INVALID_DATES = np.array(["unknown", "20??", "2020-13-45", "n/d", "31/12/99"], dtype=object)
+INVALID_CURRENCIES = np.array(["EURO", "??", "usd$", "12", "E"], dtype=object)
+
+
+@dataclass
+class CatalogConfig:
+    rows: int = 100_000
+    goodreads_share: float = 0.5
+    dup_rate: float = 0.3
+    missing_isbn_rate: float = 0.3
+    max_authors: int = 4
+    max_categories: int = 3
+    invalid_date_rate: float = 0.05
+    invalid_currency_rate: float = 0.05
+    seed: int = 2024
+
+
+# -----------------------------------------------------------
+# ISBN
+# -----------------------------------------------------------
+
+def _digits(numbers, width):
+    """Dígitos (de izquierda a derecha) de enteros no negativos: matriz (n, width)."""
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    return (numbers[:, None] // powers) % 10
+
+
+def isbn_pairs(book_ids):
+    """ISBN-13 (978…) e ISBN-10 válidos y únicos por libro."""
+    body = (book_ids.astype(np.int64) + ISBN_OFFSET) % 10**9
+    digits10 = _digits(body, 9)
+    check10 = (11 - (digits10 * np.arange(10, 1, -1)).sum(axis=1) % 11) % 11
+    isbn10 = pd.Series(body).astype(str).str.zfill(9) + np.where(
+        check10 == 10, "X", check10.astype(str)
+    )
+
+    digits13 = _digits(978 * 10**9 + body, 12)
+    check13 = (10 - (digits13 * np.tile([1, 3], 6)).sum(axis=1) % 10) % 10
+    isbn13 = pd.Series(978 * 10**10 + body * 10 + check13).astype(str)
+    return isbn13.to_numpy(object), isbn10.to_numpy(object)
+
+
+# -----------------------------------------------------------
+# ATRIBUTOS POR LIBRO Y REGISTROS
+# -----------------------------------------------------------
+
+class _Books:
+    """Atributos de cada libro (compactos: índices, no textos)."""
+
+    def __init__(self, n_books, config, rng):
+        self.words = rng.integers(0, len(VOCABULARY), (n_books, 6), dtype=np.int16)
+        self.lengths = rng.integers(2, 7, n_books, dtype=np.int8)
+        self.subtitle = rng.integers(0, len(SUBTITLES), n_books, dtype=np.int8)
+        self.author = rng.integers(0, max(1, n_books // 3), n_books, dtype=np.int64)
+        self.n_authors = rng.integers(1, config.max_authors + 1, n_books, dtype=np.int8)
+        self.category = rng.integers(0, len(CATEGORIES), n_books, dtype=np.int8)
+        self.n_categories = rng.integers(1, config.max_categories + 1, n_books, dtype=np.int8)
+        self.publisher = rng.integers(0, len(PUBLISHERS), n_books, dtype=np.int8)
+        self.year = rng.integers(1950, 2025, n_books, dtype=np.int16)
+        self.month = rng.integers(1, 13, n_books, dtype=np.int8)
+        self.day = rng.integers(1, 29, n_books, dtype=np.int8)
+        self.language = rng.integers(0, len(LANGUAGES), n_books, dtype=np.int8)
+        self.rating = rng.integers(100, 501, n_books, dtype=np.int16)
+
+
+def _titles(books, ids):
+    words = books.words[ids]
+    lengths = books.lengths[ids]
+    title = pd.Series(VOCABULARY[words[:, 0]])
+    for k in range(1, words.shape[1]):
+        title = title.where(lengths <= k, title + " " + VOCABULARY[words[:, k]])
+    return title.str.title()
+
+
+def _joined(first, n_items, size, labels):
+    """Listas `a | b | c` de `n_items` elementos consecutivos a partir de `first`."""
+    text = pd.Series(labels(first % size))
+    for k in range(1, int(n_items.max(initial=1))):
+        text = text.where(n_items <= k, text + " | " + labels((first + k) % size))
+    return text
+
+
+def _author_names(ids):
+    ids = pd.Series(ids).astype(str)
+    return ("Author" + ids + " Surname" + ids).to_numpy(object)
+
+
+def _title_variants(title, rng):
+    """Mismo libro escrito de otra forma: mayúsculas, edición, paréntesis, espacios."""
+    variant = rng.integers(0, 5, len(title))
+    return (
+        title.where(variant != 1, title.str.upper())
+        .where(variant != 2, title + ", 2nd Edition")
+        .where(variant != 3, title + " (Paperback)")
+        .where(variant != 4, "  " + title + " ")
+    )
+
+
+def _dates(books, ids, config, rng):
+    """Fechas en formatos variados; una fracción inválida y otra vacía."""
+    year = pd.Series(books.year[ids]).astype(str)
+    month = pd.Series(books.month[ids]).astype(str).str.zfill(2)
+    day = pd.Series(books.day[ids]).astype(str).str.zfill(2)
+    fmt = rng.integers(0, 5, len(ids))
+    date = (
+        year.where(fmt != 1, year + "-" + month)
+        .where(fmt != 2, year + "-" + month + "-" + day)
+        .where(fmt != 3, "c. " + year)
+        .where(fmt != 4, year + "/" + month + "/" + day)
+    )
+    draw = rng.random(len(ids))
+    date = date.where(draw >= config.invalid_date_rate, INVALID_DATES[fmt])
+    return date.where(draw < 0.97, "")
+
+
+def _goodreads_chunk(books, ids, rows, duplicate, missing_isbn, isbn13, isbn10, rng):
+    title = _titles(books, ids)
+    title = title.where(~duplicate, _title_variants(title, rng))
+    only10 = rng.random(len(ids)) < 0.1
+    return pd.DataFrame(
+        {
+            "title": title.to_numpy(object),
+            "author": _author_names(books.author[ids]),
+            "rating": books.rating[ids] / 100,
+            "ratings_count": (rows * 7919) % 50_000,
+            "book_url": "https://www.goodreads.com/book/show/"
+            + pd.Series(rows).astype(str).to_numpy(object),
+            "isbn10": np.where(missing_isbn | ~only10, None, isbn10),
+            "isbn13": np.where(missing_isbn | only10, None, isbn13),
+        }
+    )
+
+
+def _googlebooks_chunk(books, ids, rows, duplicate, missing_isbn, isbn13, isbn10, config, rng):
+    title = _titles(books, ids)
+    title = title.where(~duplicate, _title_variants(title, rng))
+    authors = _joined(
+        books.author[ids], books.n_authors[ids], max(1, len(books.author) // 3), _author_names
+    )
+    categories = _joined(
+        books.category[ids].astype(np.int64),
+        books.n_categories[ids],
+        len(CATEGORIES),
+        lambda k: CATEGORIES[k],
+    )
+
+    n = len(ids)
+    has_price = rng.random(n) < 0.4
+    invalid_currency = rng.random(n) < config.invalid_currency_rate
+    currency = np.where(
+        invalid_currency,
+        INVALID_CURRENCIES[rng.integers(0, len(INVALID_CURRENCIES), n)],
+        CURRENCIES[rng.integers(0, len(CURRENCIES), n)],
+    )
+    price = np.round(rng.uniform(5, 120, n), 2)
+    only10 = rng.random(n) < 0.15
+    return pd.DataFrame(
+        {
+            "gb_id": "gb" + pd.Series(rows).map("{:x}".format).to_numpy(object),
+            "title": title.to_numpy(object),
+            "subtitle": SUBTITLES[books.subtitle[ids]],
+            "authors": authors.to_numpy(object),
+            "publisher": PUBLISHERS[books.publisher[ids]],
+            "pub_date": _dates(books, ids, config, rng).to_numpy(object),
+            "language": LANGUAGES[books.language[ids]],
+            "categories": categories.to_numpy(object),
+            "isbn13": np.where(missing_isbn | only10, "", isbn13),
+            "isbn10": np.where(missing_isbn, "", isbn10),
+            "price_amount": np.where(has_price, price, np.nan),
+            "price_currency": np.where(has_price, currency, ""),
+        }
+    )
+
+
+def write_catalog(landing_dir, config=None, **overrides):
+    """
+    Escribe `goodreads_books.jsonl` y `googlebooks_books.csv` en `landing_dir`
+    con `config.rows` registros en total; devuelve (ruta_goodreads, ruta_googlebooks).
+
+    Los `n_libros = rows / (1 + dup_rate)` primeros registros presentan cada libro
+    una vez; el resto son duplicados de libros al azar. Cada registro va a
+    Goodreads con probabilidad `goodreads_share` y si no a Google Books.
+    """
+    config = config or CatalogConfig()
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    rng = np.random.default_rng(config.seed)
+    n_books = max(1, int(config.rows / (1 + config.dup_rate)))
+    books = _Books(n_books, config, rng)
+
+    landing_dir = Path(landing_dir)
+    landing_dir.mkdir(parents=True, exist_ok=True)
+    gd_path = landing_dir / "goodreads_books.jsonl"
+    gb_path = landing_dir / "googlebooks_books.csv"
+
+    with open(gd_path, "w", encoding="utf-8") as gd, \
+            open(gb_path, "w", encoding="utf-8", newline="") as gb:
+        gb.write(";".join(GB_FIELDS) + "\n")
+        for start in range(0, config.rows, CHUNK_ROWS):
+            rows = np.arange(start, min(start + CHUNK_ROWS, config.rows), dtype=np.int64)
+            duplicate = rows >= n_books
+            ids = np.where(duplicate, rng.integers(0, n_books, len(rows)), rows)
+            missing_isbn = rng.random(len(rows)) < config.missing_isbn_rate
+            isbn13, isbn10 = isbn_pairs(ids)
+            to_goodreads = rng.random(len(rows)) < config.goodreads_share
+
+            part = to_goodreads
+            df_gd = _goodreads_chunk(
+                books, ids[part], rows[part], duplicate[part], missing_isbn[part],
+                isbn13[part], isbn10[part], rng,
+            )
+            if len(df_gd):
+                df_gd.to_json(gd, orient="records", lines=True, force_ascii=False)
+
+            part = ~to_goodreads
+            df_gb = _googlebooks_chunk(
+                books, ids[part], rows[part], duplicate[part], missing_isbn[part],
+                isbn13[part], isbn10[part], config, rng,
+            )
+            df_gb.to_csv(gb, sep=";", index=False, header=False)
+    return gd_path, gb_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", type=Path, required=True, help="directorio de landing")
+    for name, default in asdict(CatalogConfig()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    args = vars(parser.parse_args())
+    out = args.pop("out")
+
+    start = time.perf_counter()
+    paths = write_catalog(out, CatalogConfig(**args))
+    size_mb = sum(p.stat().st_size for p in paths) / 2**20
+    print(f"[OK] {args['rows']} filas ({size_mb:.0f} MiB) en "
+          f"{time.perf_counter() - start:.1f} s → {out}")
+
+
+if __name__ == "__main__":
+    main()
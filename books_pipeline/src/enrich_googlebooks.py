@@ -2,26 +2,93 @@ import os
 import json
 import csv
 import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from urllib.parse import quote_plus
 
+import pyarrow as pa
+import pyarrow.parquet as pq
 import requests
 from dotenv import load_dotenv
 
-BASE_DIR = Path(__file__).resolve().parent.parent
+from utils_cache import ResponseCache
+from utils_http import (
+    CircuitBreaker,
+    RetryPolicy,
+    TokenBucket,
+    classify_error,
+    is_overload,
+    make_session,
+    retry_after_seconds,
+    shared_map,
+)
+from utils_landing import (
+    GOOGLEBOOKS_CSV,
+    GOOGLEBOOKS_PARQUET,
+    GOOGLEBOOKS_PARQUET_SCHEMA,
+    goodreads_landing_path,
+    iter_json_records,
+)
+from utils_metrics import (
+    PROFILE_MODES,
+    RUN_REPORT_JSON,
+    count,
+    observe,
+    profiling,
+    write_run_report,
+)
 
-INPUT_JSON = BASE_DIR / "landing" / "goodreads_books.json"
-OUTPUT_CSV = BASE_DIR / "landing" / "googlebooks_books.csv"
+BASE_DIR = Path(__file__).resolve().parent.parent
 
-GOOGLE_BOOKS_BASE_URL = "https://www.googleapis.com/books/v1/volumes"
+OUTPUT_CSV = GOOGLEBOOKS_CSV
+OUTPUT_PARQUET = GOOGLEBOOKS_PARQUET
+CACHE_DB = BASE_DIR / "cache" / "googlebooks_cache.sqlite"
 
 load_dotenv()
+GOOGLE_BOOKS_BASE_URL = os.getenv(
+    "GOOGLE_BOOKS_BASE_URL", "https://www.googleapis.com/books/v1/volumes"
+)
 API_KEY = os.getenv("GOOGLE_BOOKS_API_KEY")
 
 REQUEST_DELAY = 0.5  # pausa entre consultas
-MAX_RETRIES = 3
+MAX_RETRIES = 3      # intentos por consulta
 TIMEOUT = 12
 
+# Reintentos: backoff exponencial con jitter (o `Retry-After`) y cortacircuitos
+# que pausa a todos los hilos tras BREAKER_THRESHOLD errores 429/5xx seguidos
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+RETRY_AFTER_MAX = 300.0
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 15.0
+BREAKER_MAX_COOLDOWN = 300.0
+
+# Concurrencia: N peticiones en vuelo bajo un límite global de peticiones/s
+MAX_WORKERS = 4
+REQUESTS_PER_SECOND = 1 / REQUEST_DELAY
+
+# Caché persistente de respuestas por query
+CACHE_TTL = 30 * 24 * 3600           # respuestas con resultado
+CACHE_NEGATIVE_TTL = 7 * 24 * 3600   # "sin resultados"
+CACHE_MAX_ENTRIES = 200_000
+
+# Respuesta parcial: solo el primer volumen y solo los campos que lee
+# `volume_to_row` (menos bytes por petición y en la caché)
+MAX_RESULTS = 1
+VOLUME_FIELDS = (
+    "items(id,"
+    "volumeInfo(title,subtitle,authors,publisher,publishedDate,language,categories,"
+    "industryIdentifiers),"
+    "saleInfo(listPrice,retailPrice))"
+)
+
+# Formato del landing: "csv" (`;`, listas unidas con " | ") o "parquet"
+# (listas nativas, escrito por grupos de PARQUET_ROW_GROUP_ROWS filas)
+LANDING_FORMATS = {"csv": OUTPUT_CSV, "parquet": OUTPUT_PARQUET}
+LANDING_FORMAT = "csv"
+PARQUET_ROW_GROUP_ROWS = 10_000
+
 
 def build_query(book):
     isbn13 = book.get("isbn13")
@@ -42,25 +109,107 @@ def build_query(book):
     return q
 
 
-def fetch_google_books(query):
-    params = {"q": query, "maxResults": 5}
+def open_cache(path=CACHE_DB):
+    return ResponseCache(
+        path,
+        ttl_seconds=CACHE_TTL,
+        negative_ttl_seconds=CACHE_NEGATIVE_TTL,
+        max_entries=CACHE_MAX_ENTRIES,
+    )
+
+
+def retry_policy():
+    return RetryPolicy(MAX_RETRIES, RETRY_BASE_DELAY, RETRY_MAX_DELAY, RETRY_AFTER_MAX)
+
+
+def circuit_breaker():
+    return CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN, BREAKER_MAX_COOLDOWN)
+
+
+def request_google_books(query, session=None, limiter=None, cache=None, breaker=None, policy=None):
+    """
+    Primer volumen para `query` (None = sin resultados). Los errores
+    transitorios se reintentan según `policy`; lanza el último error si es
+    definitivo (p. ej. 404) o si se agotan los intentos.
+    """
+    if cache is not None:
+        found, volume = cache.get(query)
+        if found:
+            count("googlebooks.cache_aciertos")
+            return volume
+
+    params = {"q": query, "maxResults": MAX_RESULTS}
+    if VOLUME_FIELDS:
+        params["fields"] = VOLUME_FIELDS
     if API_KEY:
         params["key"] = API_KEY
 
-    for attempt in range(MAX_RETRIES):
+    http = session or requests
+    policy = policy or retry_policy()
+
+    for attempt in range(policy.max_attempts):
+        if attempt:
+            count("googlebooks.reintentos")
         try:
-            resp = requests.get(
-                GOOGLE_BOOKS_BASE_URL, params=params, timeout=TIMEOUT
-            )
+            if breaker is not None:
+                paused = breaker.wait()
+                if paused:
+                    observe("googlebooks.pausa_cortacircuitos_ms", paused * 1000)
+            if limiter:
+                start = time.perf_counter()
+                limiter.acquire()
+                observe("googlebooks.espera_limitador_ms", (time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            try:
+                resp = http.get(
+                    GOOGLE_BOOKS_BASE_URL, params=params, timeout=TIMEOUT
+                )
+            finally:
+                count("googlebooks.peticiones")
+                observe("googlebooks.peticion_ms", (time.perf_counter() - start) * 1000)
+            count(f"googlebooks.http_{resp.status_code}")
             resp.raise_for_status()
             data = resp.json()
-            items = data.get("items", [])
-            return items[0] if items else None
         except Exception as e:
-            print(f"[WARN] Error intento {attempt + 1}/{MAX_RETRIES}: {e}")
-            time.sleep(1.2)
+            kind, retryable = classify_error(e)
+            count("googlebooks.errores")
+            count(f"googlebooks.errores.{kind}")
+            retry_after = retry_after_seconds(getattr(e, "response", None))
+            if breaker is not None and is_overload(e) and breaker.record_failure(retry_after):
+                count("googlebooks.cortacircuitos_aperturas")
+                pause = breaker.open_until - time.monotonic()
+                print(f"[WARN] Errores {kind} seguidos: todas las consultas en pausa {pause:.0f} s")
+
+            if not retryable or attempt + 1 == policy.max_attempts:
+                print(f"[WARN] Error intento {attempt + 1}/{policy.max_attempts} ({kind}): {e}")
+                count("googlebooks.consultas_fallidas")
+                raise
+
+            delay = policy.delay(attempt, retry_after)
+            observe("googlebooks.espera_reintento_ms", delay * 1000)
+            print(
+                f"[WARN] Error intento {attempt + 1}/{policy.max_attempts} ({kind}): {e} "
+                f"→ reintento en {delay:.1f} s"
+            )
+            time.sleep(delay)
+            continue
+
+        if breaker is not None:
+            breaker.record_success()
+        items = data.get("items", [])
+        volume = items[0] if items else None
+        if cache is not None:
+            cache.set(query, volume)
+        return volume
 
-    return None
+
+def fetch_google_books(query, session=None, limiter=None, cache=None, breaker=None, policy=None):
+    try:
+        return request_google_books(
+            query, session=session, limiter=limiter, cache=cache, breaker=breaker, policy=policy
+        )
+    except Exception:
+        return None
 
 
 def normalize_list(value):
@@ -71,90 +220,375 @@ def normalize_list(value):
     return str(value)
 
 
-def enrich_books():
-    print("[INFO] Iniciando enriquecimiento Google Books…")
-
-    if not INPUT_JSON.exists():
-        raise FileNotFoundError(f"No se encuentra {INPUT_JSON}")
-
-    with open(INPUT_JSON, "r", encoding="utf-8") as f:
-        books = json.load(f)
-
-    rows = []
-
-    for i, book in enumerate(books, start=1):
-        title = book.get("title")
-        print(f"\n[INFO] Libro {i}/{len(books)} → {title}")
-
-        query = build_query(book)
-        if not query:
-            print("[WARN] Query vacía, saltando libro.")
-            continue
+CSV_FIELDS = [
+    "gb_id",
+    "title",
+    "subtitle",
+    "authors",
+    "publisher",
+    "pub_date",
+    "language",
+    "categories",
+    "isbn13",
+    "isbn10",
+    "price_amount",
+    "price_currency",
+]
+
+
+def volume_to_row(book, volume):
+    """
+    Convierte un volumen de Google Books en una fila del landing. Autores y
+    categorías se quedan como listas; el escritor CSV las une con " | ".
+    """
+    info = volume.get("volumeInfo", {})
+    sale = volume.get("saleInfo", {})
+
+    # ISBNs desde Google Books
+    isbn10 = None
+    isbn13 = None
+    for ident in info.get("industryIdentifiers", []):
+        if ident.get("type") == "ISBN_10":
+            isbn10 = ident.get("identifier")
+        if ident.get("type") == "ISBN_13":
+            isbn13 = ident.get("identifier")
+
+    # Rellenar con los de Goodreads si faltan
+    isbn10 = isbn10 or book.get("isbn10")
+    isbn13 = isbn13 or book.get("isbn13")
+
+    # Precio
+    price = sale.get("listPrice") or sale.get("retailPrice") or {}
+    price_amount = price.get("amount")
+    price_currency = price.get("currencyCode")
+
+    return {
+        "gb_id": volume.get("id"),
+        "title": info.get("title"),
+        "subtitle": info.get("subtitle"),
+        "authors": info.get("authors") or None,
+        "publisher": info.get("publisher"),
+        "pub_date": info.get("publishedDate"),
+        "language": info.get("language"),
+        "categories": info.get("categories") or None,
+        "isbn13": isbn13,
+        "isbn10": isbn10,
+        "price_amount": price_amount,
+        "price_currency": price_currency,
+    }
+
+
+# -----------------------------------------------------------
+# ESCRITURA DEL LANDING
+# -----------------------------------------------------------
+
+class CsvLandingWriter:
+    """Filas al CSV `;`; las listas se unen con " | "."""
+
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.writer = csv.DictWriter(self.file, delimiter=";", fieldnames=CSV_FIELDS)
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(
+            {
+                **row,
+                "authors": normalize_list(row["authors"]),
+                "categories": normalize_list(row["categories"]),
+            }
+        )
 
-        volume = fetch_google_books(query)
-        time.sleep(REQUEST_DELAY)
+    def __enter__(self):
+        return self
 
-        if not volume:
-            print("[WARN] Sin resultados en Google Books.")
-            continue
+    def __exit__(self, *exc):
+        self.file.close()
 
-        info = volume.get("volumeInfo", {})
-        sale = volume.get("saleInfo", {})
 
-        # ISBNs desde Google Books
-        isbn10 = None
-        isbn13 = None
-        for ident in info.get("industryIdentifiers", []):
-            if ident.get("type") == "ISBN_10":
-                isbn10 = ident.get("identifier")
-            if ident.get("type") == "ISBN_13":
-                isbn13 = ident.get("identifier")
+class ParquetLandingWriter:
+    """
+    Filas al Parquet con `GOOGLEBOOKS_PARQUET_SCHEMA`. Se acumulan en memoria
+    y se vuelcan como un grupo de filas cada PARQUET_ROW_GROUP_ROWS, así que
+    la memoria no crece con el número de libros. El manifiesto va en los
+    metadatos del propio fichero.
+    """
 
-        # Rellenar con los de Goodreads si faltan
-        isbn10 = isbn10 or book.get("isbn10")
-        isbn13 = isbn13 or book.get("isbn13")
+    def __init__(self, path):
+        self.writer = pq.ParquetWriter(path, GOOGLEBOOKS_PARQUET_SCHEMA)
+        self.rows = []
 
-        # Precio
-        price = sale.get("listPrice") or sale.get("retailPrice") or {}
-        price_amount = price.get("amount")
-        price_currency = price.get("currencyCode")
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= PARQUET_ROW_GROUP_ROWS:
+            self.flush()
 
-        rows.append(
-            {
-                "gb_id": volume.get("id"),
-                "title": info.get("title"),
-                "subtitle": info.get("subtitle"),
-                "authors": normalize_list(info.get("authors")),
-                "publisher": info.get("publisher"),
-                "pub_date": info.get("publishedDate"),
-                "language": info.get("language"),
-                "categories": normalize_list(info.get("categories")),
-                "isbn13": isbn13,
-                "isbn10": isbn10,
-                "price_amount": price_amount,
-                "price_currency": price_currency,
-            }
+    def flush(self):
+        if self.rows:
+            self.writer.write_table(
+                pa.Table.from_pylist(self.rows, schema=GOOGLEBOOKS_PARQUET_SCHEMA)
+            )
+            self.rows = []
+
+    def add_manifest(self, manifest):
+        self.writer.add_key_value_metadata({"manifest": json.dumps(manifest, ensure_ascii=False)})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+        self.writer.close()
+
+
+def landing_writer(path, parquet):
+    return ParquetLandingWriter(path) if parquet else CsvLandingWriter(path)
+
+
+def read_previous_rows(output_path, manifest_path):
+    """(manifiesto, filas) del landing anterior; (None, None) si falta algo."""
+    if not output_path.exists():
+        return None, None
+    if output_path.suffix == ".parquet":
+        metadata = pq.read_metadata(output_path).metadata or {}
+        if b"manifest" not in metadata:
+            return None, None
+        return json.loads(metadata[b"manifest"]), pq.read_table(output_path).to_pylist()
+
+    if not manifest_path.exists():
+        return None, None
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    with open(output_path, "r", encoding="utf-8", newline="") as f:
+        return manifest, list(csv.DictReader(f, delimiter=";"))
+
+
+def load_previous_output(output_path, manifest_path):
+    """
+    Lee el landing anterior y su manifiesto {query: fila | None}.
+
+    Devuelve {query: fila del landing o None si no hubo resultados}, o {} si
+    faltan ficheros o no son coherentes entre sí.
+    """
+    manifest, previous_rows = read_previous_rows(output_path, manifest_path)
+    if manifest is None:
+        return {}
+
+    if manifest.get("rows") != len(previous_rows):
+        print("[WARN] Manifiesto desincronizado con el landing; se reprocesa todo.")
+        return {}
+
+    return {
+        query: previous_rows[idx] if idx is not None else None
+        for query, idx in manifest.get("queries", {}).items()
+    }
+
+
+def write_atomic(path, write):
+    """Escribe en un temporal junto a `path` y lo sustituye con os.replace."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def enrich_books(
+    workers=MAX_WORKERS,
+    requests_per_second=REQUESTS_PER_SECOND,
+    input_path=None,
+    output_path=OUTPUT_CSV,
+    cache_path=CACHE_DB,
+    incremental=False,
+):
+    print("[INFO] Iniciando enriquecimiento Google Books…")
+    print(f"[INFO] Concurrencia: {workers} hilos, límite {requests_per_second:g} peticiones/s")
+
+    input_path = input_path or goodreads_landing_path()
+    if not input_path.exists():
+        raise FileNotFoundError(f"No se encuentra {input_path}")
+
+    # Modo incremental: solo se consultan las queries nuevas o cambiadas.
+    # El manifiesto del CSV va en un fichero aparte; el del Parquet, dentro.
+    parquet = output_path.suffix == ".parquet"
+    manifest_path = output_path.with_suffix(".manifest.json")
+    previous = load_previous_output(output_path, manifest_path) if incremental else {}
+
+    session = make_session(pool_size=workers)
+    limiter = TokenBucket(requests_per_second)
+    breaker = circuit_breaker()
+    policy = retry_policy()
+    cache = open_cache(cache_path) if cache_path else None
+
+    def lookup(query):
+        """
+        (volumen, ok); ok=False si la consulta falló y debe reintentarse en
+        otra ejecución.
+        """
+        if not query or query in previous:
+            return None, True
+        try:
+            volume = request_google_books(
+                query,
+                session=session,
+                limiter=limiter,
+                cache=cache,
+                breaker=breaker,
+                policy=policy,
+            )
+            return volume, True
+        except Exception:
+            return None, False
+
+    def planned(books):
+        for book in books:
+            yield book, build_query(book)
+
+    n_rows = 0
+    n_reused = 0
+    n_books = 0
+    queries = set()
+    manifest = {}
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+
+    # Los libros se leen en streaming y las filas se escriben según llegan,
+    # en el orden de entrada, con un número acotado de consultas en vuelo.
+    # Los libros con la misma query (ediciones, mismo ISBN repetido en varias
+    # búsquedas) comparten una única consulta y su volumen.
+    with session, ThreadPoolExecutor(max_workers=workers) as pool, landing_writer(
+        tmp_path, parquet
+    ) as writer:
+        results = shared_map(
+            pool,
+            lookup,
+            planned(iter_json_records(input_path)),
+            key=lambda planned_book: planned_book[1],
+            window=4 * workers,
         )
 
-        print(f"[OK] Enriquecido con ID: {volume.get('id')}")
-
-    # Guardar CSV
-    OUTPUT_CSV.parent.mkdir(parents=True, exist_ok=True)
+        for i, ((book, query), (volume, ok)) in enumerate(results, start=1):
+            n_books = i
+            queries.add(query)
+            title = book.get("title")
+            print(f"\n[INFO] Libro {i} → {title}")
+
+            if not query:
+                print("[WARN] Query vacía, saltando libro.")
+                continue
+
+            if query in previous:
+                row = previous[query]
+                manifest.setdefault(query, n_rows if row is not None else None)
+                n_reused += 1
+                if row is None:
+                    print("[INFO] Sin resultados en la ejecución anterior.")
+                    continue
+                writer.write(row)
+                n_rows += 1
+                print(f"[OK] Reutilizado ID: {row.get('gb_id')}")
+                continue
+
+            if not volume:
+                if ok:
+                    manifest.setdefault(query, None)
+                print("[WARN] Sin resultados en Google Books.")
+                continue
+
+            manifest.setdefault(query, n_rows)
+            writer.write(volume_to_row(book, volume))
+            n_rows += 1
+            print(f"[OK] Enriquecido con ID: {volume.get('id')}")
+
+        if parquet:
+            writer.add_manifest({"rows": n_rows, "queries": manifest})
+
+    if incremental:
+        print(f"\n[INFO] Incremental: {n_reused} libros reutilizados del landing anterior")
+    print(f"\n[INFO] Consultas: {len(queries)} distintas para {n_books} libros")
+
+    count("googlebooks.libros", n_books)
+    count("googlebooks.queries_distintas", len(queries))
+    count("googlebooks.filas_csv", n_rows)
+    count("googlebooks.filas_reutilizadas", n_reused)
+
+    if cache is not None:
+        stats = cache.stats()
+        cache.close()
+        print(
+            f"\n[INFO] Caché: {stats['hits']} aciertos, {stats['negative_hits']} aciertos negativos, "
+            f"{stats['misses']} fallos ({stats['expired']} caducados), "
+            f"{stats['evictions']} expulsiones, {stats['entries']} entradas"
+        )
 
-    if not rows:
-        print("[WARN] No hay filas enriquecidas; no se genera CSV.")
+    if not n_rows:
+        tmp_path.unlink()
+        print("[WARN] No hay filas enriquecidas; no se genera el landing.")
         return
 
-    fieldnames = list(rows[0].keys())
-
-    with open(OUTPUT_CSV, "w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, delimiter=";", fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+    # Sustitución atómica: primero el landing, después su manifiesto
+    os.replace(tmp_path, output_path)
+    if not parquet:
+        write_atomic(
+            manifest_path,
+            lambda mf: json.dump({"rows": n_rows, "queries": manifest}, mf, ensure_ascii=False),
+        )
 
-    print(f"\n[FIN] Enriquecimiento completado → {len(rows)} filas")
-    print(f"[GUARDADO] {OUTPUT_CSV}")
+    print(f"\n[FIN] Enriquecimiento completado → {n_rows} filas")
+    print(f"[GUARDADO] {output_path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Enriquecimiento con Google Books API")
+    parser.add_argument(
+        "--workers", type=int, default=MAX_WORKERS, help="peticiones simultáneas"
+    )
+    parser.add_argument(
+        "--rps",
+        type=float,
+        default=REQUESTS_PER_SECOND,
+        help="límite global de peticiones por segundo (0 = sin límite)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="no usar la caché persistente de respuestas"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="consultar solo los libros nuevos o con query cambiada respecto al landing anterior",
+    )
+    parser.add_argument(
+        "--format",
+        choices=list(LANDING_FORMATS),
+        default=LANDING_FORMAT,
+        help="formato del landing: CSV `;` o Parquet con listas nativas",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        help="añade al informe de ejecución un perfil de CPU (cprofile) o de memoria (tracemalloc)",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    enrich_books()
\ No newline at end of file
+    args = parse_args()
+    with profiling(args.profile, "enrich"):
+        enrich_books(
+            workers=args.workers,
+            requests_per_second=args.rps,
+            output_path=LANDING_FORMATS[args.format],
+            cache_path=None if args.no_cache else CACHE_DB,
+            incremental=args.incremental,
+        )
+    write_run_report(
+        "enrich",
+        config={
+            "workers": args.workers,
+            "rps": args.rps,
+            "cache": not args.no_cache,
+            "incremental": args.incremental,
+            "format": args.format,
+        },
+    )
+    print(f"[OK] run_report.json → {RUN_REPORT_JSON}")
\ No newline at end of file
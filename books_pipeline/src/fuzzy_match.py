@@ -0,0 +1,256 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# -----------------------------------------------------------
+# CASADO APROXIMADO DE LIBROS SIN ISBN (Bloque 3, paso 5b)
+# -----------------------------------------------------------
+#
+# Sin ISBN, la clave candidata es `titulo_autor_editorial` exacto, así que
+# "Python for Data Analysis, 2nd Ed" (Goodreads, sin editorial) y la ficha
+# de Google Books nunca se agrupan. Este paso:
+#   1. normaliza el título (minúsculas, sin subtítulo, paréntesis, edición
+#      ni palabras vacías) y lo parte en tokens;
+#   2. calcula una firma MinHash de los tokens de cada fila y la divide en
+#      LSH_BANDS bandas de LSH_ROWS valores: dos filas son candidatas si
+#      coinciden en alguna banda (probabilidad 1 − (1 − J^r)^b para una
+#      similitud de Jaccard J). Dentro de cada cubo se empareja cada fila
+#      con las FUZZY_WINDOW siguientes en orden de título, así que el nº de
+#      pares es O(n) aunque un cubo sea enorme;
+#   3. puntúa cada par con el Jaccard exacto de los tokens del título y
+#      exige al menos un token de autor en común (si ambas tienen autores);
+#   4. une las claves de los pares que superan FUZZY_TITLE_THRESHOLD
+#      (componentes conexas). Cada grupo toma su clave ISBN si tiene una; si
+#      tiene varias ISBN distintas es ambiguo y no se toca; si no tiene
+#      ninguna, se queda con la clave de su primera fila.
+#
+# Nunca se unen dos claves ISBN entre sí: al menos un lado del par debe
+# carecer de ISBN.
+
+LSH_BANDS = 8
+LSH_ROWS = 4
+FUZZY_WINDOW = 10
+FUZZY_TITLE_THRESHOLD = 0.8
+
+_STOPWORDS = {
+    "a", "an", "and", "for", "in", "of", "on", "the", "to", "with",
+    "de", "del", "el", "en", "la", "las", "los", "para", "por", "un", "una", "y",
+}
+_EDITION = (
+    r"\b(\d+(st|nd|rd|th)|first|second|third|fourth|fifth|sixth|revised|updated)"
+    r"\s+(ed|edn|edition)\b\.?"
+)
+_PUNCTUATION = r"[^\pL\pN]+"
+
+
+def _text_array(values: pd.Series) -> pa.Array:
+    """Texto en un array Arrow contiguo (minúsculas) para los kernels de pyarrow.compute."""
+    array = pa.array(values.astype(pd.StringDtype("pyarrow")))
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    return pc.utf8_lower(array)
+
+
+def normalize_titles(titles: pd.Series) -> pd.Series:
+    """Título comparable: minúsculas, sin subtítulo, paréntesis, edición ni puntuación."""
+    text = pc.replace_substring_regex(_text_array(titles), r"[\(\[][^\)\]]*[\)\]]", " ")
+    text = pc.list_element(pc.split_pattern(text, ":", max_splits=1), 0)
+    text = pc.replace_substring_regex(text, _EDITION, " ")
+    text = pc.utf8_trim_whitespace(pc.replace_substring_regex(text, _PUNCTUATION, " "))
+    return pd.Series(pd.arrays.ArrowExtensionArray(text), index=titles.index)
+
+
+def _token_table(text: pd.Series, min_length: int = 1) -> pd.DataFrame:
+    """(fila, id entero del token) sin repetir, ordenado por fila y token; sin palabras vacías."""
+    lists = pc.utf8_split_whitespace(_text_array(text))
+    tokens = pc.list_flatten(lists)
+    keep = pc.and_(
+        pc.greater_equal(pc.utf8_length(tokens), min_length),
+        pc.invert(pc.is_in(tokens, pa.array(sorted(_STOPWORDS)))),
+    )
+    table = pd.DataFrame(
+        {
+            "row": pc.filter(pc.list_parent_indices(lists), keep).to_numpy().astype(np.int64),
+            "token": pc.filter(pc.dictionary_encode(tokens).indices, keep).to_numpy().astype(np.int64),
+        }
+    )
+    return table.drop_duplicates().sort_values(["row", "token"]).reset_index(drop=True)
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """Mezclador splitmix64 (aritmética uint64 con desbordamiento)."""
+    z = values.astype(np.uint64, copy=True)
+    with np.errstate(over="ignore"):
+        z ^= z >> np.uint64(30)
+        z *= np.uint64(0xBF58476D1CE4E5B9)
+        z ^= z >> np.uint64(27)
+        z *= np.uint64(0x94D049BB133111EB)
+        z ^= z >> np.uint64(31)
+    return z
+
+
+def minhash_signatures(tokens: pd.DataFrame, n_hashes: int) -> tuple[np.ndarray, np.ndarray]:
+    """Firma MinHash (filas × n_hashes) de cada fila con tokens; devuelve (filas, firmas)."""
+    rows = tokens["row"].to_numpy()
+    hashes = tokens["token"].to_numpy().astype(np.uint64)
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else np.zeros(0, int)
+    signatures = np.empty((len(starts), n_hashes), dtype=np.uint64)
+    for k in range(n_hashes):
+        seeded = _mix(hashes ^ np.uint64(0x9E3779B97F4A7C15 * (k + 1) % 2**64))
+        signatures[:, k] = np.minimum.reduceat(seeded, starts) if len(starts) else seeded[:0]
+    return rows[starts], signatures
+
+
+def lsh_candidate_pairs(rows, signatures, order_key, bands=LSH_BANDS, window=FUZZY_WINDOW):
+    """
+    Pares (i, j), i < j, de filas que coinciden en alguna banda de la firma.
+    Dentro de cada cubo se ordena por `order_key` y se empareja cada fila
+    con las `window` siguientes.
+    """
+    band_rows = signatures.shape[1] // bands
+    found = []
+    for band in range(bands):
+        key = np.full(len(rows), np.uint64(band))
+        for value in signatures[:, band * band_rows : (band + 1) * band_rows].T:
+            key = _mix(key ^ value)
+        order = np.lexsort((order_key, key))
+        key, members = key[order], rows[order]
+        for offset in range(1, window + 1):
+            same = key[offset:] == key[:-offset]
+            if not same.any():
+                break
+            found.append(np.column_stack((members[:-offset][same], members[offset:][same])))
+
+    if not found:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.sort(np.concatenate(found), axis=1)
+    # Únicos sobre un entero por par (más rápido que np.unique(axis=0))
+    n = np.int64(rows.max() + 1)
+    packed = np.sort(pairs[:, 0] * n + pairs[:, 1])
+    packed = packed[np.r_[True, packed[1:] != packed[:-1]]]
+    return np.column_stack((packed // n, packed % n))
+
+
+def _shared_tokens(pairs: np.ndarray, tokens: pd.DataFrame, chunk_pairs: int = 500_000) -> np.ndarray:
+    """
+    Nº de tokens comunes de cada par: cada token de la fila izquierda se busca
+    (búsqueda binaria) entre los (fila, token) empaquetados de la tabla. Por
+    bloques de `chunk_pairs` pares para acotar la memoria.
+    """
+    rows = tokens["row"].to_numpy()
+    ids = tokens["token"].to_numpy()
+    packed = (rows << 32) | ids  # ya ordenado por (fila, token)
+    n_rows = int(max(rows.max(initial=-1), pairs.max(initial=-1))) + 1
+    offsets = np.searchsorted(rows, np.arange(n_rows + 1))
+
+    shared = np.zeros(len(pairs), dtype=np.int64)
+    for start in range(0, len(pairs), chunk_pairs):
+        left, right = pairs[start : start + chunk_pairs].T
+        counts = offsets[left + 1] - offsets[left]
+        pair = np.repeat(np.arange(len(left)), counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        probe = (right[pair] << 32) | ids[offsets[left][pair] + within]
+        # Buscar en orden es mucho más rápido (accesos contiguos a `packed`)
+        order = np.argsort(probe)
+        probe, pair = probe[order], pair[order]
+        hit = np.searchsorted(packed, probe)
+        found = packed[np.minimum(hit, len(packed) - 1)] == probe if len(packed) else hit < 0
+        shared[start : start + len(left)] = np.bincount(pair[found], minlength=len(left))
+    return shared
+
+
+def score_pairs(pairs, title_tokens, author_tokens):
+    """(Jaccard de los títulos, autores compatibles) de cada par."""
+    sizes = np.bincount(title_tokens["row"].to_numpy(), minlength=pairs.max(initial=-1) + 1)
+    shared = _shared_tokens(pairs, title_tokens)
+    union = sizes[pairs[:, 0]] + sizes[pairs[:, 1]] - shared
+    jaccard = np.divide(shared, union, out=np.zeros(len(pairs)), where=union > 0)
+
+    has_authors = np.zeros(len(sizes), dtype=bool)
+    author_rows = author_tokens["row"].to_numpy()
+    has_authors[author_rows[author_rows < len(sizes)]] = True
+    both = has_authors[pairs[:, 0]] & has_authors[pairs[:, 1]]
+    compatible = ~both | (_shared_tokens(pairs, author_tokens) > 0)
+    return jaccard, compatible
+
+
+def _connected_components(n: int, edges: np.ndarray) -> np.ndarray:
+    """Etiqueta (mínimo índice) de la componente conexa de cada nodo."""
+    labels = np.arange(n)
+    while len(edges):
+        low = np.minimum(labels[edges[:, 0]], labels[edges[:, 1]])
+        previous = labels.copy()
+        np.minimum.at(labels, edges[:, 0], low)
+        np.minimum.at(labels, edges[:, 1], low)
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            break
+    return labels
+
+
+def _author_text(df: pd.DataFrame) -> pd.Series:
+    """Autores de cada fila en un solo texto (authors_list o, si no, author_principal)."""
+    authors = pd.Series(pd.NA, index=df.index, dtype=pd.StringDtype("pyarrow"))
+    if "authors_list" in df.columns:
+        lists = df["authors_list"]
+        if isinstance(lists.dtype, pd.ArrowDtype):
+            joined = pc.binary_join(pa.array(lists), " ").to_pandas()
+        else:
+            joined = lists.map(
+                lambda names: " ".join(names) if isinstance(names, (list, np.ndarray)) else None
+            )
+        authors = pd.Series(joined.to_numpy(dtype=object), index=df.index, dtype=authors.dtype)
+    if "author_principal" in df.columns:
+        authors = authors.where(authors.str.len() > 0, df["author_principal"].astype(authors.dtype))
+    text = pc.replace_substring_regex(_text_array(authors), _PUNCTUATION, " ")
+    return pd.Series(pd.arrays.ArrowExtensionArray(text), index=df.index)
+
+
+def merge_near_duplicates(
+    df: pd.DataFrame, keys: pd.Series, has_isbn, threshold: float = FUZZY_TITLE_THRESHOLD
+) -> pd.Series:
+    """
+    Claves candidatas tras unir las filas casi duplicadas de `df` (ver arriba).
+    `keys` son las claves exactas y `has_isbn` indica qué filas tienen clave ISBN.
+    """
+    positional = df.reset_index(drop=True)
+    titles = normalize_titles(positional["title"])
+    title_tokens = _token_table(titles)
+    author_tokens = _token_table(_author_text(positional), min_length=2)
+
+    rows, signatures = minhash_signatures(title_tokens, LSH_BANDS * LSH_ROWS)
+    title_order = pd.factorize(titles.to_numpy()[rows], sort=True)[0]
+    pairs = lsh_candidate_pairs(rows, signatures, title_order)
+
+    # ► Pares entre claves distintas con al menos un lado sin ISBN
+    codes, uniques = pd.factorize(keys.to_numpy())
+    has_isbn = np.asarray(has_isbn, dtype=bool)
+    eligible = (codes[pairs[:, 0]] != codes[pairs[:, 1]]) & ~(
+        has_isbn[pairs[:, 0]] & has_isbn[pairs[:, 1]]
+    )
+    pairs = pairs[eligible]
+    if not len(pairs):
+        return keys
+
+    jaccard, compatible = score_pairs(pairs, title_tokens, author_tokens)
+    matched = pairs[(jaccard >= threshold) & compatible]
+    if not len(matched):
+        return keys
+
+    # ► Componentes conexas de claves y clave canónica de cada una
+    n_keys = len(uniques)
+    labels = _connected_components(n_keys, codes[matched])
+    key_has_isbn = np.zeros(n_keys, dtype=bool)
+    key_has_isbn[codes[has_isbn]] = True
+
+    # La etiqueta es el menor código del grupo: con `factorize`, su primera clave
+    isbn_per_group = np.bincount(labels, weights=key_has_isbn, minlength=n_keys)[labels]
+    isbn_key = np.arange(n_keys)
+    isbn_key[labels[key_has_isbn]] = np.flatnonzero(key_has_isbn)
+
+    canonical = np.where(isbn_per_group == 1, isbn_key[labels], labels)
+    canonical = np.where(isbn_per_group > 1, np.arange(n_keys), canonical)
+    return pd.Series(np.asarray(uniques, dtype=object)[canonical[codes]], index=keys.index).astype(
+        keys.dtype
+    )
@@ -0,0 +1,173 @@
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# -----------------------------------------------------------
+# ALMACÉN INCREMENTAL DE dim_book / book_source_detail
+# -----------------------------------------------------------
+#
+# Base compactada:
+#   standard/dim_book.parquet, standard/book_source_detail.parquet
+# Fragmentos de cada ejecución incremental (en orden de `seq`):
+#   standard/_incremental/dim_book-000001.parquet      → filas de dim_book
+#       de los libros afectados (sustituyen a las anteriores por book_id)
+#   standard/_incremental/detail-000001.parquet        → filas nuevas de detalle
+#   standard/_incremental/manifest.json                → lista de fragmentos,
+#       book_id eliminados y row_hash de detalle sustituidos
+#
+# Cada fichero de la base guarda en sus metadatos Parquet el último `seq`
+# que incluye (`incremental_generation`), y cada tabla se lee aplicando solo
+# los fragmentos posteriores a su propia generación. La compactación
+# escribe el detalle y después dim_book, y no borra los fragmentos hasta que
+# ambos están sustituidos: si se interrumpe entre las dos escrituras, el
+# detalle ya los incluye y dim_book los sigue aplicando, sin perder ni
+# duplicar filas.
+
+GENERATION_KEY = b"incremental_generation"
+
+
+def _write_atomic(path: Path, write) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _write_table(df: pd.DataFrame, path: Path, metadata: dict | None = None) -> None:
+    table = pa.Table.from_pandas(df)
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    pq.write_table(table, path)
+
+
+class IncrementalStore:
+    """
+    Base compactada + fragmentos incrementales de dim_book y book_source_detail.
+
+    `write_dim` / `write_detail(df, path, metadata=None)` escriben cada
+    tabla (por defecto, `pq.write_table` sin más opciones).
+    """
+
+    def __init__(self, dim_path: Path, detail_path: Path, write_dim=None, write_detail=None):
+        self.dim_path = Path(dim_path)
+        self.detail_path = Path(detail_path)
+        self.write_dim = write_dim or _write_table
+        self.write_detail = write_detail or _write_table
+        self.dir = self.dim_path.parent / "_incremental"
+        self.manifest_path = self.dir / "manifest.json"
+
+    # ► Estado
+
+    def has_base(self) -> bool:
+        """Hay una base utilizable (con la columna row_hash en el detalle)."""
+        if not (self.dim_path.is_file() and self.detail_path.is_file()):
+            return False
+        return "row_hash" in pq.read_schema(self.detail_path).names
+
+    def base_generation(self, path: Path | None = None) -> int:
+        """Último fragmento incluido en `path` (por defecto, el más antiguo de los dos)."""
+        if path is None:
+            return min(self.base_generation(self.dim_path), self.base_generation(self.detail_path))
+        metadata = pq.read_schema(path).metadata or {}
+        return int(metadata.get(GENERATION_KEY, b"0"))
+
+    def load_manifest(self) -> dict:
+        if not self.manifest_path.exists():
+            return {"next_seq": 1, "fragments": []}
+        return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+
+    def _save_manifest(self, manifest: dict) -> None:
+        _write_atomic(
+            self.manifest_path,
+            lambda tmp: tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8"),
+        )
+
+    def pending_fragments(self, path: Path | None = None) -> list[dict]:
+        """Fragmentos aún no incluidos en `path` (por defecto, en alguna tabla de la base)."""
+        generation = self.base_generation(path)
+        return [f for f in self.load_manifest()["fragments"] if f["seq"] > generation]
+
+    # ► Lectura del estado actual (base + fragmentos)
+
+    def read_detail(self, columns=None, filters=None) -> pd.DataFrame:
+        """Detalle vigente: base sin las filas sustituidas + filas de los fragmentos."""
+        if columns is not None and "row_hash" not in columns:
+            columns = list(columns) + ["row_hash"]
+
+        detail = pq.read_table(self.detail_path, columns=columns, filters=filters).to_pandas()
+        for fragment in self.pending_fragments(self.detail_path):
+            superseded = fragment["superseded_row_hashes"]
+            if superseded:
+                detail = detail[~detail["row_hash"].isin(superseded)]
+            new_rows = pq.read_table(
+                self.dir / fragment["detail"], columns=columns, filters=filters
+            ).to_pandas()
+            if len(new_rows):
+                detail = pd.concat([detail, new_rows], ignore_index=True)
+        return detail.reset_index(drop=True)
+
+    def read_dim(self) -> pd.DataFrame:
+        """dim_book vigente: cada fragmento sustituye o elimina libros por book_id."""
+        dim = pd.read_parquet(self.dim_path)
+        for fragment in self.pending_fragments(self.dim_path):
+            rows = pd.read_parquet(self.dir / fragment["dim"])
+            replaced = set(rows["book_id"]) | set(fragment["deleted_book_ids"])
+            dim = pd.concat([dim[~dim["book_id"].isin(replaced)], rows])
+        return dim
+
+    # ► Escritura
+
+    def append(self, dim_rows, detail_rows, deleted_book_ids, superseded_row_hashes) -> int:
+        """Guarda un fragmento y lo registra en el manifiesto; devuelve su seq."""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        manifest = self.load_manifest()
+        seq = manifest["next_seq"]
+
+        fragment = {
+            "seq": seq,
+            "dim": f"dim_book-{seq:06d}.parquet",
+            "detail": f"detail-{seq:06d}.parquet",
+            "deleted_book_ids": sorted(deleted_book_ids),
+            "superseded_row_hashes": sorted(int(h) for h in superseded_row_hashes),
+        }
+        self.write_dim(dim_rows, self.dir / fragment["dim"])
+        self.write_detail(detail_rows, self.dir / fragment["detail"])
+
+        manifest["fragments"].append(fragment)
+        manifest["next_seq"] = seq + 1
+        self._save_manifest(manifest)
+        return seq
+
+    def compact(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Integra los fragmentos pendientes en la base y los elimina; devuelve (dim, detalle)."""
+        fragments = self.pending_fragments()
+        dim = self.read_dim()
+        detail = self.read_detail()
+        if not fragments:
+            return dim, detail
+
+        generation = fragments[-1]["seq"]
+        metadata = {GENERATION_KEY: str(generation).encode()}
+        _write_atomic(
+            self.detail_path, lambda tmp: self.write_detail(detail, tmp, metadata=metadata)
+        )
+        _write_atomic(self.dim_path, lambda tmp: self.write_dim(dim, tmp, metadata=metadata))
+
+        manifest = self.load_manifest()
+        manifest["fragments"] = [f for f in manifest["fragments"] if f["seq"] > generation]
+        self._save_manifest(manifest)
+        for fragment in fragments:
+            (self.dir / fragment["dim"]).unlink(missing_ok=True)
+            (self.dir / fragment["detail"]).unlink(missing_ok=True)
+        return dim, detail
+
+    def reset(self) -> None:
+        """Descarta los fragmentos (tras reconstruir la base desde cero)."""
+        if not self.dir.exists():
+            return
+        for path in self.dir.iterdir():
+            path.unlink()
+        self.dir.rmdir()
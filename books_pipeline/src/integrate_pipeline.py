@@ -1,66 +1,402 @@
+import argparse
+import hashlib
 import json
+import os
 import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from itertools import chain
 from pathlib import Path
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
 import pyarrow as pa
-import pyarrow.parquet as pq
+import pyarrow.compute as pc
 
-from utils_isbn import validate_isbn
-from utils_quality import (
-    metric_null_percentage,
-    metric_duplicates,
-    check_numeric_range,
+from fuzzy_match import merge_near_duplicates
+from incremental_store import IncrementalStore
+from survivorship import apply_survivorship
+from utils_ipc import ipc_metadata, read_ipc, write_ipc
+from utils_isbn import clean_isbn_array, isbn10_to_isbn13_array
+from utils_landing import (
+    GOODREADS_SCHEMA,
+    GOOGLEBOOKS_SCHEMA,
+    goodreads_landing_path,
+    googlebooks_landing_path,
+    iter_goodreads_batches,
+    iter_googlebooks_batches,
 )
+from utils_parquet import LIST_OF_STRINGS, UTC_TIMESTAMP, to_arrow, write_parquet
+from utils_metrics import (
+    METRICS,
+    PROFILE_MODES,
+    RUN_REPORT_JSON,
+    count,
+    profiling,
+    step,
+    write_run_report,
+)
+from utils_quality import QualityProfile
 
 # -----------------------------------------------------------
 # RUTAS
 # -----------------------------------------------------------
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-
-GOODREADS_JSON = BASE_DIR / "landing" / "goodreads_books.json"
-GOOGLEBOOKS_CSV = BASE_DIR / "landing" / "googlebooks_books.csv"
+SRC_DIR = BASE_DIR / "src"
 
 DIM_BOOK_PARQUET = BASE_DIR / "standard" / "dim_book.parquet"
 DETAIL_PARQUET = BASE_DIR / "standard" / "book_source_detail.parquet"
 
+# Salida particionada (un Parquet por shard)
+DIM_BOOK_DIR = BASE_DIR / "standard" / "dim_book"
+DETAIL_DIR = BASE_DIR / "standard" / "book_source_detail"
+
 QUALITY_JSON = BASE_DIR / "docs" / "quality_metrics.json"
 SCHEMA_MD = BASE_DIR / "docs" / "schema.md"
 
+# Unión normalizada y con clave (df_all tras el paso 5) en Arrow IPC
+UNION_CACHE_ARROW = BASE_DIR / "cache" / "df_all.arrow"
+
+# -----------------------------------------------------------
+# CONFIGURACIÓN
+# -----------------------------------------------------------
+
+# Agrupar por un hash uint64 de book_id_candidato en lugar del texto.
+# Más rápido en catálogos grandes; dim_book sale ordenado por hash.
+HASH_CANDIDATE_KEYS = False
+
+# Clave por ISBN-13 canónico (solo dígitos), convirtiendo también los
+# ISBN-10 a ISBN-13 para que ambas ediciones caigan en el mismo grupo.
+NORMALIZE_ISBN_KEYS = True
+
+# Lectura del landing: "arrow" (lectores en streaming de pyarrow con
+# esquema explícito, ver utils_landing) o "pandas" (read_json/read_csv con
+# las columnas de texto de esos mismos esquemas). Ambos dan las mismas tablas.
+INGEST_BACKEND = "arrow"
+
+# Une además las filas casi duplicadas sin ISBN (título parecido + autor en
+# común; ver fuzzy_match.py). Solo en la integración completa en memoria.
+FUZZY_MATCHING = False
+
+# Reutilizar df_all (pasos 1–5) de UNION_CACHE_ARROW si su huella coincide:
+# contenido del landing, código de los pasos 1–5 y configuración que les
+# afecta. Solo en la integración completa en memoria.
+UNION_CACHE = True
+UNION_CACHE_MODULES = [
+    "integrate_pipeline.py", "utils_landing.py", "utils_isbn.py", "fuzzy_match.py",
+]
+
+# Filas por bloque con el backend "pandas" (con "arrow" manda ARROW_BLOCK_SIZE)
+GOODREADS_CHUNK_ROWS = 100_000
+GOOGLEBOOKS_CHUNK_ROWS = 100_000
+
+# Layout Parquet de standard/ (ver utils_parquet.write_parquet): filas por
+# grupo, columnas con bloom filter, columnas con codificación diccionario y
+# particionado Hive de dim_book (p. ej. ["anio_publicacion", "idioma"];
+# [] = un único fichero dim_book.parquet).
+PARQUET_ROW_GROUP_SIZE = 128_000
+PARQUET_BLOOM_FILTER_COLUMNS = ["isbn13"]
+DIM_BOOK_PARTITION_COLS = []
+DIM_BOOK_DICTIONARY_COLUMNS = [
+    "editorial", "anio_publicacion", "idioma", "formato", "moneda", "fuente_ganadora",
+]
+DETAIL_DICTIONARY_COLUMNS = [
+    "source", "publisher", "language", "language_normalized",
+    "price_currency", "price_currency_normalized",
+]
+
+# Tipos explícitos (el resto se infiere de pandas)
+DIM_BOOK_TYPES = {
+    "autores": LIST_OF_STRINGS,
+    "anio_publicacion": pa.int16(),
+    "fecha_publicacion": pa.date32(),
+    "paginas": pa.int32(),
+    "formato": pa.string(),
+    "fuente_ganadora": pa.large_string(),
+    "categorias": LIST_OF_STRINGS,
+    "precio": pa.float64(),
+    "ts_ultima_actualizacion": UTC_TIMESTAMP,
+}
+DETAIL_TYPES = {
+    "source": pa.large_string(),
+    "authors_list": LIST_OF_STRINGS,
+    "categories_list": LIST_OF_STRINGS,
+    "pub_date_normalized": pa.date32(),
+    "language_normalized": pa.string(),
+    "price_currency_normalized": pa.string(),
+    "timestamp_ingesta": UTC_TIMESTAMP,
+}
+
+# Tipos compactos en memoria: texto en Arrow (sin un objeto Python por
+# valor), `source` como categoría y listas como list<string> de Arrow.
+ARROW_STRING = pd.StringDtype("pyarrow")
+SOURCE_DTYPE = pd.CategoricalDtype(["goodreads", "googlebooks"])
+
+# Perfiles de calidad (ver utils_quality.QualityProfile): checks por columna,
+# evaluados sobre las tablas Arrow según se escriben. Los distintos y
+# duplicados son exactos hasta EXACT_DISTINCT_LIMIT y, por encima, con
+# sketches de memoria fija.
+DIM_BOOK_QUALITY_CHECKS = {
+    "book_id": ["approx_distinct"],
+    "titulo": ["nulls"],
+    "autor_principal": ["nulls", "approx_distinct"],
+    "editorial": ["nulls", "approx_distinct"],
+    "anio_publicacion": ["nulls", "min_max"],
+    "idioma": ["nulls", "value_counts"],
+    "isbn10": ["nulls", "isbn_valid"],
+    "isbn13": ["nulls", "approx_distinct", "isbn_valid"],
+    "precio": ["nulls", "min_max", ("range", 0, None), "quantiles"],
+    "moneda": ["nulls", "value_counts"],
+    "fuente_ganadora": ["value_counts"],
+}
+DETAIL_QUALITY_CHECKS = {
+    "source": ["value_counts"],
+    "book_id_candidato": ["approx_distinct", "heavy_hitters"],
+    "rating": ["nulls", "min_max", ("range", 0, 5)],
+    "isbn13": ["nulls", "isbn_valid"],
+    "pub_date_normalized": ["nulls", "min_max"],
+    "price_amount": ["nulls", "min_max", ("range", 0, None)],
+}
+
+# Modo incremental: identidad de una fila en cada fuente (una fila nueva
+# con la misma identidad sustituye a la integrada) y nº de fragmentos
+# pendientes a partir del cual se compacta automáticamente.
+ROW_IDENTITY = {"goodreads": "book_url", "googlebooks": "gb_id"}
+COMPACT_AFTER_FRAGMENTS = 7
+
+# Ejecución particionada: nº de shards por hash de book_id_candidato
+# (1 = todo en memoria en un proceso), procesos del pool y forma de la
+# salida: "merged" (un único Parquet, igual al modo en memoria) o
+# "shards" (un Parquet por shard en standard/dim_book/ y
+# standard/book_source_detail/).
+PARTITIONS = 1
+PARTITION_WORKERS = os.cpu_count() or 1
+PARTITION_OUTPUT = "merged"
+
+
+# -----------------------------------------------------------
+# LECTURA DE LANDING
+# -----------------------------------------------------------
+
+def pandas_dtypes(schema):
+    """
+    dtypes de read_json/read_csv para las columnas de texto de `schema`: los
+    ISBN se leen como texto, como en los lectores Arrow, y no como float64.
+    """
+    return {field.name: "str" for field in schema if pa.types.is_string(field.type)}
+
+
+def iter_goodreads_chunks(path):
+    """Bloques (DataFrame) del landing de Goodreads."""
+    if INGEST_BACKEND == "arrow":
+        for batch in iter_goodreads_batches(path):
+            yield batch.to_pandas()
+        return
+    # precise_float: el mismo parseo de los float que el lector JSON de Arrow
+    options = {"dtype": pandas_dtypes(GOODREADS_SCHEMA), "precise_float": True}
+    if path.suffix == ".jsonl":
+        with pd.read_json(path, lines=True, chunksize=GOODREADS_CHUNK_ROWS, **options) as reader:
+            for chunk in reader:
+                yield chunk.reindex(columns=GOODREADS_SCHEMA.names)
+    else:
+        yield pd.read_json(path, **options).reindex(columns=GOODREADS_SCHEMA.names)
+
+
+def googlebooks_parquet_chunk(batch):
+    """
+    Bloque del landing Parquet de Google Books. Las listas nativas pasan tal
+    cual a `authors_list`/`categories_list` (sin copiar) y `authors` y
+    `categories` se rellenan con el texto unido por " | ", como en el CSV.
+    """
+    lists = {}
+    for col in ("authors", "categories"):
+        values = batch.column(col)
+        lists[f"{col}_list"] = pd.arrays.ArrowExtensionArray(values)
+        batch = batch.set_column(
+            batch.schema.get_field_index(col), col, pc.binary_join(values, " | ")
+        )
+    chunk = batch.to_pandas()
+    for col, values in lists.items():
+        chunk[col] = values
+    return chunk
+
+
+def iter_googlebooks_chunks(path):
+    """Bloques (DataFrame) del landing de Google Books (CSV o Parquet)."""
+    if path.suffix == ".parquet":
+        for batch in iter_googlebooks_batches(path):
+            yield googlebooks_parquet_chunk(batch)
+    elif INGEST_BACKEND == "arrow":
+        for batch in iter_googlebooks_batches(path):
+            yield batch.to_pandas()
+    else:
+        with pd.read_csv(
+            path,
+            delimiter=";",
+            dtype=pandas_dtypes(GOOGLEBOOKS_SCHEMA),
+            chunksize=GOOGLEBOOKS_CHUNK_ROWS,
+        ) as reader:
+            for chunk in reader:
+                yield chunk.reindex(columns=GOOGLEBOOKS_SCHEMA.names)
+
+
+def row_hashes(chunk):
+    """
+    Hash uint64 del contenido bruto de cada fila del landing. Las columnas
+    numéricas se pasan a float64 para que el hash no dependa de si el bloque
+    tenía nulos (int64 vs float64). Las columnas de listas (landing Parquet)
+    no entran: su contenido ya está en la columna de texto unido.
+    """
+    canonical = pd.DataFrame(
+        {
+            col: values.astype("float64")
+            if pd.api.types.is_numeric_dtype(values.dtype)
+            and not pd.api.types.is_bool_dtype(values.dtype)
+            else values
+            for col, values in chunk.items()
+            if not _is_list_dtype(values.dtype)
+        }
+    )
+    return pd.util.hash_pandas_object(canonical, index=False).to_numpy()
+
+
+def load_source(chunks, source, normalize, skip_hashes=None):
+    """
+    Lee una fuente bloque a bloque, normalizando cada bloque antes de unirlos.
+    Con `skip_hashes` se descartan las filas cuyo row_hash ya está integrado.
+    """
+    frames = []
+    n_rows = 0
+    for chunk in chunks:
+        hashes = row_hashes(chunk)
+        chunk.index = pd.RangeIndex(n_rows, n_rows + len(chunk))
+        chunk["source"] = pd.Categorical.from_codes(
+            np.full(len(chunk), SOURCE_DTYPE.categories.get_loc(source)), dtype=SOURCE_DTYPE
+        )
+        chunk["row_id"] = chunk.index + 1
+        chunk["row_hash"] = hashes
+        n_rows += len(chunk)
+        if skip_hashes is not None:
+            chunk = chunk[~chunk["row_hash"].isin(skip_hashes)].copy()
+        with step(f"2-3 normalización {source}"):
+            frames.append(normalize(chunk))
+    count(f"filas_{source}", n_rows)
+    return pd.concat(frames)
+
 
 # -----------------------------------------------------------
 # NORMALIZADORES
 # -----------------------------------------------------------
 
+# Fechas: `YYYY`, `YYYY-M`, `YYYY-MM-DD` (también con `/` o `.`), con hora ISO
+# detrás o con marca de aproximación delante (`c. 1999`, `ca 1999`, `[1999]`)
+_DATE_PATTERN = (
+    r"^\s*(?:(?:c|ca|circa)\.?\s*|~\s*)?\[?(?P<year>\d{4})"
+    r"(?:[-/.](?P<month>\d{1,2})(?:[-/.](?P<day>\d{1,2}))?)?\]?\??"
+    r"(?:T\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?\s*$"
+)
+
+# Idioma: códigos ISO 639-2/639-3, nombres y códigos obsoletos → subetiqueta BCP-47
+LANGUAGE_ALIASES = {
+    "eng": "en", "english": "en", "inglés": "en", "ingles": "en",
+    "spa": "es", "spanish": "es", "español": "es", "espanol": "es", "castellano": "es",
+    "fra": "fr", "fre": "fr", "french": "fr", "français": "fr", "francés": "fr",
+    "deu": "de", "ger": "de", "german": "de", "deutsch": "de", "alemán": "de",
+    "ita": "it", "italian": "it", "italiano": "it",
+    "por": "pt", "portuguese": "pt", "português": "pt", "portugués": "pt",
+    "cat": "ca", "catalan": "ca", "català": "ca", "catalán": "ca",
+    "glg": "gl", "galician": "gl", "galego": "gl", "gallego": "gl",
+    "eus": "eu", "baq": "eu", "basque": "eu", "euskara": "eu", "euskera": "eu",
+    "nld": "nl", "dut": "nl", "dutch": "nl",
+    "rus": "ru", "russian": "ru",
+    "zho": "zh", "chi": "zh", "chinese": "zh",
+    "jpn": "ja", "japanese": "ja",
+    "kor": "ko", "korean": "ko",
+    "ara": "ar", "arabic": "ar",
+    "pol": "pl", "polish": "pl",
+    "swe": "sv", "swedish": "sv",
+    "tur": "tr", "turkish": "tr",
+    "heb": "he", "hebrew": "he", "iw": "he",
+    "ind": "id", "indonesian": "id", "in": "id",
+    "yid": "yi", "ji": "yi",
+}
+_LANGUAGE_SUBTAG = re.compile(r"[a-z]{2,3}")
+_SUBTAG_SEPARATOR = re.compile(r"[-_\s]+")
+
+# Moneda: símbolos frecuentes → código ISO-4217
+CURRENCY_ALIASES = {"€": "EUR", "$": "USD", "US$": "USD", "£": "GBP", "¥": "JPY"}
+_CURRENCY_CODE = re.compile(r"[A-Z]{3}")
+
+
+def normalize_dates(values):
+    """Columna de fechas → texto ISO-8601 (YYYY-MM-DD); lo no reconocido → NA."""
+
+    def parse(text):
+        parts = text.str.extract(_DATE_PATTERN).astype("float64")
+        dates = pd.to_datetime(parts.fillna({"month": 1, "day": 1}), errors="coerce")
+        return dates.dt.strftime("%Y-%m-%d")
+
+    return _normalize_unique(values, parse)
+
+
 def normalize_date(date_str):
     """Convierte una fecha a ISO-8601 (YYYY-MM-DD)."""
-    if not isinstance(date_str, str):
-        return None
-    try:
-        if re.fullmatch(r"\d{4}-\d{2}-\d{2}", date_str):
-            return date_str
-        if re.fullmatch(r"\d{4}-\d{2}", date_str):
-            return f"{date_str}-01"
-        if re.fullmatch(r"\d{4}", date_str):
-            return f"{date_str}-01-01"
-    except:
-        return None
-    return None
+    result = normalize_dates(pd.Series([date_str], dtype=object)).iloc[0]
+    return None if pd.isna(result) else result
 
 
+@lru_cache(maxsize=4096)
 def normalize_language(lang):
+    """Etiqueta BCP-47 (`en`, `pt-BR`, `zh-Hant`) o None si no se reconoce."""
     if not isinstance(lang, str):
         return None
-    return lang.strip().lower()
+    text = lang.strip().lower()
+    if text in LANGUAGE_ALIASES:
+        return LANGUAGE_ALIASES[text]
+
+    primary, *subtags = _SUBTAG_SEPARATOR.split(text)
+    primary = LANGUAGE_ALIASES.get(primary, primary)
+    if not _LANGUAGE_SUBTAG.fullmatch(primary):
+        return None
+    tag = [primary]
+    for subtag in subtags:
+        if len(subtag) == 4 and subtag.isalpha():
+            tag.append(subtag.title())  # escritura: Hant, Latn
+        elif (len(subtag) == 2 and subtag.isalpha()) or (len(subtag) == 3 and subtag.isdigit()):
+            tag.append(subtag.upper())  # región: BR, 419
+    return "-".join(tag)
 
 
+@lru_cache(maxsize=1024)
 def normalize_currency(cur):
+    """Código ISO-4217 en mayúsculas o None si no lo es."""
     if not isinstance(cur, str):
         return None
-    return cur.strip().upper()
+    code = cur.strip().upper()
+    code = CURRENCY_ALIASES.get(code, code)
+    return code if _CURRENCY_CODE.fullmatch(code) else None
+
+
+def _normalize_unique(values, normalize):
+    """
+    Aplica `normalize` (Serie de textos → Serie de resultados) solo a los
+    valores distintos de la columna y reparte el resultado a las filas.
+    Lo que no es texto (p. ej. números leídos por pandas) → NA.
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(np.asarray(uniques, dtype=object))
+    is_text = uniques.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+
+    results = np.full(len(uniques) + 1, None, dtype=object)  # el último para los nulos
+    if is_text.any():
+        text = uniques[is_text].astype(ARROW_STRING).reset_index(drop=True)
+        normalized = normalize(text).astype(object)
+        results[:-1][is_text] = normalized.where(normalized.notna(), None).to_numpy()
+    return pd.Series(results[codes], index=values.index, dtype=ARROW_STRING)
 
 
 def normalize_list_field(value):
@@ -70,143 +406,192 @@ def normalize_list_field(value):
     return list(dict.fromkeys(tokens))
 
 
+def _arrow_array(values, type=None):
+    """Array Arrow contiguo (las columnas Arrow de pandas pueden venir troceadas)."""
+    array = pa.array(values, type=type)
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    return array
+
+
+def _list_series(counts, values, index):
+    """Serie list<string> de Arrow a partir del nº de elementos de cada fila."""
+    offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int32)
+    array = pa.ListArray.from_arrays(pa.array(offsets), _arrow_array(values, pa.string()))
+    return pd.Series(pd.arrays.ArrowExtensionArray(array), index=index)
+
+
+def _is_list_dtype(dtype):
+    return isinstance(dtype, pd.ArrowDtype) and pa.types.is_list(dtype.pyarrow_dtype)
+
+
+def _clean_lists(lists, index):
+    """Recorta, quita vacíos y deduplica (conservando el orden) cada lista."""
+    tokens = pd.DataFrame(
+        {
+            "row": pc.list_parent_indices(lists).to_numpy(),
+            "token": pc.utf8_trim_whitespace(pc.list_flatten(lists)).to_pandas(),
+        }
+    )
+    tokens = tokens[tokens["token"].notna() & (tokens["token"] != "") & ~tokens.duplicated()]
+    counts = np.bincount(tokens["row"].to_numpy(), minlength=len(index))
+    return _list_series(counts, tokens["token"], index)
+
+
+def split_list_field(values):
+    """`normalize_list_field` sobre una columna entera, con kernels de Arrow."""
+    lists = pc.split_pattern_regex(_arrow_array(values.astype(ARROW_STRING)), r"[\|,]")
+    return _clean_lists(lists, values.index)
+
+
+def clean_list_field(values):
+    """Como `split_list_field` para una columna que ya es de listas: no parte nada."""
+    return _clean_lists(_arrow_array(values.array), values.index)
+
+
+def singleton_list_field(values):
+    """[valor] si hay texto; [] si no."""
+    text = values.astype(ARROW_STRING)
+    present = text.notna().to_numpy()
+    return _list_series(present.astype(np.int64), text[present], values.index)
+
+
 # -----------------------------------------------------------
-# PIPELINE PRINCIPAL
+# CLAVE CANDIDATA
 # -----------------------------------------------------------
 
-def integrate_pipeline():
-    print("[INFO] Iniciando integración del pipeline…")
+# Caracteres que `\s` reconoce en `re`; el motor regex de Arrow (RE2)
+# solo trata como espacio los ASCII, así que se listan explícitamente.
+_WHITESPACE = "".join(ch for ch in map(chr, range(0x3001)) if re.match(r"\s", ch))
+_WHITESPACE_RUN = f"[{_WHITESPACE}]+"
+_NON_ASCII = r"[^\x00-\x7f]"
 
-    # -------------------------------------------------------
-    # 1. Leer fuentes
-    # -------------------------------------------------------
-    df_gd = pd.read_json(GOODREADS_JSON)
-    df_gb = pd.read_csv(GOOGLEBOOKS_CSV, delimiter=";")
 
-    df_gd["source"] = "goodreads"
-    df_gb["source"] = "googlebooks"
-    df_gd["row_id"] = df_gd.index + 1
-    df_gb["row_id"] = df_gb.index + 1
+def _key_part(df, col):
+    """Columna como texto; los nulos se representan como 'nan'."""
+    if col not in df.columns:
+        return pd.Series("", index=df.index, dtype="str")
+    values = df[col]
+    return values.astype(object).where(values.notna(), "nan").astype("str")
 
-    # -------------------------------------------------------
-    # 2. Normalización Goodreads
-    # -------------------------------------------------------
-    df_gd = df_gd.rename(columns={"author": "author_principal"})
-    df_gd["authors_list"] = df_gd["author_principal"].apply(
-        lambda x: [x] if isinstance(x, str) else []
+
+def _lower(text):
+    """
+    `str.lower` de Python. El kernel de Arrow (utf8_lower) solo coincide con
+    él en ASCII: no aplica SpecialCasing ('İ' → 'i' en vez de 'i̇') y usa
+    otra versión de Unicode. Las filas con algún carácter no ASCII pasan
+    por Python.
+    """
+    lowered = text.str.lower()
+    non_ascii = text.str.contains(_NON_ASCII, regex=True).to_numpy()
+    if non_ascii.any():
+        lowered[non_ascii] = text[non_ascii].map(str.lower)
+    return lowered
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, bool) and value == value
+
+
+def _isbn_text(values, width):
+    """ISBN como texto; si pandas lo leyó como número se recupera el entero con ceros a la izquierda."""
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        numeric = values.notna().to_numpy()
+    elif values.dtype == object:
+        numeric = np.fromiter(map(_is_number, values), dtype=bool, count=len(values))
+    else:
+        return values
+    if not numeric.any():
+        return values
+    text = values.astype(object)
+    text[numeric] = (
+        values[numeric].astype("float64").astype("int64").astype(str).str.zfill(width).to_numpy()
     )
-    df_gd["categories_list"] = [[] for _ in range(len(df_gd))]
-    df_gd["pub_date_normalized"] = None
-    df_gd["language_normalized"] = None
-    df_gd["price_currency_normalized"] = None
+    return text
 
-    # -------------------------------------------------------
-    # 3. Normalización Google Books
-    # -------------------------------------------------------
-    df_gb["pub_date_normalized"] = df_gb["pub_date"].apply(normalize_date)
-    df_gb["language_normalized"] = df_gb["language"].apply(normalize_language)
-    df_gb["price_currency_normalized"] = df_gb["price_currency"].apply(normalize_currency)
-    df_gb["authors_list"] = df_gb["authors"].apply(normalize_list_field)
-    df_gb["categories_list"] = df_gb["categories"].apply(normalize_list_field)
 
-    # -------------------------------------------------------
-    # 4. Unificar fuentes
-    # -------------------------------------------------------
-    df_all = pd.concat([df_gd, df_gb], ignore_index=True, sort=False)
+def isbn13_keys(df):
+    """ISBN-13 canónico por fila: el isbn13 informado o, si falta, el isbn10 convertido."""
+    keys = np.full(len(df), None, dtype=object)
+    if "isbn13" in df.columns:
+        keys = clean_isbn_array(_isbn_text(df["isbn13"], 13))
+        keys[keys == ""] = None
+    if "isbn10" in df.columns:
+        missing = pd.isna(keys)
+        if missing.any():
+            converted = isbn10_to_isbn13_array(_isbn_text(df["isbn10"], 10))
+            keys[missing] = converted[missing]
+    return pd.Series(keys, index=df.index, dtype="str")
 
-    # -------------------------------------------------------
-    # 5. Definir ID candidato (clave provisional)
-    # -------------------------------------------------------
-    def compute_candidate_id(row):
-        if pd.notna(row.get("isbn13")):
-            return str(row["isbn13"]).strip()
 
-        key = f"{row.get('title','')}_{row.get('author_principal','')}_{row.get('publisher','')}"
-        key = re.sub(r"\s+", "_", key.lower())
-        return key
+def compute_candidate_ids(df, normalize_isbns=None):
+    """ISBN13 si existe; si no, `titulo_autor_editorial` en minúsculas y sin espacios."""
+    if normalize_isbns is None:
+        normalize_isbns = NORMALIZE_ISBN_KEYS
 
-    df_all["book_id_candidato"] = df_all.apply(compute_candidate_id, axis=1)
+    fallback = (
+        _key_part(df, "title")
+        + "_"
+        + _key_part(df, "author_principal")
+        + "_"
+        + _key_part(df, "publisher")
+    )
+    fallback = _lower(fallback).str.replace(_WHITESPACE_RUN, "_", regex=True)
 
-    # -------------------------------------------------------
-    # 6. Deduplicación + Reglas de supervivencia
-    # -------------------------------------------------------
-    dim_rows = []
+    if normalize_isbns:
+        keys = isbn13_keys(df)
+        return keys.where(keys.notna(), fallback)
 
-    grouped = df_all.groupby("book_id_candidato")
+    if "isbn13" not in df.columns:
+        return fallback
 
-    for book_id, group in grouped:
-        winner = group.iloc[0].copy()
+    has_isbn = df["isbn13"].notna()
+    isbn13 = df["isbn13"].astype(object).where(has_isbn, "").astype("str").str.strip()
+    return isbn13.where(has_isbn, fallback)
 
-        # ► Mejor título (el de mayor longitud)
-        titles = group["title"].dropna().astype(str).reset_index(drop=True)
-        if len(titles) > 0:
-            title_lengths = titles.str.len()
-            longest_idx = title_lengths.idxmax()
-            winner["title"] = titles.loc[longest_idx]
-        else:
-            winner["title"] = None
-
-        # ► Autor principal (primer no nulo)
-        authors_p = group["author_principal"].dropna()
-        if len(authors_p):
-            winner["author_principal"] = authors_p.iloc[0]
-
-        # ► Unir autores
-        all_authors = []
-        for a in group["authors_list"]:
-            all_authors.extend(a)
-        winner["authors"] = list(dict.fromkeys(all_authors))
-
-        # ► Unir categorías
-        all_cat = []
-        for c in group["categories_list"]:
-            all_cat.extend(c)
-        winner["categories"] = list(dict.fromkeys(all_cat))
-
-        # ► Precio
-        prices = group["price_amount"].dropna()
-        winner["price_amount"] = prices.iloc[-1] if len(prices) else None
-
-        currencies = group["price_currency_normalized"].dropna()
-        winner["price_currency"] = currencies.iloc[-1] if len(currencies) else None
-
-        # ► Idioma
-        langs = group["language_normalized"].dropna()
-        winner["language"] = langs.iloc[0] if len(langs) else None
-
-        # ► Fecha publicación
-        dates = group["pub_date_normalized"].dropna()
-        winner["fecha_publicacion"] = dates.iloc[0] if len(dates) else None
-
-        # ► Editorial
-        pubs = group["publisher"].dropna()
-        winner["editorial"] = pubs.iloc[0] if len(pubs) else None
-
-        # ► Año
-        if winner["fecha_publicacion"]:
-            winner["anio_publicacion"] = int(str(winner["fecha_publicacion"])[:4])
-        else:
-            winner["anio_publicacion"] = None
 
-        # ► Validación ISBN
-        winner["isbn13_valido"] = validate_isbn(winner.get("isbn13"))
+def hash_candidate_ids(keys):
+    """Hash uint64 de cada clave candidata (para agrupar sobre enteros)."""
+    return pd.util.hash_pandas_object(keys, index=False)
 
-        # ► Fuente ganadora
-        winner["fuente_ganadora"] = group["source"].iloc[0]
 
-        # ► Timestamp
-        winner["ts_ultima_actualizacion"] = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+# -----------------------------------------------------------
+# NORMALIZACIÓN POR FUENTE
+# -----------------------------------------------------------
 
-        # ► ID final
-        winner["book_id"] = book_id
+def normalize_goodreads(df_gd):
+    """Paso 2: columnas comunes del modelo para los registros de Goodreads."""
+    df_gd = df_gd.rename(columns={"author": "author_principal"})
+    df_gd["authors_list"] = singleton_list_field(df_gd["author_principal"])
+    df_gd["categories_list"] = _list_series(np.zeros(len(df_gd), dtype=np.int64), [], df_gd.index)
+    for col in ("pub_date_normalized", "language_normalized", "price_currency_normalized"):
+        df_gd[col] = pd.Series(pd.NA, index=df_gd.index, dtype=ARROW_STRING)
+    return df_gd
 
-        dim_rows.append(winner)
 
-    df_dim = pd.DataFrame(dim_rows)
+def normalize_googlebooks(df_gb):
+    """Paso 3: fechas, idioma, moneda y listas de Google Books."""
+    df_gb["pub_date_normalized"] = normalize_dates(df_gb["pub_date"])
+    for col, (src, normalize) in {
+        "language_normalized": ("language", normalize_language),
+        "price_currency_normalized": ("price_currency", normalize_currency),
+    }.items():
+        df_gb[col] = _normalize_unique(df_gb[src], lambda text: text.map(normalize))
+    for col in ("authors", "categories"):
+        lists = df_gb.get(f"{col}_list")
+        if lists is not None and _is_list_dtype(lists.dtype):
+            df_gb[f"{col}_list"] = clean_list_field(lists)
+        else:
+            df_gb[f"{col}_list"] = split_list_field(df_gb[col])
+    return df_gb
 
-    # -------------------------------------------------------
-    # 7. Modelo canónico dim_book.parquet
-    # -------------------------------------------------------
+
+# -----------------------------------------------------------
+# MODELO CANÓNICO
+# -----------------------------------------------------------
+
+def build_dim_book(df_dim):
+    """Proyecta los ganadores de supervivencia al modelo canónico dim_book."""
     df_dim_out = pd.DataFrame()
 
     df_dim_out["book_id"] = df_dim["book_id"].astype(str)
@@ -228,10 +613,432 @@ def integrate_pipeline():
     df_dim_out["fuente_ganadora"] = df_dim["fuente_ganadora"]
     df_dim_out["ts_ultima_actualizacion"] = df_dim["ts_ultima_actualizacion"]
 
+    return df_dim_out
+
+
+# -----------------------------------------------------------
+# ESCRITURA PARQUET
+# -----------------------------------------------------------
+
+def write_dim_book(
+    df_dim_out,
+    path,
+    metadata=None,
+    basename_template="part-{i}.parquet",
+    partitioned=True,
+    profile=None,
+):
+    """dim_book tipado, ordenado por book_id y, si se configura, particionado (Hive)."""
+    write_parquet(
+        df_dim_out,
+        path,
+        types=DIM_BOOK_TYPES,
+        sort_by=["book_id"],
+        row_group_size=PARQUET_ROW_GROUP_SIZE,
+        dictionary_columns=DIM_BOOK_DICTIONARY_COLUMNS,
+        bloom_filter_columns=PARQUET_BLOOM_FILTER_COLUMNS,
+        partition_cols=DIM_BOOK_PARTITION_COLS if partitioned else None,
+        basename_template=basename_template,
+        metadata=metadata,
+        profile=profile,
+    )
+
+
+def write_detail(df_detail, path, metadata=None, profile=None):
+    """book_source_detail tipado y ordenado por book_id_candidato (poda en el modo incremental)."""
+    write_parquet(
+        df_detail,
+        path,
+        types=DETAIL_TYPES,
+        sort_by=["book_id_candidato"],
+        row_group_size=PARQUET_ROW_GROUP_SIZE,
+        dictionary_columns=DETAIL_DICTIONARY_COLUMNS,
+        bloom_filter_columns=PARQUET_BLOOM_FILTER_COLUMNS,
+        metadata=metadata,
+        profile=profile,
+    )
+
+
+def prepare_dim_book_path():
+    """
+    Destino de dim_book: el fichero, o el directorio (vaciado) del dataset
+    Hive. Se borra la otra forma (fichero único o shards de una ejecución
+    anterior), que ya no estaría al día.
+    """
+    DIM_BOOK_PARQUET.parent.mkdir(parents=True, exist_ok=True)
+    if DIM_BOOK_DIR.exists():
+        shutil.rmtree(DIM_BOOK_DIR)
+    if not DIM_BOOK_PARTITION_COLS:
+        return DIM_BOOK_PARQUET
+    DIM_BOOK_PARQUET.unlink(missing_ok=True)
+    return DIM_BOOK_DIR
+
+
+def prepare_detail_path():
+    """Destino del detalle en fichero único, sin los shards de una ejecución anterior."""
+    DETAIL_PARQUET.parent.mkdir(parents=True, exist_ok=True)
+    if DETAIL_DIR.exists():
+        shutil.rmtree(DETAIL_DIR)
+    return DETAIL_PARQUET
+
+
+def incremental_store():
+    return IncrementalStore(
+        DIM_BOOK_PARQUET,
+        DETAIL_PARQUET,
+        write_dim=partial(write_dim_book, partitioned=False),
+        write_detail=write_detail,
+    )
+
+
+# -----------------------------------------------------------
+# CALIDAD
+# -----------------------------------------------------------
+
+def quality_profiles():
+    """Perfiles de calidad vacíos de dim_book y book_source_detail."""
+    return QualityProfile(DIM_BOOK_QUALITY_CHECKS), QualityProfile(DETAIL_QUALITY_CHECKS)
+
+
+def quality_metrics(dim_profile, detail_profile):
+    """quality_metrics.json: métricas de siempre + el perfil completo de ambas tablas."""
+    dim = dim_profile.result()
+    detail = detail_profile.result()
+    rows_by_source = detail["columnas"]["source"]["frecuencias"]
+    return {
+        "registros_goodreads": rows_by_source.get("goodreads", 0),
+        "registros_googlebooks": rows_by_source.get("googlebooks", 0),
+        "libros_finales_dim": dim["filas"],
+        "pct_nulos_titulo": dim["columnas"]["titulo"]["pct_nulos"],
+        "pct_nulos_isbn13": dim["columnas"]["isbn13"]["pct_nulos"],
+        "pct_nulos_precio": dim["columnas"]["precio"]["pct_nulos"],
+        "duplicados_por_book_id_candidato": detail["columnas"]["book_id_candidato"]["duplicados"],
+        "precio_valido_rango": dim["columnas"]["precio"]["en_rango"],
+        "filas_por_fuente": rows_by_source,
+        "perfil": {"dim_book": dim, "book_source_detail": detail},
+    }
+
+
+def compute_quality(df_detail, df_dim_out):
+    """Métricas de quality_metrics.json para tablas ya en memoria (p. ej. tras compactar)."""
+    dim_profile, detail_profile = quality_profiles()
+    dim_profile.update(to_arrow(df_dim_out, DIM_BOOK_TYPES))
+    detail_profile.update(to_arrow(df_detail, DETAIL_TYPES))
+    return quality_metrics(dim_profile, detail_profile)
+
+
+# -----------------------------------------------------------
+# EJECUCIÓN PARTICIONADA
+# -----------------------------------------------------------
+#
+# Las filas se reparten en K shards por hash de book_id_candidato, así que
+# todas las filas de un mismo libro caen en el mismo shard y cada shard se
+# normaliza y deduplica de forma independiente en un pool de procesos.
+# El proceso principal solo lee las fuentes por bloques y las vuelca a
+# disco por shard: la memoria de cada proceso queda acotada por el tamaño
+# del shard, no por el de la entrada.
+
+# Columnas que intervienen en la clave candidata
+_KEY_COLUMNS = ["title", "author_principal", "publisher", "isbn13", "isbn10"]
+
+
+def _spill_source(chunks, source, first_pos, key_columns, partitions, spill_dir):
+    """
+    Añade source/row_id/clave a cada bloque y guarda sus filas en un fichero
+    por shard. El índice de cada fila es su posición global en df_all.
+    Devuelve el nº de filas de la fuente.
+    """
+    n_rows = 0
+    for i, chunk in enumerate(chunks):
+        hashes = row_hashes(chunk)
+        chunk.index = pd.RangeIndex(first_pos + n_rows, first_pos + n_rows + len(chunk))
+        chunk["source"] = pd.Categorical.from_codes(
+            np.full(len(chunk), SOURCE_DTYPE.categories.get_loc(source)), dtype=SOURCE_DTYPE
+        )
+        chunk["row_id"] = chunk.index - first_pos + 1
+        chunk["row_hash"] = hashes
+
+        keyed = chunk.rename(columns={"author": "author_principal"}).reindex(columns=key_columns)
+        chunk["book_id_candidato"] = compute_candidate_ids(keyed)
+        shard = hash_candidate_ids(chunk["book_id_candidato"]).to_numpy() % partitions
+
+        for s in range(partitions):
+            chunk[shard == s].to_pickle(spill_dir / f"{source}-{s:04d}-{i:06d}.pkl")
+        n_rows += len(chunk)
+    return n_rows
+
+
+def _read_spill(spill_dir, source, shard):
+    frames = [pd.read_pickle(p) for p in sorted(spill_dir.glob(f"{source}-{shard:04d}-*.pkl"))]
+    return pd.concat([f for f in frames if len(f)] or frames[:1])
+
+
+def _integrate_shard(task):
+    """
+    Pasos 2–9 para un shard: normaliza, deduplica y escribe sus Parquet.
+    Devuelve (perfiles de calidad o None con salida "merged", métricas del shard).
+    """
+    shard, spill_dir, dim_path, detail_path, hash_keys, ts_ingesta = task
+    # El proceso del pool puede venir de otro shard: métricas solo de este
+    METRICS.reset()
+
+    df_gd = _read_spill(spill_dir, "goodreads", shard)
+    df_gb = _read_spill(spill_dir, "googlebooks", shard)
+    keys = pd.concat([df_gd.pop("book_id_candidato"), df_gb.pop("book_id_candidato")])
+
+    with step("2-3 normalización"):
+        df_all = pd.concat(
+            [normalize_goodreads(df_gd), normalize_googlebooks(df_gb)], sort=False
+        )
+    df_all["book_id_candidato"] = keys
+    if hash_keys:
+        df_all["book_id_hash"] = hash_candidate_ids(df_all["book_id_candidato"])
+
+    with step("6 supervivencia"):
+        df_dim = apply_survivorship(df_all, group_key="book_id_hash" if hash_keys else None)
+    with step("7 modelo canónico"):
+        df_dim_out = build_dim_book(df_dim)
+
+    # El detalle es df_all con su timestamp: sin copia
+    df_detail = df_all
+    df_detail["timestamp_ingesta"] = ts_ingesta
+
+    if dim_path.suffix == ".pkl":
+        # Se unirán (y perfilarán) después: pickle conserva los dtypes tal cual
+        with step("9 volcado del shard"):
+            df_dim_out.to_pickle(dim_path)
+            df_detail.to_pickle(detail_path)
+        return None, METRICS.snapshot()
+
+    dim_profile, detail_profile = quality_profiles()
+    with step("9 escritura dim_book + calidad"):
+        write_dim_book(
+            df_dim_out,
+            dim_path,
+            basename_template=f"part-{shard:04d}-{{i}}.parquet",
+            profile=dim_profile,
+        )
+    with step("9 escritura detalle + calidad"):
+        write_detail(df_detail, detail_path, profile=detail_profile)
+    return (dim_profile, detail_profile), METRICS.snapshot()
+
+
+def _merge_shards(dim_paths, detail_paths):
+    """Une los resultados de los shards en dim_book y book_source_detail; devuelve sus perfiles."""
+    dim_profile, detail_profile = quality_profiles()
+
+    # infer_objects: un shard pequeño puede haber dejado como object una
+    # columna que en conjunto es de texto
+    df_dim_out = pd.concat([pd.read_pickle(p) for p in dim_paths]).infer_objects()
+    write_dim_book(df_dim_out, prepare_dim_book_path(), profile=dim_profile)
+    del df_dim_out
+
+    df_detail = pd.concat([pd.read_pickle(p) for p in detail_paths])
+    df_detail = df_detail.sort_index().reset_index(drop=True)
+    write_detail(df_detail, prepare_detail_path(), profile=detail_profile)
+    return dim_profile, detail_profile
+
+
+def integrate_partitioned(partitions, workers, output):
+    """Integración en `partitions` shards procesados en paralelo; devuelve las métricas."""
+    gd_path = goodreads_landing_path()
+    ts_ingesta = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    DIM_BOOK_PARQUET.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="_integrate_", dir=DIM_BOOK_PARQUET.parent) as tmp:
+        spill_dir = Path(tmp)
+
+        # ► Columnas de la clave presentes en alguna de las dos fuentes
+        gd_chunks = iter_goodreads_chunks(gd_path)
+        first_gd = next(gd_chunks)
+        gb_chunks = iter_googlebooks_chunks(googlebooks_landing_path())
+        first_gb = next(gb_chunks)
+        gd_columns = ["author_principal" if c == "author" else c for c in first_gd.columns]
+        present = set(gd_columns) | set(first_gb.columns)
+        key_columns = [c for c in _KEY_COLUMNS if c in present]
+
+        # ► Lectura por bloques y reparto por hash
+        print(f"[INFO] Repartiendo filas en {partitions} shards…")
+        with step("1 lectura y reparto en shards"):
+            n_gd = _spill_source(
+                chain([first_gd], gd_chunks), "goodreads", 0, key_columns, partitions, spill_dir
+            )
+            n_gb = _spill_source(
+                chain([first_gb], gb_chunks),
+                "googlebooks",
+                n_gd,
+                key_columns,
+                partitions,
+                spill_dir,
+            )
+        count("filas_goodreads", n_gd)
+        count("filas_googlebooks", n_gb)
+
+        # ► Normalización + supervivencia por shard en paralelo
+        if output == "shards":
+            DIM_BOOK_PARQUET.unlink(missing_ok=True)
+            DETAIL_PARQUET.unlink(missing_ok=True)
+            out_dirs = (DIM_BOOK_DIR, DETAIL_DIR)
+            for d in out_dirs:
+                if d.exists():
+                    shutil.rmtree(d)
+                d.mkdir(parents=True)
+        else:
+            out_dirs = (spill_dir / "dim_book", spill_dir / "book_source_detail")
+            for d in out_dirs:
+                d.mkdir()
+
+        suffix = "parquet" if output == "shards" else "pkl"
+        dim_paths = [out_dirs[0] / f"part-{s:04d}.{suffix}" for s in range(partitions)]
+        detail_paths = [out_dirs[1] / f"part-{s:04d}.{suffix}" for s in range(partitions)]
+        if output == "shards" and DIM_BOOK_PARTITION_COLS:
+            # Dataset Hive: todos los shards escriben en el mismo directorio
+            dim_paths = [DIM_BOOK_DIR] * partitions
+        tasks = [
+            (s, spill_dir, dim_paths[s], detail_paths[s], HASH_CANDIDATE_KEYS, ts_ingesta)
+            for s in range(partitions)
+        ]
+
+        print(f"[INFO] Procesando shards con {min(workers, partitions)} procesos…")
+        with step("2-9 shards (pool)"), ProcessPoolExecutor(
+            max_workers=min(workers, partitions)
+        ) as pool:
+            parts = list(pool.map(_integrate_shard, tasks))
+        # Tiempos sumados sobre todos los shards (no son tiempo de reloj)
+        for _, shard_metrics in parts:
+            METRICS.merge(shard_metrics, prefix="shard: ")
+
+        if output == "shards":
+            dim_profile, detail_profile = quality_profiles()
+            for (shard_dim, shard_detail), _ in parts:
+                dim_profile.merge(shard_dim)
+                detail_profile.merge(shard_detail)
+        else:
+            with step("9 unión de shards + calidad"):
+                dim_profile, detail_profile = _merge_shards(dim_paths, detail_paths)
+
+    return quality_metrics(dim_profile, detail_profile)
+
+
+# -----------------------------------------------------------
+# CACHÉ DE LA UNIÓN NORMALIZADA
+# -----------------------------------------------------------
+#
+# df_all tras el paso 5 (normalizado, unido y con book_id_candidato) se
+# guarda en UNION_CACHE_ARROW con una huella de lo que lo determina. Si la
+# huella coincide en la siguiente ejecución, el fichero se mapea en memoria
+# en lugar de releer el landing y repetir los pasos 1–5: cambiar solo las
+# reglas de supervivencia o la escritura no obliga a recalcularlo.
+
+def union_fingerprint(landing_paths):
+    """Hash del contenido del landing, del código de los pasos 1–5 y de su configuración."""
+    digest = hashlib.sha256()
+    for path in [*landing_paths, *(SRC_DIR / module for module in UNION_CACHE_MODULES)]:
+        file_digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            # Por bloques de 1 MiB (hashlib.file_digest requiere Python 3.11)
+            for block in iter(lambda: f.read(1 << 20), b""):
+                file_digest.update(block)
+        digest.update(f"{path.name}\0{file_digest.hexdigest()}\n".encode())
+    config = {
+        "INGEST_BACKEND": INGEST_BACKEND,
+        "NORMALIZE_ISBN_KEYS": NORMALIZE_ISBN_KEYS,
+        "FUZZY_MATCHING": FUZZY_MATCHING,
+        "HASH_CANDIDATE_KEYS": HASH_CANDIDATE_KEYS,
+        "pandas": pd.__version__,
+        "pyarrow": pa.__version__,
+    }
+    digest.update(json.dumps(config, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def read_union_cache(fingerprint, path=None):
+    """df_all mapeado desde la caché, o None si no existe o su huella no coincide."""
+    path = path or UNION_CACHE_ARROW
+    if ipc_metadata(path).get("fingerprint") != fingerprint:
+        return None
+    return read_ipc(path)
+
+
+# -----------------------------------------------------------
+# PIPELINE PRINCIPAL
+# -----------------------------------------------------------
+
+def normalized_union():
+    """Pasos 1–5: lee y normaliza ambas fuentes, las une y asigna book_id_candidato."""
+
+    # -------------------------------------------------------
+    # 1–3. Leer fuentes por bloques y normalizar cada bloque
+    # -------------------------------------------------------
+    with step("1-3 lectura y normalización"):
+        df_gd = load_source(
+            iter_goodreads_chunks(goodreads_landing_path()), "goodreads", normalize_goodreads
+        )
+        df_gb = load_source(
+            iter_googlebooks_chunks(googlebooks_landing_path()),
+            "googlebooks",
+            normalize_googlebooks,
+        )
+
+    # -------------------------------------------------------
+    # 4. Unificar fuentes
+    # -------------------------------------------------------
+    with step("4 unificar fuentes"):
+        df_all = pd.concat([df_gd, df_gb], ignore_index=True, sort=False)
+
+    # -------------------------------------------------------
+    # 5. Definir ID candidato (clave provisional)
+    # -------------------------------------------------------
+    with step("5 id candidato"):
+        df_all["book_id_candidato"] = compute_candidate_ids(df_all)
+    if FUZZY_MATCHING:
+        with step("5b casado aproximado"):
+            df_all["book_id_candidato"] = merge_near_duplicates(
+                df_all, df_all["book_id_candidato"], isbn13_keys(df_all).notna()
+            )
+    if HASH_CANDIDATE_KEYS:
+        df_all["book_id_hash"] = hash_candidate_ids(df_all["book_id_candidato"])
+    return df_all
+
+
+def integrate_in_memory():
+    """Pasos 1–10 con ambas fuentes en memoria en un único proceso; devuelve las métricas."""
+    if not UNION_CACHE:
+        df_all = normalized_union()
+    else:
+        with step("1-5 huella y caché df_all"):
+            fingerprint = union_fingerprint([goodreads_landing_path(), googlebooks_landing_path()])
+            df_all = read_union_cache(fingerprint)
+        if df_all is not None:
+            print(f"[OK] Landing sin cambios: df_all mapeado desde {UNION_CACHE_ARROW}")
+            count("union_cache_aciertos")
+            for source, n_rows in df_all["source"].value_counts(sort=False).items():
+                count(f"filas_{source}", int(n_rows))
+        else:
+            df_all = normalized_union()
+            with step("5c escritura caché df_all"):
+                write_ipc(df_all, UNION_CACHE_ARROW, {"fingerprint": fingerprint})
+
+    # -------------------------------------------------------
+    # 6. Deduplicación + Reglas de supervivencia
+    # -------------------------------------------------------
+    with step("6 supervivencia"):
+        df_dim = apply_survivorship(
+            df_all, group_key="book_id_hash" if HASH_CANDIDATE_KEYS else None
+        )
+
+    # -------------------------------------------------------
+    # 7. Modelo canónico dim_book.parquet
+    # -------------------------------------------------------
+    with step("7 modelo canónico"):
+        df_dim_out = build_dim_book(df_dim)
+    count("libros_dim_book", len(df_dim_out))
+
     # -------------------------------------------------------
     # 8. book_source_detail
     # -------------------------------------------------------
-    df_detail = df_all.copy()
+    # El detalle es df_all con su timestamp: sin copia
+    df_detail = df_all
     df_detail["timestamp_ingesta"] = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
 
     # -------------------------------------------------------
@@ -240,26 +1047,191 @@ def integrate_pipeline():
     DIM_BOOK_PARQUET.parent.mkdir(parents=True, exist_ok=True)
     DETAIL_PARQUET.parent.mkdir(parents=True, exist_ok=True)
 
-    pq.write_table(pa.Table.from_pandas(df_dim_out), DIM_BOOK_PARQUET)
-    pq.write_table(pa.Table.from_pandas(df_detail), DETAIL_PARQUET)
+    dim_profile, detail_profile = quality_profiles()
+    with step("9 escritura dim_book + calidad"):
+        write_dim_book(df_dim_out, prepare_dim_book_path(), profile=dim_profile)
+    with step("9 escritura detalle + calidad"):
+        write_detail(df_detail, prepare_detail_path(), profile=detail_profile)
 
     # -------------------------------------------------------
-    # 10. quality_metrics.json
+    # 10. quality_metrics.json (perfilado al escribir)
     # -------------------------------------------------------
-    quality = {
-        "registros_goodreads": len(df_gd),
-        "registros_googlebooks": len(df_gb),
-        "libros_finales_dim": len(df_dim_out),
-        "pct_nulos_titulo": metric_null_percentage(df_dim_out, "titulo"),
-        "pct_nulos_isbn13": metric_null_percentage(df_dim_out, "isbn13"),
-        "pct_nulos_precio": metric_null_percentage(df_dim_out, "precio"),
-        "duplicados_por_book_id_candidato": metric_duplicates(df_all, ["book_id_candidato"]),
-        "precio_valido_rango": check_numeric_range(df_dim_out, "precio", min_val=0),
-        "filas_por_fuente": df_all["source"].value_counts().to_dict(),
-    }
+    return quality_metrics(dim_profile, detail_profile)
+
+
+# -----------------------------------------------------------
+# MODO INCREMENTAL
+# -----------------------------------------------------------
+#
+# Solo se normalizan las filas del landing cuyo row_hash no está ya en el
+# detalle. Una fila nueva con la misma identidad (`ROW_IDENTITY`) que una
+# integrada la sustituye. La supervivencia se recalcula únicamente para los
+# book_id_candidato afectados, leyendo del detalle sus filas anteriores, y el
+# resultado se guarda como fragmento (ver incremental_store.py). Las filas
+# que desaparecen del landing no se eliminan: para eso está la reconstrucción
+# completa.
 
-    with open(QUALITY_JSON, "w", encoding="utf-8") as f:
-        json.dump(quality, f, indent=4)
+def integrate_incremental(compact=False):
+    """
+    Integra solo el delta del landing como fragmento y compacta si toca.
+    Devuelve (métricas de calidad si ha compactado o reconstruido, si no None;
+    lista de (nombre, ruta) de los ficheros escritos).
+    """
+    store = incremental_store()
+    if not store.has_base():
+        if DIM_BOOK_DIR.exists() or DETAIL_DIR.exists():
+            print(
+                "[WARN] La salida anterior está en shards o en dataset Hive; el modo incremental "
+                "necesita ficheros únicos: reconstrucción completa en fichero único."
+            )
+        else:
+            print(
+                "[WARN] No hay base incremental (dim_book + detalle con row_hash): "
+                "reconstrucción completa."
+            )
+        quality = integrate_in_memory()
+        store.reset()
+        return quality, [
+            ("dim_book.parquet", DIM_BOOK_PARQUET),
+            ("book_source_detail.parquet", DETAIL_PARQUET),
+        ]
+
+    # ► Filas ya integradas
+    with step("índice del detalle integrado"):
+        index = store.read_detail(
+            columns=["source", "book_id_candidato", *ROW_IDENTITY.values()]
+        )
+
+    # ► Filas nuevas o modificadas del landing
+    with step("1-3 lectura y normalización del delta"):
+        df_gd = load_source(
+            iter_goodreads_chunks(goodreads_landing_path()),
+            "goodreads",
+            normalize_goodreads,
+            skip_hashes=index["row_hash"],
+        )
+        df_gb = load_source(
+            iter_googlebooks_chunks(googlebooks_landing_path()),
+            "googlebooks",
+            normalize_googlebooks,
+            skip_hashes=index["row_hash"],
+        )
+    df_new = pd.concat([df_gd, df_gb], ignore_index=True, sort=False)
+    count("filas_nuevas", len(df_new))
+    print(f"[INFO] Filas nuevas o modificadas: {len(df_new)}")
+
+    written = []
+    if len(df_new):
+        df_new["book_id_candidato"] = compute_candidate_ids(df_new)
+
+        # ► Filas integradas sustituidas por una versión nueva
+        superseded = np.zeros(len(index), dtype=bool)
+        for source, col in ROW_IDENTITY.items():
+            new_ids = df_new.loc[df_new["source"] == source, col].dropna()
+            superseded |= ((index["source"] == source) & index[col].isin(new_ids)).to_numpy()
+        superseded_hashes = index.loc[superseded, "row_hash"]
+
+        # ► Supervivencia de los libros afectados con todas sus filas
+        affected = set(df_new["book_id_candidato"]) | set(index.loc[superseded, "book_id_candidato"])
+        with step("lectura de filas afectadas"):
+            previous = store.read_detail(
+                filters=[("book_id_candidato", "in", sorted(affected))]
+            )
+        previous = previous[~previous["row_hash"].isin(superseded_hashes)]
+
+        df_all = pd.concat(
+            [previous.drop(columns=["timestamp_ingesta"]), df_new], ignore_index=True, sort=False
+        )
+        # Como en la reconstrucción completa: Goodreads antes que Google Books
+        source_rank = (df_all["source"] != "goodreads").to_numpy()
+        df_all = df_all.iloc[np.argsort(source_rank, kind="stable")].reset_index(drop=True)
+        if HASH_CANDIDATE_KEYS:
+            df_all["book_id_hash"] = hash_candidate_ids(df_all["book_id_candidato"])
+
+        with step("6-7 supervivencia de los afectados"):
+            df_dim_out = build_dim_book(
+                apply_survivorship(
+                    df_all, group_key="book_id_hash" if HASH_CANDIDATE_KEYS else None
+                )
+            )
+        deleted = affected - set(df_dim_out["book_id"])
+
+        df_detail = df_new
+        df_detail["timestamp_ingesta"] = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        with step("9 escritura del fragmento"):
+            seq = store.append(df_dim_out, df_detail, deleted, superseded_hashes)
+        print(
+            f"[OK] Fragmento {seq}: {len(df_dim_out)} libros actualizados, "
+            f"{len(deleted)} eliminados, {int(superseded.sum())} filas sustituidas"
+        )
+        fragment = store.load_manifest()["fragments"][-1]
+        written = [
+            (f"fragmento {seq} de dim_book", store.dir / fragment["dim"]),
+            (f"fragmento {seq} de book_source_detail", store.dir / fragment["detail"]),
+        ]
+
+    pending = store.pending_fragments()
+    if compact or len(pending) >= COMPACT_AFTER_FRAGMENTS:
+        print("[INFO] Compactando fragmentos incrementales…")
+        with step("compactación"):
+            df_dim_out, df_detail = store.compact()
+        if pending:
+            # Los fragmentos quedan dentro de la base y se borran
+            written = [
+                ("dim_book.parquet", DIM_BOOK_PARQUET),
+                ("book_source_detail.parquet", DETAIL_PARQUET),
+            ]
+        with step("10 calidad"):
+            return compute_quality(df_detail, df_dim_out), written
+    return None, written
+
+
+def integrate_pipeline(
+    partitions=PARTITIONS,
+    workers=PARTITION_WORKERS,
+    output=PARTITION_OUTPUT,
+    incremental=False,
+    compact=False,
+):
+    print("[INFO] Iniciando integración del pipeline…")
+    sharded = partitions > 1 and output == "shards"
+    if (incremental or compact) and (DIM_BOOK_PARTITION_COLS or sharded):
+        raise SystemExit(
+            "[ERROR] --incremental/--compact trabajan sobre dim_book.parquet y "
+            "book_source_detail.parquet en fichero único: no admiten --partition-by "
+            "ni --output shards."
+        )
+    if FUZZY_MATCHING and (incremental or compact or partitions > 1):
+        print(
+            "[WARN] El casado aproximado (--fuzzy) solo se aplica en la integración "
+            "completa en memoria; en este modo se usan las claves exactas."
+        )
+
+    if incremental or compact:
+        quality, written = integrate_incremental(compact)
+    else:
+        if partitions > 1:
+            quality = integrate_partitioned(partitions, workers, output)
+        else:
+            quality = integrate_in_memory()
+        # La base se ha reconstruido entera: los fragmentos ya no aplican
+        incremental_store().reset()
+        written = [
+            ("dim_book/ (dataset)", DIM_BOOK_DIR)
+            if sharded or DIM_BOOK_PARTITION_COLS
+            else ("dim_book.parquet", DIM_BOOK_PARQUET),
+            ("book_source_detail/part-*.parquet", DETAIL_DIR)
+            if sharded
+            else ("book_source_detail.parquet", DETAIL_PARQUET),
+        ]
+
+    if quality is not None:
+        with open(QUALITY_JSON, "w", encoding="utf-8") as f:
+            json.dump(quality, f, indent=4)
+        written.append(("quality_metrics.json", QUALITY_JSON))
+    else:
+        print("[INFO] quality_metrics.json se recalcula en la próxima compactación.")
 
     # -------------------------------------------------------
     # 11. schema.md
@@ -294,18 +1266,104 @@ Incluye:
 - source_name
 - source_file
 - row_number
+- row_hash
 - book_id_candidato
 - timestamp_ingesta
 - + todos los campos originales
 """
     SCHEMA_MD.write_text(schema.strip(), encoding="utf-8")
+    written.append(("schema.md", SCHEMA_MD))
 
     print("\n[FIN] Integración completada.")
-    print(f"[OK] dim_book.parquet → {DIM_BOOK_PARQUET}")
-    print(f"[OK] book_source_detail.parquet → {DETAIL_PARQUET}")
-    print(f"[OK] quality_metrics.json → {QUALITY_JSON}")
-    print(f"[OK] schema.md → {SCHEMA_MD}")
+    if not written[:-1]:
+        print("[INFO] Sin filas nuevas ni compactación: dim_book y el detalle no cambian.")
+    for name, path in written:
+        print(f"[OK] {name} → {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bloque 3: integración → Parquet + métricas")
+    parser.add_argument(
+        "--partitions",
+        type=int,
+        default=PARTITIONS,
+        help=f"shards por hash de book_id_candidato (por defecto {PARTITIONS}: todo en memoria)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=PARTITION_WORKERS,
+        help=f"procesos para los shards (por defecto {PARTITION_WORKERS})",
+    )
+    parser.add_argument(
+        "--ingest",
+        choices=["arrow", "pandas"],
+        default=INGEST_BACKEND,
+        help="lectura del landing: pyarrow en streaming (por defecto) o pandas",
+    )
+    parser.add_argument(
+        "--output",
+        choices=["merged", "shards"],
+        default=PARTITION_OUTPUT,
+        help="un único Parquet o un Parquet por shard (por defecto merged)",
+    )
+    parser.add_argument(
+        "--partition-by",
+        nargs="*",
+        default=DIM_BOOK_PARTITION_COLS,
+        metavar="COL",
+        help="columnas de partición Hive de dim_book (p. ej. anio_publicacion idioma)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="integra solo las filas nuevas o modificadas del landing como fragmento",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="integra los fragmentos incrementales pendientes en dim_book/book_source_detail",
+    )
+    parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        default=FUZZY_MATCHING,
+        help="une también los casi duplicados sin ISBN (MinHash/LSH sobre el título)",
+    )
+    parser.add_argument(
+        "--no-union-cache",
+        action="store_true",
+        help="recalcula los pasos 1–5 sin leer ni escribir la caché Arrow de df_all",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        help="añade al informe de ejecución un perfil de CPU (cprofile) o de memoria (tracemalloc)",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    integrate_pipeline()
+    args = parse_args()
+    INGEST_BACKEND = args.ingest
+    DIM_BOOK_PARTITION_COLS = args.partition_by
+    FUZZY_MATCHING = args.fuzzy
+    UNION_CACHE = not args.no_union_cache
+    with profiling(args.profile, "integrate"):
+        integrate_pipeline(
+            args.partitions, args.workers, args.output, args.incremental, args.compact
+        )
+    write_run_report(
+        "integrate",
+        config={
+            "partitions": args.partitions,
+            "workers": args.workers,
+            "output": args.output,
+            "ingest": INGEST_BACKEND,
+            "incremental": args.incremental,
+            "compact": args.compact,
+            "fuzzy": FUZZY_MATCHING,
+            "union_cache": UNION_CACHE,
+        },
+    )
+    print(f"[OK] run_report.json → {RUN_REPORT_JSON}")
@@ -0,0 +1,408 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+# -----------------------------------------------------------
+# EJECUCIÓN COMPLETA DEL PIPELINE (DAG CON CACHÉ POR ETAPA)
+# -----------------------------------------------------------
+#
+# Los tres bloques se ejecutan como etapas de un DAG (scrape → enrich →
+# integrate), cada una en su propio proceso con su script de siempre.
+# Antes de lanzar una etapa se calcula su huella:
+#   - código: hash de su script y de los módulos locales que importa;
+#   - entradas: hash del contenido de sus ficheros de entrada;
+#   - config: constantes del script (SEARCH_QUERY, PAGES_TO_SCRAPE…);
+#   - argumentos y variables de entorno que usa.
+# Si la huella coincide con la de la última ejecución correcta y sus salidas
+# siguen siendo las que produjo, la etapa se omite. Los hashes de fichero se
+# guardan junto a su tamaño y mtime, así que un fichero sin tocar no se
+# vuelve a leer: una re-ejecución sin cambios solo hace `stat`.
+#
+# Las etapas cuyas dependencias ya han terminado se lanzan en paralelo
+# (hasta `--jobs`), y los ficheros de una huella se hashean en paralelo.
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SRC_DIR = BASE_DIR / "src"
+STATE_JSON = BASE_DIR / "cache" / "pipeline_state.json"
+
+# Rutas relativas a BASE_DIR. El landing de Goodreads puede ser el JSON Lines
+# del scraping o el JSON clásico, y el de Google Books el CSV o el Parquet
+# (`--format`): todos cuentan como entrada. Una tupla en "outputs" son
+# salidas alternativas: basta con que exista una.
+GOODREADS_LANDING = ["landing/goodreads_books.jsonl", "landing/goodreads_books.json"]
+GOOGLEBOOKS_LANDING = ("landing/googlebooks_books.csv", "landing/googlebooks_books.parquet")
+
+STAGES = {
+    "scrape": {
+        "script": "scrape_goodreads.py",
+        "deps": [],
+        "inputs": [],
+        "outputs": ["landing/goodreads_books.jsonl"],
+        "config": [
+            "SEARCH_QUERY", "BASE_SEARCH_URL", "PAGES_TO_SCRAPE", "MAX_BOOKS", "PARSER_BACKEND",
+        ],
+        "env": [],
+    },
+    "enrich": {
+        "script": "enrich_googlebooks.py",
+        "deps": ["scrape"],
+        "inputs": GOODREADS_LANDING + [".env"],
+        "outputs": [GOOGLEBOOKS_LANDING],
+        "config": [
+            "GOOGLE_BOOKS_BASE_URL", "MAX_RETRIES", "TIMEOUT", "CSV_FIELDS", "LANDING_FORMAT",
+        ],
+        "env": ["GOOGLE_BOOKS_BASE_URL", "GOOGLE_BOOKS_API_KEY"],
+    },
+    "integrate": {
+        "script": "integrate_pipeline.py",
+        "deps": ["enrich"],
+        "inputs": GOODREADS_LANDING + list(GOOGLEBOOKS_LANDING),
+        "outputs": ["standard", "docs/quality_metrics.json", "docs/schema.md"],
+        "config": [
+            "NORMALIZE_ISBN_KEYS", "HASH_CANDIDATE_KEYS", "INGEST_BACKEND", "FUZZY_MATCHING",
+            "PARTITIONS", "PARTITION_OUTPUT", "DIM_BOOK_PARTITION_COLS", "UNION_CACHE",
+        ],
+        "env": [],
+    },
+}
+
+STAGE_ORDER = list(STAGES)
+DEFAULT_JOBS = 2
+
+
+# -----------------------------------------------------------
+# HUELLAS
+# -----------------------------------------------------------
+
+class FileHashes:
+    """Hash de contenido por fichero, reutilizado mientras no cambien tamaño ni mtime."""
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+        self.lock = threading.Lock()
+
+    def file(self, path: Path):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        key = str(path.relative_to(BASE_DIR))
+        with self.lock:
+            cached = self.known.get(key)
+        if cached and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return cached[2]
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            # Por bloques de 1 MiB (hashlib.file_digest requiere Python 3.11)
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+        with self.lock:
+            self.known[key] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def path(self, path: Path):
+        """Hash de un fichero o, para un directorio, de sus ficheros (ruta + contenido)."""
+        if not path.is_dir():
+            return self.file(path)
+        combined = hashlib.sha256()
+        for child in sorted(p for p in path.rglob("*") if p.is_file()):
+            combined.update(f"{child.relative_to(path)}\0{self.file(child)}\n".encode())
+        return combined.hexdigest()
+
+    def many(self, rel_paths):
+        """{ruta relativa: hash o None si no existe}, hasheando en paralelo."""
+        if not rel_paths:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(8, len(rel_paths))) as pool:
+            digests = pool.map(lambda rel: self.path(BASE_DIR / rel), rel_paths)
+            return dict(zip(rel_paths, digests))
+
+
+def local_modules(script: Path) -> list[Path]:
+    """El script y los módulos de src/ que importa (directa o indirectamente)."""
+    found, pending = [], [script]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.append(path)
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                module = SRC_DIR / f"{name.split('.')[0]}.py"
+                if module.exists():
+                    pending.append(module)
+    return sorted(found)
+
+
+def module_config(script: Path, names) -> dict:
+    """Valor de las constantes `names` del script (literal o, si no, su expresión)."""
+    config = {}
+    for node in ast.parse(script.read_text(encoding="utf-8")).body:
+        if not isinstance(node, ast.Assign):
+            continue
+        for target in node.targets:
+            if isinstance(target, ast.Name) and target.id in names:
+                try:
+                    config[target.id] = ast.literal_eval(node.value)
+                except ValueError:
+                    config[target.id] = ast.unparse(node.value)
+    return config
+
+
+def fingerprint(name: str, args: list[str], hashes: FileHashes) -> dict:
+    stage = STAGES[name]
+    script = SRC_DIR / stage["script"]
+    code = hashlib.sha256()
+    for module in local_modules(script):
+        code.update(f"{module.name}\0{hashes.file(module)}\n".encode())
+    # Las variables de entorno pueden ser secretas: solo se guarda su hash
+    env = hashlib.sha256(
+        json.dumps({var: os.environ.get(var) for var in stage["env"]}, sort_keys=True).encode()
+    )
+    return {
+        "code": code.hexdigest(),
+        "inputs": hashes.many(stage["inputs"]),
+        "config": module_config(script, stage["config"]),
+        "args": args,
+        "env": env.hexdigest(),
+    }
+
+
+def output_paths(name: str) -> list[str]:
+    """Salidas declaradas de la etapa, con las alternativas desplegadas."""
+    paths = []
+    for output in STAGES[name]["outputs"]:
+        paths.extend(output if isinstance(output, tuple) else [output])
+    return paths
+
+
+def missing_outputs(name: str, outputs: dict) -> list[str]:
+    """Salidas que faltan; de un grupo de alternativas, solo si faltan todas."""
+    missing = []
+    for output in STAGES[name]["outputs"]:
+        group = output if isinstance(output, tuple) else (output,)
+        if all(outputs[path] is None for path in group):
+            missing.append(" o ".join(group))
+    return missing
+
+
+def stale_reasons(
+    previous: dict | None, current: dict, outputs: dict, missing: list[str]
+) -> list[str]:
+    """Motivos para ejecutar la etapa (lista vacía = al día)."""
+    if not previous:
+        return ["sin ejecución previa"]
+    if missing:
+        return ["faltan salidas: " + ", ".join(missing)]
+
+    reasons = []
+    old = previous["fingerprint"]
+    if old["code"] != current["code"]:
+        reasons.append("código modificado")
+    changed = [p for p in current["inputs"] if old["inputs"].get(p) != current["inputs"][p]]
+    if changed:
+        reasons.append("entradas modificadas: " + ", ".join(changed))
+    changed = [k for k in current["config"] if old["config"].get(k) != current["config"][k]]
+    if changed:
+        reasons.append("configuración modificada: " + ", ".join(changed))
+    if old["args"] != current["args"]:
+        reasons.append("argumentos distintos")
+    if old["env"] != current["env"]:
+        reasons.append("variables de entorno distintas")
+    if previous["outputs"] != outputs:
+        reasons.append("salidas modificadas desde la última ejecución")
+    return reasons
+
+
+# -----------------------------------------------------------
+# ESTADO
+# -----------------------------------------------------------
+
+def load_state() -> dict:
+    if not STATE_JSON.exists():
+        return {"files": {}, "stages": {}}
+    return json.loads(STATE_JSON.read_text(encoding="utf-8"))
+
+
+def save_state(state: dict) -> None:
+    STATE_JSON.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_JSON.with_name(STATE_JSON.name + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, STATE_JSON)
+
+
+# -----------------------------------------------------------
+# EJECUCIÓN
+# -----------------------------------------------------------
+
+def run_stage(name: str, args: list[str]) -> int:
+    """Lanza el script de la etapa y reenvía su salida con el prefijo `[etapa]`."""
+    command = [sys.executable, str(SRC_DIR / STAGES[name]["script"]), *args]
+    process = subprocess.Popen(
+        command,
+        cwd=BASE_DIR,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        env={**os.environ, "PYTHONUNBUFFERED": "1"},
+    )
+    for line in process.stdout:
+        print(f"[{name}] {line}", end="", flush=True)
+    return process.wait()
+
+
+def select_stages(start=None, until=None) -> list[str]:
+    first = STAGE_ORDER.index(start) if start else 0
+    last = STAGE_ORDER.index(until) if until else len(STAGE_ORDER) - 1
+    if first > last:
+        raise SystemExit(f"--from {start} va después de --until {until}")
+    return STAGE_ORDER[first : last + 1]
+
+
+def run_pipeline(
+    start=None, until=None, force=False, jobs=DEFAULT_JOBS, dry_run=False, stage_args=None
+):
+    started = time.perf_counter()
+    stage_args = stage_args or {}
+    selected = select_stages(start, until)
+
+    state = load_state()
+    hashes = FileHashes(state["files"])
+    lock = threading.Lock()
+    status = {}
+
+    def process(name):
+        """Comprueba la huella de la etapa y la ejecuta si no está al día."""
+        args = stage_args.get(name, [])
+        current = fingerprint(name, args, hashes)
+        previous = state["stages"].get(name)
+        outputs = hashes.many(output_paths(name))
+        missing = missing_outputs(name, outputs)
+        reasons = ["--force"] if force else stale_reasons(previous, current, outputs, missing)
+        # En simulación las dependencias pendientes no se ejecutan: sus salidas
+        # aún no han cambiado, pero una ejecución real obligaría a repetir esta
+        pending_deps = [d for d in STAGES[name]["deps"] if status.get(d, ("",))[0] == "pendiente"]
+        if dry_run and pending_deps:
+            reasons.append("dependencias pendientes: " + ", ".join(pending_deps))
+
+        if not reasons:
+            print(f"[OK] {name}: al día, se omite")
+            return "al día", 0.0
+        print(f"[INFO] {name}: {'; '.join(reasons)}")
+        if dry_run:
+            return "pendiente", 0.0
+
+        stage_start = time.perf_counter()
+        code = run_stage(name, args)
+        elapsed = time.perf_counter() - stage_start
+        if code != 0:
+            print(f"[WARN] {name}: terminó con código {code}")
+            return "error", elapsed
+
+        outputs = hashes.many(output_paths(name))
+        missing = missing_outputs(name, outputs)
+        if missing:
+            print(f"[WARN] {name}: no generó {', '.join(missing)}")
+            return "error", elapsed
+
+        # La huella se recalcula: la etapa puede haber cambiado sus propias entradas
+        with lock:
+            state["stages"][name] = {
+                "fingerprint": fingerprint(name, args, hashes),
+                "outputs": outputs,
+                "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "seconds": round(elapsed, 3),
+            }
+            state["files"] = hashes.known
+            save_state(state)
+        return "ejecutada", elapsed
+
+    # Una etapa se lanza cuando han terminado sus dependencias seleccionadas
+    pending = list(selected)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            for name in list(pending):
+                deps = [d for d in STAGES[name]["deps"] if d in selected]
+                if any(status.get(d, ("",))[0] in ("error", "cancelada") for d in deps):
+                    status[name] = ("cancelada", 0.0)
+                    pending.remove(name)
+                    print(f"[WARN] {name}: no se ejecuta porque falló una etapa previa")
+                elif all(d in status for d in deps) and len(running) < max(1, jobs):
+                    running[pool.submit(process, name)] = name
+                    pending.remove(name)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                status[running.pop(future)] = future.result()
+
+    if not dry_run:
+        state["files"] = hashes.known
+        save_state(state)
+
+    print("\n[FIN] Pipeline:")
+    for name in selected:
+        result, elapsed = status[name]
+        print(f"  {name:<10} {result:<10} {elapsed:8.2f} s")
+    print(f"  {'total':<10} {'':<10} {time.perf_counter() - started:8.2f} s")
+    return all(status[name][0] in ("al día", "ejecutada", "pendiente") for name in selected)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Pipeline completo (scrape → enrich → integrate) con caché por etapa"
+    )
+    parser.add_argument(
+        "--from", dest="start", choices=STAGE_ORDER, help="primera etapa a considerar"
+    )
+    parser.add_argument("--until", choices=STAGE_ORDER, help="última etapa a considerar")
+    parser.add_argument(
+        "--force", action="store_true", help="ejecuta las etapas seleccionadas aunque estén al día"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"etapas independientes en paralelo (por defecto {DEFAULT_JOBS})",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="solo muestra qué etapas se ejecutarían y por qué"
+    )
+    parser.add_argument(
+        "--args",
+        action="append",
+        default=[],
+        metavar="ETAPA=ARGS",
+        help='argumentos para el script de una etapa, p. ej. --args "integrate=--partitions 8"',
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    stage_args = {}
+    for option in args.args:
+        name, _, extra = option.partition("=")
+        if name not in STAGES:
+            raise SystemExit(f"Etapa desconocida en --args: {name}")
+        stage_args[name] = stage_args.get(name, []) + shlex.split(extra)
+    ok = run_pipeline(args.start, args.until, args.force, args.jobs, args.dry_run, stage_args)
+    sys.exit(0 if ok else 1)
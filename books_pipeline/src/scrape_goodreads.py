@@ -1,16 +1,34 @@
 import requests
 from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 import json
-import time
+import os
 import re
-from pathlib import Path
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils_http import TokenBucket, make_session
+from utils_landing import GOODREADS_JSONL
+from utils_metrics import (
+    PROFILE_MODES,
+    RUN_REPORT_JSON,
+    count,
+    observe,
+    profiling,
+    timed,
+    write_run_report,
+)
 
 # -----------------------------------------------------------
 # CONFIGURACIÓN
 # -----------------------------------------------------------
 
 SEARCH_QUERY = "data science"
-BASE_SEARCH_URL = "https://www.goodreads.com/search"
+GOODREADS_BASE_URL = "https://www.goodreads.com"
+BASE_SEARCH_URL = f"{GOODREADS_BASE_URL}/search"
 USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -19,13 +37,20 @@ USER_AGENT = (
 
 HEADERS = {"User-Agent": USER_AGENT}
 
-OUTPUT_PATH = Path("landing/goodreads_books.json")
+# Salida en streaming (un libro por línea) + checkpoint para reanudar
+OUTPUT_PATH = GOODREADS_JSONL
 
 # Control de páginas y volumen de datos
 PAGES_TO_SCRAPE = 3      # 3 páginas ~ 60 libros
 MAX_BOOKS = 80           # límite superior opcional
-SLEEP_LIST = 0.4         # segundos entre resultados
-SLEEP_PAGE = 1.0         # segundos entre páginas
+
+# Scraping ético: presupuesto común a búsquedas y fichas de libro
+MAX_CONCURRENCY = 4          # peticiones simultáneas contra goodreads.com
+REQUESTS_PER_SECOND = 1.5    # ritmo máximo global
+
+# Parser HTML: "lxml" (XPath precompilado, solo los subárboles necesarios)
+# o "bs4" (BeautifulSoup + selectores CSS). lxml recurre a bs4 si falla.
+PARSER_BACKEND = "lxml"
 
 
 # -----------------------------------------------------------
@@ -38,127 +63,426 @@ def clean_text(text):
     return re.sub(r"\s+", " ", text).strip()
 
 
-def extract_isbn_from_book_page(book_url):
+class PoliteClient:
+    """
+    Session compartida con límite de concurrencia y de ritmo por host.
+
+    Todas las peticiones (búsquedas y fichas) pasan por `get`, que espera
+    un hueco del semáforo y un token del limitador antes de salir.
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, requests_per_second=REQUESTS_PER_SECOND):
+        self.session = make_session(pool_size=max_concurrency, headers=HEADERS)
+        self.limiter = TokenBucket(requests_per_second, capacity=1)
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+
+    def get(self, url, timeout):
+        start = time.perf_counter()
+        with self.slots:
+            self.limiter.acquire()
+            observe("goodreads.espera_ms", (time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            try:
+                resp = self.session.get(url, timeout=timeout)
+            finally:
+                count("goodreads.peticiones")
+                observe("goodreads.peticion_ms", (time.perf_counter() - start) * 1000)
+        count(f"goodreads.http_{resp.status_code}")
+        resp.raise_for_status()
+        return resp
+
+    def close(self):
+        self.session.close()
+
+
+@timed("goodreads.ficha_libro")
+def extract_isbn_from_book_page(book_url, client=None):
     """
     Entra en la página del libro y extrae ISBN10 / ISBN13 si existen.
     """
     try:
-        resp = requests.get(book_url, headers=HEADERS, timeout=10)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "lxml")
+        if client is not None:
+            resp = client.get(book_url, timeout=10)
+        else:
+            resp = requests.get(book_url, headers=HEADERS, timeout=10)
+            resp.raise_for_status()
+        return parse_isbns(resp.text)
 
-        isbn10, isbn13 = None, None
-        info_rows = soup.select("div#bookDataBox .clearFloats")
+    except Exception:
+        count("goodreads.fichas_fallidas")
+        return None, None
 
-        for row in info_rows:
-            heading_el = row.select_one(".infoBoxRowTitle")
-            value_el = row.select_one(".infoBoxRowItem")
 
-            heading = clean_text(heading_el.get_text()) if heading_el else ""
-            value = clean_text(value_el.get_text()) if value_el else ""
+# -----------------------------------------------------------
+# PARSERS HTML
+# -----------------------------------------------------------
 
-            if "ISBN" in heading:
-                # Ejemplo de texto: "ISBN 1491957662 (ISBN13: 9781491957660)"
-                match_10 = re.search(r"\b(\d{10})\b", value)
-                match_13 = re.search(r"\b(\d{13})\b", value)
+def isbns_from_info_rows(info_rows):
+    """ISBN10 / ISBN13 a partir de pares (título, valor) de `#bookDataBox`."""
+    isbn10, isbn13 = None, None
+
+    for heading, value in info_rows:
+        if heading and value and "ISBN" in heading:
+            # Ejemplo de texto: "ISBN 1491957662 (ISBN13: 9781491957660)"
+            match_10 = re.search(r"\b(\d{10})\b", value)
+            match_13 = re.search(r"\b(\d{13})\b", value)
+
+            if match_10:
+                isbn10 = match_10.group(1)
+            if match_13:
+                isbn13 = match_13.group(1)
+
+    return isbn10, isbn13
+
+
+def search_book(title, author, rating_text, href):
+    """Construye el registro de una fila de búsqueda a partir de sus textos."""
+    rating, ratings_count = None, None
+    if rating_text is not None:
+        match_rating = re.search(r"([0-5]\.\d+)", rating_text)
+        match_count = re.search(r"(\d[\d,]*) ratings", rating_text)
+
+        if match_rating:
+            rating = float(match_rating.group(1))
+        if match_count:
+            ratings_count = int(match_count.group(1).replace(",", ""))
+
+    book_url = GOODREADS_BASE_URL + href if href is not None else None
+
+    return {
+        "title": title,
+        "author": author,
+        "rating": rating,
+        "ratings_count": ratings_count,
+        "book_url": book_url,
+    }
+
+
+# ---- BeautifulSoup (respaldo) ------------------------------
+
+def parse_search_row(row):
+    """Extrae título, autor, rating, nº ratings y URL de una fila de resultados (bs4)."""
+    title_el = row.select_one("a.bookTitle span")
+    author_el = row.select_one("a.authorName span")
+    rating_el = row.select_one("span.minirating")
+    link_el = row.select_one("a.bookTitle")
+
+    return search_book(
+        title=clean_text(title_el.get_text()) if title_el else None,
+        author=clean_text(author_el.get_text()) if author_el else None,
+        rating_text=clean_text(rating_el.get_text()) if rating_el else None,
+        href=link_el.get("href") if link_el else None,
+    )
+
+
+def parse_search_page_bs4(html):
+    soup = BeautifulSoup(html, "lxml")
+    return [parse_search_row(row) for row in soup.select("table.tableList tr")]
+
+
+def parse_isbns_bs4(html):
+    soup = BeautifulSoup(html, "lxml")
+    info_rows = []
+    for row in soup.select("div#bookDataBox .clearFloats"):
+        heading_el = row.select_one(".infoBoxRowTitle")
+        value_el = row.select_one(".infoBoxRowItem")
+        info_rows.append(
+            (
+                clean_text(heading_el.get_text()) if heading_el else "",
+                clean_text(value_el.get_text()) if value_el else "",
+            )
+        )
+    return isbns_from_info_rows(info_rows)
 
-                if match_10:
-                    isbn10 = match_10.group(1)
-                if match_13:
-                    isbn13 = match_13.group(1)
 
-        return isbn10, isbn13
+# ---- lxml + XPath precompilado ------------------------------
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_XPATHS = {
+    "search_rows": f"//table[{_has_class('tableList')}]//tr",
+    "title": f"(.//a[{_has_class('bookTitle')}]//span)[1]",
+    "author": f"(.//a[{_has_class('authorName')}]//span)[1]",
+    "rating": f"(.//span[{_has_class('minirating')}])[1]",
+    "link": f"(.//a[{_has_class('bookTitle')}])[1]",
+    "data_box": "//div[@id='bookDataBox']",
+    "box_rows": f".//*[{_has_class('clearFloats')}]",
+    "box_title": f"(.//*[{_has_class('infoBoxRowTitle')}])[1]",
+    "box_item": f"(.//*[{_has_class('infoBoxRowItem')}])[1]",
+}
+
+# Los evaluadores XPath compilados no se comparten entre hilos
+_thread_local = threading.local()
+
+# Inicio de los subárboles que interesan (se evita parsear el resto de la página)
+_SEARCH_TABLE_START = re.compile(r"""<table\b[^>]*\bclass=["'][^"']*\btableList\b""")
+_DATA_BOX_START = re.compile(r"""<div\b[^>]*\bid=["']bookDataBox["']""")
+_PULL_CHUNK = 16 * 1024
+
+
+def _xpath(name):
+    compiled = getattr(_thread_local, "xpaths", None)
+    if compiled is None:
+        compiled = _thread_local.xpaths = {k: etree.XPath(v) for k, v in _XPATHS.items()}
+    return compiled[name]
 
-    except Exception:
-        return None, None
+
+def _first_text(el, name, default=None):
+    found = _xpath(name)(el)
+    return clean_text("".join(found[0].itertext())) if found else default
+
+
+def parse_search_page_lxml(html):
+    start = _SEARCH_TABLE_START.search(html)
+    end = html.find("</table>", start.end()) if start else -1
+    if start and end != -1:
+        html = html[start.start(): end + len("</table>")]
+
+    root = lxml.html.fromstring(html)
+    books = []
+    for row in _xpath("search_rows")(root):
+        link = _xpath("link")(row)
+        books.append(
+            search_book(
+                title=_first_text(row, "title"),
+                author=_first_text(row, "author"),
+                rating_text=_first_text(row, "rating"),
+                href=link[0].get("href") if link else None,
+            )
+        )
+    return books
+
+
+def _isbns_from_box(box):
+    info_rows = [
+        (_first_text(row, "box_title", ""), _first_text(row, "box_item", ""))
+        for row in _xpath("box_rows")(box)
+    ]
+    return isbns_from_info_rows(info_rows)
+
+
+def parse_isbns_lxml(html):
+    start = _DATA_BOX_START.search(html)
+    if not start:
+        boxes = _xpath("data_box")(lxml.html.fromstring(html))
+        return _isbns_from_box(boxes[0]) if boxes else (None, None)
+
+    # Parseo incremental desde el inicio de #bookDataBox: se detiene en
+    # cuanto se cierra el div, sin construir el árbol del resto de la página.
+    parser = etree.HTMLPullParser(events=("end",), tag="div")
+    fragment = html[start.start():]
+    for offset in range(0, len(fragment), _PULL_CHUNK):
+        parser.feed(fragment[offset: offset + _PULL_CHUNK])
+        for _, el in parser.read_events():
+            if el.get("id") == "bookDataBox":
+                return _isbns_from_box(el)
+
+    parser.close()
+    for _, el in parser.read_events():
+        if el.get("id") == "bookDataBox":
+            return _isbns_from_box(el)
+    return None, None
+
+
+# ---- Selección de backend -----------------------------------
+
+@timed("goodreads.parseo_busqueda")
+def parse_search_page(html, backend=None):
+    """Registros de una página de resultados de búsqueda."""
+    if (backend or PARSER_BACKEND) == "lxml":
+        try:
+            return parse_search_page_lxml(html)
+        except (etree.LxmlError, ValueError):
+            count("goodreads.respaldo_bs4")
+    return parse_search_page_bs4(html)
+
+
+@timed("goodreads.parseo_ficha")
+def parse_isbns(html, backend=None):
+    """(isbn10, isbn13) de la ficha de un libro."""
+    if (backend or PARSER_BACKEND) == "lxml":
+        try:
+            return parse_isbns_lxml(html)
+        except (etree.LxmlError, ValueError):
+            count("goodreads.respaldo_bs4")
+    return parse_isbns_bs4(html)
 
 
 # -----------------------------------------------------------
 # SCRAPING PRINCIPAL
 # -----------------------------------------------------------
 
-def scrape_goodreads():
-    print(f"[INFO] Iniciando scraping ampliado de Goodreads…\n")
+def url_key(book_url):
+    """URL del libro sin query string (los parámetros de búsqueda cambian entre páginas)."""
+    return book_url.split("?", 1)[0] if book_url else None
 
-    books = []
 
-    for page in range(1, PAGES_TO_SCRAPE + 1):
-        url = f"{BASE_SEARCH_URL}?q={SEARCH_QUERY.replace(' ', '+')}&page={page}"
+def checkpoint_path():
+    return OUTPUT_PATH.with_suffix(".checkpoint.json")
 
-        print(f"[INFO] Scrapeando página {page}: {url}")
-        resp = requests.get(url, headers=HEADERS, timeout=15)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "lxml")
 
-        rows = soup.select("table.tableList tr")
-        print(f"[INFO] Libros encontrados en esta página: {len(rows)}")
+def load_checkpoint():
+    path = checkpoint_path()
+    if not path.exists() or not OUTPUT_PATH.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
 
-        for row in rows:
-            if len(books) >= MAX_BOOKS:
-                break
 
-            # Título
-            title_el = row.select_one("a.bookTitle span")
-            title = clean_text(title_el.get_text()) if title_el else None
-
-            # Autor
-            author_el = row.select_one("a.authorName span")
-            author = clean_text(author_el.get_text()) if author_el else None
-
-            # Rating y nº de ratings
-            rating_el = row.select_one("span.minirating")
-            rating, ratings_count = None, None
-            if rating_el:
-                rating_text = clean_text(rating_el.get_text())
-                match_rating = re.search(r"([0-5]\.\d+)", rating_text)
-                match_count = re.search(r"(\d[\d,]*) ratings", rating_text)
-
-                if match_rating:
-                    rating = float(match_rating.group(1))
-                if match_count:
-                    ratings_count = int(match_count.group(1).replace(",", ""))
-
-            # URL del libro
-            link_el = row.select_one("a.bookTitle")
-            book_url = None
-            if link_el:
-                book_url = "https://www.goodreads.com" + link_el.get("href")
-
-            # ISBN desde página de detalle
-            isbn10, isbn13 = None, None
-            if book_url:
-                time.sleep(0.6)  # pausa ética
-                isbn10, isbn13 = extract_isbn_from_book_page(book_url)
-
-            books.append(
-                {
-                    "title": title,
-                    "author": author,
-                    "rating": rating,
-                    "ratings_count": ratings_count,
-                    "book_url": book_url,
-                    "isbn10": isbn10,
-                    "isbn13": isbn13,
-                }
-            )
+def save_checkpoint(state):
+    path = checkpoint_path()
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
 
-            print(f"[OK] Libro añadido: {title}")
-            time.sleep(SLEEP_LIST)
+def scrape_goodreads(
+    max_concurrency=MAX_CONCURRENCY,
+    requests_per_second=REQUESTS_PER_SECOND,
+    resume=False,
+):
+    print(f"[INFO] Iniciando scraping ampliado de Goodreads…\n")
+    print(f"[INFO] Concurrencia: {max_concurrency}, límite {requests_per_second:g} peticiones/s")
 
-        if len(books) >= MAX_BOOKS:
-            break
+    state = load_checkpoint() if resume else None
+    if state:
+        print(
+            f"[INFO] Reanudando tras la página {state['last_page']} "
+            f"({state['books_written']} libros ya guardados)"
+        )
+    else:
+        state = {"last_page": 0, "books_written": 0, "offset": 0, "seen_urls": []}
 
-        print("[INFO] Pausando antes de la siguiente página…\n")
-        time.sleep(SLEEP_PAGE)
+    # Solo se consideran vistos los libros ya escritos en el fichero
+    seen = set(state["seen_urls"])
+    queued = set()
 
-    # Guardar JSON
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(books, f, ensure_ascii=False, indent=4)
+    out = open(OUTPUT_PATH, "r+b" if state["offset"] else "wb")
+    # Descarta lo escrito después del último checkpoint (ejecución interrumpida)
+    out.truncate(state["offset"])
+    out.seek(state["offset"])
+
+    def flush_page(page, items):
+        """Escribe los libros de una página en orden y guarda el checkpoint."""
+        for book, future in items:
+            isbn10, isbn13 = future.result() if future else (None, None)
+            book["isbn10"] = isbn10
+            book["isbn13"] = isbn13
+            out.write((json.dumps(book, ensure_ascii=False) + "\n").encode("utf-8"))
+            if book["book_url"]:
+                seen.add(url_key(book["book_url"]))
+            state["books_written"] += 1
+            print(f"[OK] Libro añadido: {book['title']}")
+
+        out.flush()
+        os.fsync(out.fileno())
+        state.update(last_page=page, offset=out.tell(), seen_urls=sorted(seen))
+        save_checkpoint(state)
+
+    client = PoliteClient(max_concurrency, requests_per_second)
+
+    # Página anterior pendiente de escribir: sus fichas se descargan en
+    # segundo plano mientras el hilo principal pide la página siguiente.
+    previous = None
+    n_queued = 0
+
+    with out, ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        for page in range(state["last_page"] + 1, PAGES_TO_SCRAPE + 1):
+            if state["books_written"] + n_queued >= MAX_BOOKS:
+                break
+
+            url = f"{BASE_SEARCH_URL}?q={SEARCH_QUERY.replace(' ', '+')}&page={page}"
+
+            print(f"[INFO] Scrapeando página {page}: {url}")
+            resp = client.get(url, timeout=15)
+
+            page_books = parse_search_page(resp.text)
+            print(f"[INFO] Libros encontrados en esta página: {len(page_books)}")
+
+            items = []
+            for book in page_books:
+                if state["books_written"] + n_queued >= MAX_BOOKS:
+                    break
+
+                key = url_key(book["book_url"])
+                if key and (key in seen or key in queued):
+                    continue
+
+                # ISBN desde página de detalle
+                future = None
+                if book["book_url"]:
+                    queued.add(key)
+                    future = pool.submit(extract_isbn_from_book_page, book["book_url"], client)
 
-    print(f"\n[FIN] Scraping completado. Total libros obtenidos: {len(books)}")
+                items.append((book, future))
+                n_queued += 1
+
+            if previous:
+                flush_page(*previous)
+                n_queued -= len(previous[1])
+            previous = (page, items)
+
+        if previous:
+            flush_page(*previous)
+
+    client.close()
+
+    print(f"\n[FIN] Scraping completado. Total libros obtenidos: {state['books_written']}")
     print(f"[GUARDADO] Archivo: {OUTPUT_PATH}")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scraping de resultados de búsqueda de Goodreads")
+    parser.add_argument(
+        "--concurrency", type=int, default=MAX_CONCURRENCY, help="peticiones simultáneas al host"
+    )
+    parser.add_argument(
+        "--rps",
+        type=float,
+        default=REQUESTS_PER_SECOND,
+        help="límite global de peticiones por segundo (0 = sin límite)",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=["lxml", "bs4"],
+        default=PARSER_BACKEND,
+        help="backend de parseo HTML (lxml rápido; bs4 como respaldo)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continuar desde el último checkpoint en lugar de empezar de cero",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        help="añade al informe de ejecución un perfil de CPU (cprofile) o de memoria (tracemalloc)",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    scrape_goodreads()
+    args = parse_args()
+    PARSER_BACKEND = args.parser
+    with profiling(args.profile, "scrape"):
+        scrape_goodreads(
+            max_concurrency=args.concurrency,
+            requests_per_second=args.rps,
+            resume=args.resume,
+        )
+    write_run_report(
+        "scrape",
+        config={
+            "search_query": SEARCH_QUERY,
+            "pages": PAGES_TO_SCRAPE,
+            "concurrency": args.concurrency,
+            "rps": args.rps,
+            "parser": PARSER_BACKEND,
+            "resume": args.resume,
+        },
+    )
+    print(f"[OK] run_report.json → {RUN_REPORT_JSON}")
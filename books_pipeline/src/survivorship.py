@@ -0,0 +1,252 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from utils_isbn import validate_isbn, validate_isbn_array
+
+# -----------------------------------------------------------
+# REGLAS DE SUPERVIVENCIA (Bloque 3, paso 6)
+# -----------------------------------------------------------
+#
+# Para cada book_id_candidato:
+#   - título          → el de mayor longitud
+#   - autor principal → primer no nulo
+#   - autores/categ.  → unión de listas (orden de aparición)
+#   - precio/moneda   → último no nulo
+#   - idioma/fecha/editorial, isbn10/isbn13 → primer no nulo
+#   - fuente ganadora → primera fila del grupo
+#
+# `apply_survivorship` expresa las reglas como agregaciones agrupadas
+# sobre columnas; `apply_survivorship_loop` aplica las mismas reglas
+# (ISBN incluido: primer no nulo) grupo a grupo y sirve de referencia
+# para comprobar y medir la versión vectorizada.
+
+KEY_COL = "book_id_candidato"
+
+# Columnas que el bucle de referencia rellena con None explícito si no hay valor
+_NONE_FILLED = [
+    "title",
+    "price_amount",
+    "price_currency",
+    "language",
+    "fecha_publicacion",
+    "editorial",
+    "anio_publicacion",
+]
+
+
+def _utc_timestamp():
+    return datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _to_object(values, none_fill=False):
+    """Convierte a ndarray object; opcionalmente nulos → None."""
+    arr = pd.Series(values).to_numpy(dtype=object, copy=True)
+    if none_fill:
+        arr[pd.isna(arr)] = None
+    return arr
+
+
+def _list_pairs(lists, codes):
+    """(grupo, valor) de cada elemento de las listas, en orden de aparición."""
+    if isinstance(lists.dtype, pd.ArrowDtype) and pa.types.is_list(lists.dtype.pyarrow_dtype):
+        # list<string> de Arrow: se aplana sin crear una lista Python por fila
+        array = pa.array(lists)
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+        parents = pc.list_parent_indices(array).to_numpy()
+        values = pc.list_flatten(array).to_pandas()
+        return pd.DataFrame({"g": codes[parents], "v": values}).dropna()
+
+    exploded = pd.Series(lists.to_numpy(dtype=object), index=codes).explode().dropna()
+    return pd.DataFrame({"g": exploded.index.to_numpy(), "v": exploded.to_numpy()})
+
+
+def _union_lists(lists, codes, n_groups):
+    """Une las listas de cada grupo sin duplicados, en orden de aparición."""
+    pairs = _list_pairs(lists, codes)
+    pairs = pairs.drop_duplicates().sort_values("g", kind="stable")
+
+    out = np.empty(n_groups, dtype=object)
+    for i in range(n_groups):
+        out[i] = []
+
+    if len(pairs):
+        groups = pairs["g"].to_numpy()
+        values = pairs["v"].tolist()
+        bounds = np.flatnonzero(np.diff(groups)) + 1
+        starts = np.concatenate(([0], bounds)).tolist()
+        ends = np.concatenate((bounds, [len(values)])).tolist()
+        for g, start, end in zip(groups[starts].tolist(), starts, ends):
+            out[g] = values[start:end]
+
+    return out
+
+
+def apply_survivorship(
+    df_all: pd.DataFrame, key: str = KEY_COL, group_key: str | None = None
+) -> pd.DataFrame:
+    """
+    Deduplica df_all por `key` aplicando las reglas con agregaciones agrupadas.
+
+    Si se indica `group_key` (p. ej. un hash uint64 de `key`), se agrupa por
+    esa columna y el book_id se toma de `key` en la primera fila del grupo.
+    """
+    codes, uniques = pd.factorize(df_all[group_key or key], sort=True)
+    valid = codes >= 0
+    if not valid.all():
+        df_all = df_all[valid]
+        codes = codes[valid]
+
+    n_groups = len(uniques)
+    _, first_pos = np.unique(codes, return_index=True)
+    grouped = df_all.groupby(codes, sort=True)
+
+    # ► Primer / último no nulo
+    firsts = grouped[
+        ["author_principal", "language_normalized", "pub_date_normalized", "publisher"]
+    ].first()
+    lasts = grouped[["price_amount", "price_currency_normalized"]].last()
+
+    # ► Mejor título (el de mayor longitud; empate → el primero)
+    titles = df_all["title"]
+    has_title = titles.notna().to_numpy()
+    title_str = titles[has_title].astype(str)
+    lengths = pd.Series(title_str.str.len().to_numpy(), index=np.arange(len(title_str)))
+    longest = lengths.groupby(codes[has_title], sort=True).idxmax()
+    title = np.full(n_groups, None, dtype=object)
+    title[longest.index.to_numpy()] = title_str.to_numpy(dtype=object)[longest.to_numpy()]
+
+    # ► Fecha y año
+    fecha = _to_object(firsts["pub_date_normalized"], none_fill=True)
+    anio = np.full(n_groups, None, dtype=object)
+    has_fecha = np.fromiter((bool(f) for f in fecha), dtype=bool, count=n_groups)
+    if has_fecha.any():
+        anio[has_fecha] = (
+            pd.Series(fecha[has_fecha]).astype(str).str[:4].astype(int).to_numpy(dtype=object)
+        )
+
+    # ► Columnas heredadas de la primera fila del grupo
+    first_rows = df_all.iloc[first_pos]
+
+    columns = {
+        "title": title,
+        "author_principal": _to_object(firsts["author_principal"]),
+        "authors": _union_lists(df_all["authors_list"], codes, n_groups),
+        "categories": _union_lists(df_all["categories_list"], codes, n_groups),
+        "price_amount": _to_object(lasts["price_amount"]),
+        "price_currency": _to_object(lasts["price_currency_normalized"]),
+        "language": _to_object(firsts["language_normalized"]),
+        "fecha_publicacion": fecha,
+        "editorial": _to_object(firsts["publisher"]),
+        "anio_publicacion": anio,
+    }
+    isbn_cols = [col for col in ("isbn10", "isbn13") if col in df_all.columns]
+    if isbn_cols:
+        isbns = grouped[isbn_cols].first()
+        for col in isbn_cols:
+            columns[col] = _to_object(isbns[col])
+
+    isbn13 = columns.get("isbn13", np.full(n_groups, None, dtype=object))
+    columns["isbn13_valido"] = validate_isbn_array(isbn13).astype(object)
+    columns["fuente_ganadora"] = _to_object(first_rows["source"])
+    columns["ts_ultima_actualizacion"] = np.full(n_groups, _utc_timestamp(), dtype=object)
+    if group_key is None:
+        columns["book_id"] = np.asarray(uniques, dtype=object)
+    else:
+        columns["book_id"] = _to_object(first_rows[key])
+
+    for col in _NONE_FILLED:
+        columns[col][pd.isna(columns[col])] = None
+
+    df_dim = pd.DataFrame(columns, index=first_rows.index)
+    return df_dim.infer_objects()
+
+
+def apply_survivorship_loop(df_all: pd.DataFrame, key: str = KEY_COL) -> pd.DataFrame:
+    """
+    Implementación de referencia grupo a grupo de las reglas actuales (ISBN
+    incluido: primer valor no nulo), para comprobar y medir la vectorizada.
+    """
+    dim_rows = []
+
+    grouped = df_all.groupby(key)
+
+    for book_id, group in grouped:
+        winner = group.iloc[0].copy()
+
+        # ► Mejor título (el de mayor longitud)
+        titles = group["title"].dropna().astype(str).reset_index(drop=True)
+        if len(titles) > 0:
+            title_lengths = titles.str.len()
+            longest_idx = title_lengths.idxmax()
+            winner["title"] = titles.loc[longest_idx]
+        else:
+            winner["title"] = None
+
+        # ► Autor principal (primer no nulo)
+        authors_p = group["author_principal"].dropna()
+        if len(authors_p):
+            winner["author_principal"] = authors_p.iloc[0]
+
+        # ► Unir autores
+        all_authors = []
+        for a in group["authors_list"]:
+            all_authors.extend(a)
+        winner["authors"] = list(dict.fromkeys(all_authors))
+
+        # ► Unir categorías
+        all_cat = []
+        for c in group["categories_list"]:
+            all_cat.extend(c)
+        winner["categories"] = list(dict.fromkeys(all_cat))
+
+        # ► Precio
+        prices = group["price_amount"].dropna()
+        winner["price_amount"] = prices.iloc[-1] if len(prices) else None
+
+        currencies = group["price_currency_normalized"].dropna()
+        winner["price_currency"] = currencies.iloc[-1] if len(currencies) else None
+
+        # ► Idioma
+        langs = group["language_normalized"].dropna()
+        winner["language"] = langs.iloc[0] if len(langs) else None
+
+        # ► Fecha publicación
+        dates = group["pub_date_normalized"].dropna()
+        winner["fecha_publicacion"] = dates.iloc[0] if len(dates) else None
+
+        # ► Editorial
+        pubs = group["publisher"].dropna()
+        winner["editorial"] = pubs.iloc[0] if len(pubs) else None
+
+        # ► Año
+        if winner["fecha_publicacion"]:
+            winner["anio_publicacion"] = int(str(winner["fecha_publicacion"])[:4])
+        else:
+            winner["anio_publicacion"] = None
+
+        # ► ISBN (primer no nulo)
+        for col in ("isbn10", "isbn13"):
+            if col in group.columns:
+                isbns = group[col].dropna()
+                winner[col] = isbns.iloc[0] if len(isbns) else winner[col]
+
+        # ► Validación ISBN
+        winner["isbn13_valido"] = validate_isbn(winner.get("isbn13"))
+
+        # ► Fuente ganadora
+        winner["fuente_ganadora"] = group["source"].iloc[0]
+
+        # ► Timestamp
+        winner["ts_ultima_actualizacion"] = _utc_timestamp()
+
+        # ► ID final
+        winner["book_id"] = book_id
+
+        dim_rows.append(winner)
+
+    return pd.DataFrame(dim_rows)
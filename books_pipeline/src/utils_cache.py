@@ -0,0 +1,139 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class ResponseCache:
+    """
+    Caché persistente (SQLite) de respuestas JSON indexadas por query.
+
+    - TTL distinto para respuestas con resultado y para "sin resultados"
+      (caché negativa, valor None).
+    - Como máximo `max_entries` entradas; al superarlo se expulsan las
+      menos usadas recientemente (LRU por `accessed_at`).
+    - Contadores de aciertos/fallos accesibles con `stats()`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl_seconds: float,
+        negative_ttl_seconds: float,
+        max_entries: int,
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> tuple[bool, dict | None]:
+        """Devuelve (encontrado, valor); las entradas caducadas cuentan como fallo."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return False, None
+
+            value, created_at = row
+            ttl = self.ttl_seconds if value is not None else self.negative_ttl_seconds
+            if now - created_at > ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self._size -= 1
+                self.expired += 1
+                self.misses += 1
+                return False, None
+
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+
+            if value is None:
+                self.negative_hits += 1
+                return True, None
+            self.hits += 1
+            return True, json.loads(value)
+
+    def set(self, key: str, value: dict | None) -> None:
+        """Guarda una respuesta (None = sin resultados) y aplica la expulsión LRU."""
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False) if value is not None else None
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            if not exists:
+                self._size += 1
+            self.stores += 1
+
+            overflow = self._size - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self._size -= overflow
+                self.evictions += overflow
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": self._size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,218 @@
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class TokenBucket:
+    """Limitador token-bucket thread-safe: `rate` peticiones/s con ráfagas de `capacity`."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Bloquea hasta disponer de un token (rate <= 0 → sin límite)."""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def make_session(pool_size: int = 10, headers: dict | None = None) -> requests.Session:
+    """Session con conexiones keep-alive reutilizables para `pool_size` hilos."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def bounded_map(pool, fn, iterable, window):
+    """
+    Como `pool.map`, pero consume `iterable` de forma perezosa con como mucho
+    `window` tareas en vuelo. Los resultados salen en el orden de entrada.
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def shared_map(pool, fn, iterable, key, window):
+    """
+    Como `bounded_map`, pero los elementos con la misma clave `key(item)`
+    comparten una única tarea `fn(clave)`: la primera aparición la lanza y
+    las siguientes reutilizan su resultado. Devuelve (item, resultado) en el
+    orden de entrada; `window` limita las tareas distintas en vuelo. Los
+    resultados se conservan hasta el final (memoria ∝ nº de claves distintas).
+    """
+    tasks = {}
+    pending = deque()
+    own = 0  # tareas lanzadas por elementos aún en `pending`
+    for item in iterable:
+        k = key(item)
+        future = tasks.get(k)
+        first = future is None
+        if first:
+            future = tasks[k] = pool.submit(fn, k)
+        pending.append((item, future, first))
+        own += first
+        while own >= window:
+            item, future, first = pending.popleft()
+            own -= first
+            yield item, future.result()
+    while pending:
+        item, future, _ = pending.popleft()
+        yield item, future.result()
+
+
+# -----------------------------------------------------------
+# REINTENTOS: CLASIFICACIÓN, BACKOFF Y CORTACIRCUITOS
+# -----------------------------------------------------------
+#
+# Se reintentan los errores transitorios (red, timeout, 408/429/5xx y el
+# 403 por cuota de las APIs de Google); el resto de 4xx y los errores de
+# programación fallan a la primera. La espera entre intentos es exponencial
+# con jitter completo, o la que pida el servidor con `Retry-After`. Si se
+# acumulan 429/5xx seguidos, el cortacircuitos pausa a todos los hilos.
+
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+OVERLOAD_STATUS = frozenset({429, 500, 502, 503, 504})
+QUOTA_REASONS = ("rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded")
+
+
+def classify_error(error: Exception) -> tuple[str, bool]:
+    """(tipo de error para los contadores, ¿reintentable?)."""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        if status == 403 and any(r in error.response.text for r in QUOTA_REASONS):
+            return "http_403_cuota", True
+        return f"http_{status}", status in RETRYABLE_STATUS
+    if isinstance(error, requests.Timeout):
+        return "timeout", True
+    if isinstance(error, requests.ConnectionError):
+        return "conexion", True
+    if isinstance(error, ValueError):  # JSON truncado o inválido
+        return "respuesta_invalida", True
+    return type(error).__name__, False
+
+
+def is_overload(error: Exception) -> bool:
+    """429/5xx (o 403 por cuota): el servidor pide que se baje el ritmo."""
+    kind, _ = classify_error(error)
+    return kind == "http_403_cuota" or (
+        isinstance(error, requests.HTTPError)
+        and error.response is not None
+        and error.response.status_code in OVERLOAD_STATUS
+    )
+
+
+def retry_after_seconds(response) -> float | None:
+    """Segundos de la cabecera `Retry-After` (número o fecha HTTP); None si no hay."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Hasta `max_attempts` intentos con backoff exponencial y jitter completo."""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        max_retry_after: float = 300.0,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float:
+        """
+        Espera antes del intento `attempt + 1` (attempt = 0 tras el primer
+        fallo): uniforme en [0, min(max_delay, base · 2^attempt)], o el
+        `Retry-After` del servidor (acotado) más un pequeño jitter.
+        """
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+class CircuitBreaker:
+    """
+    Cortacircuitos compartido por todos los hilos: tras `threshold` errores de
+    sobrecarga seguidos se abre durante `cooldown` s (o el `Retry-After`, si es
+    mayor) y todas las peticiones esperan. Si al reabrir sigue fallando, la
+    pausa se duplica hasta `max_cooldown`; un éxito la devuelve a `cooldown`.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 15.0, max_cooldown: float = 300.0):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> float:
+        """Bloquea mientras el circuito esté abierto; devuelve los segundos esperados."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                remaining = self.open_until - time.monotonic()
+            if remaining <= 0:
+                return waited
+            time.sleep(remaining)
+            waited += remaining
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+
+    def record_failure(self, retry_after: float | None = None) -> bool:
+        """Anota un error de sobrecarga; True si con él se abre el circuito."""
+        with self._lock:
+            self.failures += 1
+            if self.failures < self.threshold:
+                return False
+            pause = max(self.cooldown, min(retry_after or 0.0, self.max_cooldown))
+            self.open_until = max(self.open_until, time.monotonic() + pause)
+            self.cooldown = min(2 * self.cooldown, self.max_cooldown)
+            self.failures = 0
+            self.trips += 1
+            return True
@@ -0,0 +1,50 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+# -----------------------------------------------------------
+# DATAFRAMES EN ARROW IPC MAPEADOS EN MEMORIA
+# -----------------------------------------------------------
+#
+# `write_ipc` guarda un DataFrame como fichero Arrow IPC (Feather v2) sin
+# comprimir, con metadatos propios en el esquema. `read_ipc` lo abre con
+# `pa.memory_map`: los buffers Arrow apuntan al fichero mapeado, así que
+# las columnas de texto (str/string de pyarrow), las listas (ArrowDtype) y
+# los numéricos sin nulos pasan a pandas sin copiarse y solo se leen de
+# disco las páginas que se tocan. Los tipos pandas se recuperan de los
+# metadatos que añade `pa.Table.from_pandas`.
+
+
+def _list_dtype(arrow_type: pa.DataType):
+    """Las listas vuelven como ArrowDtype (sin convertir a listas Python)."""
+    return pd.ArrowDtype(arrow_type) if pa.types.is_list(arrow_type) else None
+
+
+def write_ipc(df: pd.DataFrame, path: Path, metadata: dict | None = None) -> None:
+    """Escribe `df` (sin índice) en un temporal junto a `path` y lo sustituye con os.replace."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if metadata:
+        extra = {key.encode(): value.encode() for key, value in metadata.items()}
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **extra})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def ipc_metadata(path: Path) -> dict:
+    """Metadatos propios del esquema (sin leer los datos); {} si no existe el fichero."""
+    if not Path(path).exists():
+        return {}
+    with pa.memory_map(str(path)) as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+    return {k.decode(): v.decode() for k, v in metadata.items() if k != b"pandas"}
+
+
+def read_ipc(path: Path) -> pd.DataFrame:
+    """DataFrame respaldado por el fichero mapeado en memoria."""
+    table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    return table.to_pandas(split_blocks=True, types_mapper=_list_dtype)
@@ -1,5 +1,8 @@
 import re
 
+import numpy as np
+import pandas as pd
+
 def clean_isbn(isbn: str | None) -> str | None:
     """Elimina guiones, espacios y caracteres no válidos."""
     if not isbn or not isinstance(isbn, str):
@@ -50,3 +53,113 @@ def is_valid_isbn13(isbn: str | None) -> bool:
 def validate_isbn(isbn: str | None) -> bool:
     """Valida un ISBN combinando ISBN-10 e ISBN-13."""
     return is_valid_isbn10(isbn) or is_valid_isbn13(isbn)
+
+
+def isbn10_to_isbn13(isbn: str | None) -> str | None:
+    """Convierte un ISBN-10 válido a ISBN-13 (prefijo 978); None si no es válido."""
+    if not is_valid_isbn10(isbn):
+        return None
+    core = "978" + clean_isbn(isbn)[:9]
+    total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(core))
+    return core + str((10 - total % 10) % 10)
+
+
+# -----------------------------------------------------------
+# VERSIONES VECTORIZADAS (columnas completas)
+# -----------------------------------------------------------
+
+_ISBN13_WEIGHTS = np.tile([1, 3], 7)[:13]
+_ISBN10_WEIGHTS = np.arange(1, 11)
+
+
+def clean_isbn_array(values) -> np.ndarray:
+    """`clean_isbn` sobre una columna: ndarray object con str limpio o None."""
+    series = pd.Series(values, copy=False)
+    out = np.full(len(series), None, dtype=object)
+
+    if pd.api.types.is_string_dtype(series.dtype) and series.dtype != object:
+        is_str = series.notna().to_numpy()
+    else:
+        is_str = np.fromiter(
+            (isinstance(v, str) for v in series.to_numpy(dtype=object)),
+            dtype=bool,
+            count=len(series),
+        )
+    if not is_str.any():
+        return out
+
+    cleaned = (
+        series[is_str]
+        .astype("str")
+        .str.replace(r"[^0-9Xx]", "", regex=True)
+        .to_numpy(dtype=object)
+    )
+    out[is_str] = cleaned
+    # clean_isbn devuelve None para cadenas vacías
+    out[is_str & (series.astype(object).eq("").to_numpy())] = None
+    return out
+
+
+def _lengths(cleaned: np.ndarray) -> np.ndarray:
+    return pd.Series(cleaned, dtype=object).str.len().fillna(0).to_numpy(dtype=np.int64)
+
+
+def _char_matrix(strings: np.ndarray, width: int) -> np.ndarray:
+    """Cadenas ASCII de longitud fija → matriz (n, width) de códigos de carácter."""
+    buf = "".join(strings).encode("ascii")
+    return np.frombuffer(buf, dtype=np.uint8).reshape(-1, width).astype(np.int64)
+
+
+def _valid_isbn10_matrix(chars: np.ndarray) -> np.ndarray:
+    body, check = chars[:, :9], chars[:, 9]
+    body_ok = ((body >= 48) & (body <= 57)).all(axis=1)
+    is_x = (check == ord("X")) | (check == ord("x"))
+    check_ok = is_x | ((check >= 48) & (check <= 57))
+    digits = np.column_stack([body - 48, np.where(is_x, 10, check - 48)])
+    return body_ok & check_ok & (digits @ _ISBN10_WEIGHTS % 11 == 0)
+
+
+def _valid_isbn13_matrix(chars: np.ndarray) -> np.ndarray:
+    all_digits = ((chars >= 48) & (chars <= 57)).all(axis=1)
+    return all_digits & ((chars - 48) @ _ISBN13_WEIGHTS % 10 == 0)
+
+
+def validate_isbn_array(values) -> np.ndarray:
+    """`validate_isbn` sobre una columna completa (ndarray bool)."""
+    cleaned = clean_isbn_array(values)
+    lengths = _lengths(cleaned)
+    valid = np.zeros(len(cleaned), dtype=bool)
+
+    idx10 = np.flatnonzero(lengths == 10)
+    if len(idx10):
+        valid[idx10] = _valid_isbn10_matrix(_char_matrix(cleaned[idx10], 10))
+
+    idx13 = np.flatnonzero(lengths == 13)
+    if len(idx13):
+        valid[idx13] = _valid_isbn13_matrix(_char_matrix(cleaned[idx13], 13))
+
+    return valid
+
+
+def isbn10_to_isbn13_array(values) -> np.ndarray:
+    """`isbn10_to_isbn13` sobre una columna: ndarray object con ISBN-13 o None."""
+    cleaned = clean_isbn_array(values)
+    out = np.full(len(cleaned), None, dtype=object)
+
+    idx10 = np.flatnonzero(_lengths(cleaned) == 10)
+    if not len(idx10):
+        return out
+
+    chars = _char_matrix(cleaned[idx10], 10)
+    ok = _valid_isbn10_matrix(chars)
+    idx10, chars = idx10[ok], chars[ok]
+    if not len(idx10):
+        return out
+
+    core = np.column_stack(
+        [np.tile([9, 7, 8], (len(chars), 1)), chars[:, :9] - 48]
+    )
+    check = (10 - core @ _ISBN13_WEIGHTS[:12] % 10) % 10
+    digits = (np.column_stack([core, check]) + 48).astype(np.uint8)
+    out[idx10] = np.char.decode(digits.view("S13").ravel(), "ascii").astype(object)
+    return out
@@ -0,0 +1,130 @@
+import json
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.json as pa_json
+import pyarrow.parquet as pq
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+GOODREADS_JSONL = BASE_DIR / "landing" / "goodreads_books.jsonl"
+GOODREADS_JSON = BASE_DIR / "landing" / "goodreads_books.json"
+GOOGLEBOOKS_CSV = BASE_DIR / "landing" / "googlebooks_books.csv"
+GOOGLEBOOKS_PARQUET = BASE_DIR / "landing" / "googlebooks_books.parquet"
+
+# Tamaño de bloque (bytes) de los lectores Arrow en streaming
+ARROW_BLOCK_SIZE = 16 << 20
+
+# Esquemas explícitos del landing: los ISBN son texto (sin pasar por float)
+GOODREADS_SCHEMA = pa.schema(
+    [
+        ("title", pa.string()),
+        ("author", pa.string()),
+        ("rating", pa.float64()),
+        ("ratings_count", pa.int64()),
+        ("book_url", pa.string()),
+        ("isbn10", pa.string()),
+        ("isbn13", pa.string()),
+    ]
+)
+
+GOOGLEBOOKS_SCHEMA = pa.schema(
+    [
+        ("gb_id", pa.string()),
+        ("title", pa.string()),
+        ("subtitle", pa.string()),
+        ("authors", pa.string()),
+        ("publisher", pa.string()),
+        ("pub_date", pa.string()),
+        ("language", pa.string()),
+        ("categories", pa.string()),
+        ("isbn13", pa.string()),
+        ("isbn10", pa.string()),
+        ("price_amount", pa.float64()),
+        ("price_currency", pa.string()),
+    ]
+)
+
+# Landing columnar de Google Books: autores y categorías como listas nativas
+# (sin unir con " | " ni volver a partir) y precio float64. La fecha se
+# queda como texto: la API devuelve fechas parciales ("2004", "2004-05").
+GOOGLEBOOKS_PARQUET_SCHEMA = pa.schema(
+    [
+        pa.field(
+            name,
+            pa.list_(pa.string()) if name in ("authors", "categories") else field.type,
+        )
+        for name, field in zip(GOOGLEBOOKS_SCHEMA.names, GOOGLEBOOKS_SCHEMA)
+    ]
+)
+
+
+def goodreads_landing_path() -> Path:
+    """Fichero de landing de Goodreads: el JSON Lines en streaming si existe, si no el JSON clásico."""
+    return GOODREADS_JSONL if GOODREADS_JSONL.exists() else GOODREADS_JSON
+
+
+def googlebooks_landing_path() -> Path:
+    """Fichero de landing de Google Books: el más reciente entre el Parquet y el CSV."""
+    existing = [path for path in (GOOGLEBOOKS_PARQUET, GOOGLEBOOKS_CSV) if path.exists()]
+    if not existing:
+        return GOOGLEBOOKS_CSV
+    return max(existing, key=lambda path: path.stat().st_mtime_ns)
+
+
+def iter_json_records(path: Path):
+    """Itera los registros de un JSON Lines (línea a línea) o de un array JSON."""
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix == ".jsonl":
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def iter_goodreads_batches(path: Path, block_size: int = ARROW_BLOCK_SIZE):
+    """
+    RecordBatches de Goodreads con `GOODREADS_SCHEMA`. El JSON Lines se lee
+    en streaming; el array JSON clásico no lo permite y se carga entero.
+    """
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        yield from pa_json.open_json(
+            path,
+            read_options=pa_json.ReadOptions(block_size=block_size),
+            parse_options=pa_json.ParseOptions(
+                explicit_schema=GOODREADS_SCHEMA, unexpected_field_behavior="ignore"
+            ),
+        )
+    else:
+        table = pa.Table.from_pylist(list(iter_json_records(path)), schema=GOODREADS_SCHEMA)
+        yield from table.to_batches()
+
+
+def iter_googlebooks_batches(path: Path, block_size: int = ARROW_BLOCK_SIZE):
+    """
+    RecordBatches del landing de Google Books, en streaming. El CSV (`;`) se
+    lee con `GOOGLEBOOKS_SCHEMA`; el Parquet, con su propio esquema
+    (`GOOGLEBOOKS_PARQUET_SCHEMA`), por grupos de filas y con el fichero
+    mapeado en memoria.
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        parquet = pq.ParquetFile(path, memory_map=True)
+        yield from parquet.iter_batches(columns=GOOGLEBOOKS_PARQUET_SCHEMA.names)
+        return
+    yield from pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        parse_options=pa_csv.ParseOptions(delimiter=";"),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=GOOGLEBOOKS_SCHEMA,
+            include_columns=GOOGLEBOOKS_SCHEMA.names,
+            include_missing_columns=True,
+            strings_can_be_null=True,
+        ),
+    )
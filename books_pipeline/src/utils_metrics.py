@@ -0,0 +1,293 @@
+import cProfile
+import json
+import os
+import pstats
+import resource
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+
+# -----------------------------------------------------------
+# INSTRUMENTACIÓN: PASOS, CONTADORES E HISTOGRAMAS
+# -----------------------------------------------------------
+#
+# Cada proceso tiene un registro (`METRICS`) donde el código anota:
+#   - pasos con nombre (`with step("6 supervivencia"):` o `@timed(...)`):
+#     nº de llamadas, segundos totales y máximo;
+#   - contadores (`count("googlebooks.reintentos")`);
+#   - histogramas de latencia en ms (`observe("goodreads.peticion_ms", ms)`),
+#     con cubos fijos y percentiles aproximados por cubo.
+# Al terminar, `write_run_report(etapa)` guarda el informe de la etapa en
+# docs/run_report.json (una clave por etapa, junto a quality_metrics.json).
+# `profiling("cprofile" | "tracemalloc", etapa)` añade al informe las
+# funciones más costosas o las líneas que más memoria reservan.
+#
+# El registro es thread-safe: el scraping y el enriquecimiento anotan desde
+# varios hilos.
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RUN_REPORT_JSON = BASE_DIR / "docs" / "run_report.json"
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PROFILE_TOP = 25
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+
+def _round(value, digits=3):
+    return None if value is None else round(value, digits)
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds")
+
+
+class Histogram:
+    """Histograma de cubos fijos (límite superior inclusivo; el último es +inf)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float) -> None:
+        i = next((k for k, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[i] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float):
+        """Límite superior del cubo que contiene el cuantil q (el máximo si es el último)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "n": self.count,
+            "media": _round(self.total / self.count if self.count else None),
+            "min": _round(self.min),
+            "max": _round(self.max),
+            "p50": _round(self.quantile(0.5)),
+            "p90": _round(self.quantile(0.9)),
+            "p99": _round(self.quantile(0.99)),
+            "cubos": {
+                **{f"<={b}": n for b, n in zip(self.buckets, self.counts)},
+                f">{self.buckets[-1]}": self.counts[-1],
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Histogram":
+        hist = cls(int(k[2:]) for k in data["cubos"] if k.startswith("<="))
+        hist.counts = list(data["cubos"].values())
+        hist.count = data["n"]
+        hist.total = (data["media"] or 0) * data["n"]
+        hist.min, hist.max = data["min"], data["max"]
+        return hist
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        values = [v for v in (self.min, other.min) if v is not None]
+        self.min = min(values) if values else None
+        values = [v for v in (self.max, other.max) if v is not None]
+        self.max = max(values) if values else None
+
+
+class Metrics:
+    """Registro de pasos, contadores e histogramas de un proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started = time.time()
+            self.steps = {}
+            self.counters = {}
+            self.histograms = {}
+            self.extra = {}
+
+    # ► Anotación
+
+    def add_step(self, name: str, seconds: float, calls: int = 1, max_seconds=None) -> None:
+        with self._lock:
+            entry = self.steps.setdefault(
+                name, {"llamadas": 0, "segundos": 0.0, "max_segundos": 0.0}
+            )
+            entry["llamadas"] += calls
+            entry["segundos"] += seconds
+            entry["max_segundos"] = max(entry["max_segundos"], max_seconds or seconds)
+
+    @contextmanager
+    def step(self, name: str):
+        self.add_step(name, 0.0, calls=0)  # el informe sigue el orden de entrada
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_step(name, time.perf_counter() - start)
+
+    def timed(self, name: str):
+        """Decorador: cada llamada a la función cuenta como un paso `name`."""
+
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.step(name):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name: str, value: float, buckets=LATENCY_BUCKETS_MS) -> None:
+        with self._lock:
+            self.histograms.setdefault(name, Histogram(buckets)).observe(value)
+
+    # ► Combinación (p. ej. métricas de los procesos de un pool)
+
+    def snapshot(self) -> dict:
+        """Copia serializable (JSON / pickle) del registro."""
+        with self._lock:
+            return {
+                "pasos": {name: dict(entry) for name, entry in self.steps.items()},
+                "contadores": dict(self.counters),
+                "histogramas": {name: h.to_dict() for name, h in self.histograms.items()},
+            }
+
+    def merge(self, snapshot: dict, prefix: str = "") -> None:
+        for name, entry in snapshot["pasos"].items():
+            self.add_step(
+                prefix + name, entry["segundos"], entry["llamadas"], entry["max_segundos"]
+            )
+        for name, n in snapshot["contadores"].items():
+            self.count(prefix + name, n)
+        with self._lock:
+            for name, data in snapshot["histogramas"].items():
+                incoming = Histogram.from_dict(data)
+                if prefix + name in self.histograms:
+                    self.histograms[prefix + name].merge(incoming)
+                else:
+                    self.histograms[prefix + name] = incoming
+
+    # ► Informe
+
+    def report(self) -> dict:
+        finished = time.time()
+        snapshot = self.snapshot()
+        for entry in snapshot["pasos"].values():
+            entry["segundos"] = round(entry["segundos"], 4)
+            entry["max_segundos"] = round(entry["max_segundos"], 4)
+        return {
+            "inicio": _iso(self.started),
+            "fin": _iso(finished),
+            "segundos": round(finished - self.started, 3),
+            # ru_maxrss está en KiB en Linux
+            "rss_max_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            **snapshot,
+            **self.extra,
+        }
+
+
+METRICS = Metrics()
+step = METRICS.step
+timed = METRICS.timed
+count = METRICS.count
+observe = METRICS.observe
+
+
+def write_run_report(stage: str, path: Path = RUN_REPORT_JSON, **fields) -> dict:
+    """Guarda el informe del proceso bajo la clave `stage` de `path` (conserva las demás)."""
+    report = {**METRICS.report(), **fields}
+    reports = {}
+    if path.exists():
+        try:
+            reports = json.loads(path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            reports = {}
+    reports[stage] = report
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(reports, indent=4, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+    return report
+
+
+@contextmanager
+def profiling(mode, stage: str, path: Path = RUN_REPORT_JSON):
+    """
+    Perfilado opcional del bloque: "cprofile" (funciones más costosas; el
+    volcado completo queda en run_profile_<etapa>.prof) o "tracemalloc"
+    (líneas que más memoria reservan y pico). None → sin perfilado.
+    """
+    if mode is None:
+        yield
+        return
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Perfilado desconocido: {mode}")
+
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            dump = path.with_name(f"run_profile_{stage}.prof")
+            profiler.dump_stats(dump)
+            stats = pstats.Stats(profiler).sort_stats("cumulative")
+            rows = []
+            for func in stats.fcn_list[:PROFILE_TOP]:
+                calls, _, own, cumulative, _ = stats.stats[func]
+                rows.append(
+                    {
+                        "funcion": pstats.func_std_string(func),
+                        "llamadas": calls,
+                        "segundos_propios": round(own, 4),
+                        "segundos_acumulados": round(cumulative, 4),
+                    }
+                )
+            METRICS.extra["perfil_cpu"] = {"fichero": dump.name, "funciones": rows}
+        return
+
+    tracemalloc.start(10)
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        METRICS.extra["perfil_memoria"] = {
+            "pico_mib": round(peak / 2**20, 1),
+            "lineas": [
+                {
+                    "linea": str(stat.traceback[0]),
+                    "mib": round(stat.size / 2**20, 2),
+                    "bloques": stat.count,
+                }
+                for stat in snapshot.statistics("lineno")[:PROFILE_TOP]
+            ],
+        }
@@ -0,0 +1,144 @@
+import inspect
+import json
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# -----------------------------------------------------------
+# ESCRITURA DE PARQUET TIPADO
+# -----------------------------------------------------------
+#
+# `write_parquet` convierte un DataFrame a Arrow con tipos explícitos
+# (fechas → date32, timestamps ISO → timestamp UTC, listas → list<string>),
+# lo ordena, y lo escribe con grupos de filas acotados, codificación
+# diccionario por columna, estadísticas, bloom filters opcionales y, si
+# se piden columnas de partición, como dataset Hive (`col=valor/`).
+
+LIST_OF_STRINGS = pa.list_(pa.string())
+UTC_TIMESTAMP = pa.timestamp("ms", tz="UTC")
+
+# Las versiones de pyarrow sin escritura de bloom filters no aceptan la opción
+BLOOM_FILTERS_SUPPORTED = (
+    "bloom_filter_options" in inspect.signature(pq.ParquetWriter.__init__).parameters
+)
+
+
+def _coerce_temporal(values: pd.Series, arrow_type: pa.DataType) -> pd.Series:
+    """Texto ISO (o fechas ya tipadas) → datetime64 de pandas; lo no parseable → NaT."""
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values
+    utc = pa.types.is_timestamp(arrow_type) and arrow_type.tz is not None
+    return pd.to_datetime(values, format="ISO8601", errors="coerce", utc=utc)
+
+
+def _nested_arrow_columns_as_object(table: pa.Table) -> pa.Table:
+    """
+    En los metadatos pandas, las columnas ArrowDtype anidadas (p. ej.
+    `list<item: string>[pyarrow]`) quedan con un dtype que `pd.read_parquet`
+    no sabe reconstruir: se declaran como object, como las listas Python.
+    """
+    meta = json.loads(table.schema.metadata[b"pandas"])
+    for col in meta["columns"]:
+        numpy_type = str(col["numpy_type"])
+        if numpy_type.endswith("[pyarrow]") and "<" in numpy_type:
+            col["numpy_type"] = "object"
+    return table.replace_schema_metadata(
+        {**table.schema.metadata, b"pandas": json.dumps(meta).encode()}
+    )
+
+
+def to_arrow(df: pd.DataFrame, types: dict | None = None) -> pa.Table:
+    """Tabla Arrow sin índice; las columnas de `types` se convierten a ese tipo."""
+    types = {col: t for col, t in (types or {}).items() if col in df.columns}
+
+    temporal = {
+        col: _coerce_temporal(df[col], t)
+        for col, t in types.items()
+        if pa.types.is_date(t) or pa.types.is_timestamp(t)
+    }
+    if temporal:
+        df = df.assign(**temporal)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if any(isinstance(dtype, pd.ArrowDtype) for dtype in df.dtypes):
+        table = _nested_arrow_columns_as_object(table)
+    for col, arrow_type in types.items():
+        i = table.schema.get_field_index(col)
+        if table.schema.field(i).type != arrow_type:
+            table = table.set_column(i, pa.field(col, arrow_type), table[col].cast(arrow_type))
+    return table
+
+
+def write_parquet(
+    df: pd.DataFrame,
+    path: Path,
+    *,
+    types: dict | None = None,
+    sort_by: list[str] | None = None,
+    row_group_size: int | None = None,
+    dictionary_columns: list[str] | None = None,
+    bloom_filter_columns: list[str] | None = None,
+    partition_cols: list[str] | None = None,
+    basename_template: str = "part-{i}.parquet",
+    metadata: dict | None = None,
+    profile=None,
+) -> None:
+    """
+    Escribe `df` en `path`: un fichero, o un dataset Hive bajo el directorio
+    `path` si hay `partition_cols` (los ficheros se nombran con
+    `basename_template`). Si se pasa un `QualityProfile`, se evalúa sobre
+    la tabla Arrow antes de escribirla.
+    """
+    table = to_arrow(df, types)
+    if profile is not None:
+        profile.update(table)
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+
+    sorting_columns = None
+    if sort_by:
+        table = table.sort_by([(col, "ascending") for col in sort_by])
+        # En un dataset Hive las columnas de partición no se guardan en los ficheros
+        file_schema = pa.schema([f for f in table.schema if f.name not in (partition_cols or [])])
+        sorting_columns = pq.SortingColumn.from_ordering(
+            file_schema, [(col, "ascending") for col in sort_by]
+        )
+
+    options = {
+        "use_dictionary": [c for c in dictionary_columns or [] if c in table.column_names]
+        if dictionary_columns is not None
+        else True,
+        "write_statistics": True,
+        "sorting_columns": sorting_columns,
+    }
+    bloom = {
+        col: {"ndv": max(len(table), 1), "fpp": 0.05}
+        for col in bloom_filter_columns or []
+        if col in table.column_names
+    }
+    if bloom and not BLOOM_FILTERS_SUPPORTED:
+        print(
+            f"[WARN] pyarrow {pa.__version__} no escribe bloom filters: "
+            f"{Path(path).name} se escribe sin ellos ({', '.join(bloom)})"
+        )
+    elif bloom:
+        options["bloom_filter_options"] = bloom
+
+    if partition_cols:
+        ds.write_dataset(
+            table,
+            path,
+            format="parquet",
+            partitioning=partition_cols,
+            partitioning_flavor="hive",
+            basename_template=basename_template,
+            file_options=ds.ParquetFileFormat().make_write_options(**options),
+            max_rows_per_group=row_group_size or 1024 * 1024,
+            min_rows_per_group=min(row_group_size or 0, len(table)),
+            existing_data_behavior="overwrite_or_ignore",
+        )
+    else:
+        pq.write_table(table, path, row_group_size=row_group_size, **options)
@@ -1,4 +1,13 @@
+from collections import Counter
+from datetime import date, datetime
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from utils_isbn import validate_isbn_array
+
 
 def metric_null_percentage(df: pd.DataFrame, col: str) -> float:
     """Porcentaje de valores nulos en una columna."""
@@ -39,3 +48,534 @@ def check_numeric_range(df: pd.DataFrame, col: str, min_val=None, max_val=None)
 def check_required_columns(df: pd.DataFrame, required_cols: list[str]) -> dict:
     """Indica si cada columna requerida existe en el DataFrame."""
     return {col: (col in df.columns) for col in required_cols}
+
+
+# -----------------------------------------------------------
+# SKETCHES (memoria acotada, combinables entre batches y shards)
+# -----------------------------------------------------------
+#
+# Para tablas grandes, los conjuntos exactos de `nunique` / `duplicated`
+# crecen con los datos. Estos resúmenes ocupan un tamaño fijo, se
+# alimentan con hashes de 64 bits (`hash_values`) y se combinan con `merge`:
+#
+#   HyperLogLog    nº de distintos; error relativo típico 1.04/√(2^p)
+#                  (p = 14 → 16 KiB, ±0.8 %; ±2.4 % con un 99 % de confianza)
+#   CountMinSketch frecuencia por clave; nunca subestima y, con probabilidad
+#                  1 − δ, sobreestima como mucho ε·N (N = nº de valores)
+#   TDigest        cuantiles; error de rango típico < 1 % con compresión 100,
+#                  menor en las colas (p1, p99); sin garantía estricta
+
+HLL_PRECISION = 14
+CMS_EPSILON = 0.001
+CMS_DELTA = 0.01
+TDIGEST_COMPRESSION = 100
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75, 0.95, 0.99)
+
+# Por debajo de este nº de distintos los checks aproximados son exactos
+EXACT_DISTINCT_LIMIT = 100_000
+
+
+def hash_values(values) -> np.ndarray:
+    """Hash uint64 de cada valor no nulo (array Arrow o Series de pandas)."""
+    if isinstance(values, (pa.Array, pa.ChunkedArray)):
+        values = values.drop_null().to_numpy(zero_copy_only=False)
+    else:
+        values = pd.Series(values).dropna().to_numpy()
+    # categorize=False: mismo hash, sin factorizar antes (mucho más rápido en texto)
+    return pd.util.hash_array(values, categorize=False)
+
+
+def _leading_zeros(words: np.ndarray) -> np.ndarray:
+    """Ceros a la izquierda de cada uint64 no nulo (log2 exacto en dos mitades de 32 bits)."""
+    high = (words >> np.uint64(32)).astype(np.float64)
+    low = (words & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(
+        high > 0,
+        31 - np.floor(np.log2(np.maximum(high, 1))),
+        63 - np.floor(np.log2(np.maximum(low, 1))),
+    ).astype(np.uint8)
+
+
+class HyperLogLog:
+    """Nº aproximado de valores distintos con 2^p registros de un byte."""
+
+    def __init__(self, p: int = HLL_PRECISION):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        # Bit centinela: el rango máximo es 64 − p + 1
+        rest = (hashes << np.uint64(self.p)) | np.uint64(1 << (self.p - 1))
+        np.maximum.at(self.registers, index, _leading_zeros(rest) + 1)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Corrección para cardinalidades pequeñas (linear counting)
+            return m * np.log(m / zeros)
+        return float(raw)
+
+
+class CountMinSketch:
+    """Frecuencia aproximada de cada clave en una tabla de ⌈ln 1/δ⌉ × ⌈e/ε⌉ contadores."""
+
+    def __init__(self, epsilon: float = CMS_EPSILON, delta: float = CMS_DELTA):
+        self.epsilon = epsilon
+        self.width = int(np.ceil(np.e / epsilon))
+        self.depth = int(np.ceil(np.log(1 / delta)))
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.total = 0
+
+    @property
+    def max_error(self) -> float:
+        """Sobreestimación máxima (con probabilidad 1 − δ)."""
+        return self.epsilon * self.total
+
+    def _columns(self, hashes: np.ndarray):
+        # Doble hashing: fila i → (h1 + i·h2) mod ancho
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        width = np.uint64(self.width)
+        for i in range(self.depth):
+            yield ((h1 + np.uint64(i) * h2) % width).astype(np.intp)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        for row, columns in enumerate(self._columns(hashes)):
+            self.table[row] += np.bincount(columns, minlength=self.width)
+        self.total += len(hashes)
+
+    def estimate_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        estimates = [self.table[row, columns] for row, columns in enumerate(self._columns(hashes))]
+        return np.min(estimates, axis=0) if estimates else np.zeros(0, dtype=np.int64)
+
+    def merge(self, other: "CountMinSketch") -> None:
+        self.table += other.table
+        self.total += other.total
+
+
+class TDigest:
+    """Cuantiles aproximados con centroides (escala k1 de Dunning, versión por lotes)."""
+
+    def __init__(self, compression: float = TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.zeros(0)
+        self.weights = np.zeros(0)
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer = []
+        self._buffered = 0
+
+    @property
+    def count(self) -> float:
+        self._compress()
+        return float(self.weights.sum())
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._buffer.append((values, np.ones(len(values))))
+        self._buffered += len(values)
+        if self._buffered > 20 * self.compression:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> None:
+        other._compress()
+        if len(other.means):
+            self._buffer.append((other.means, other.weights))
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self._compress()
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        means = np.concatenate([self.means, *(m for m, _ in self._buffer)])
+        weights = np.concatenate([self.weights, *(w for _, w in self._buffer)])
+        self._buffer, self._buffered = [], 0
+
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        # Cada centroide abarca como mucho una unidad de k(q) = δ/2π · asin(2q − 1):
+        # centroides pequeños en las colas y grandes en el centro
+        q_start = (np.cumsum(weights) - weights) / weights.sum()
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_start - 1)
+        bucket = np.floor(k - k[0]).astype(np.intp)
+        merged_weights = np.bincount(bucket, weights=weights)
+        keep = merged_weights > 0
+        self.means = np.bincount(bucket, weights=means * weights)[keep] / merged_weights[keep]
+        self.weights = merged_weights[keep]
+
+    def quantile(self, q: float) -> float:
+        self._compress()
+        if not len(self.means):
+            return float("nan")
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        xp = np.concatenate(([0.0], centers, [total]))
+        fp = np.concatenate(([self.min], self.means, [self.max]))
+        return float(np.interp(q * total, xp, fp))
+
+
+# -----------------------------------------------------------
+# PERFIL DE CALIDAD EN UNA PASADA
+# -----------------------------------------------------------
+#
+# Un perfil declara los checks de cada columna, p. ej.:
+#     {"precio": ["nulls", "min_max", ("range", 0, None)], "source": ["value_counts"]}
+# `QualityProfile.update` los evalúa todos sobre cada record batch de Arrow
+# a medida que llega (sin volver a recorrer la tabla) y acumula el estado;
+# `merge` combina los perfiles de varios shards y `result` da las métricas:
+#   nulls         → nulos, pct_nulos
+#   distinct      → distintos (sin contar nulos) y duplicados (exactos)
+#   min_max       → min, max
+#   range         → fuera_de_rango, en_rango (límites None = sin límite)
+#   isbn_valid    → isbn_validos, pct_isbn_validos (sobre los no nulos)
+#   value_counts  → frecuencias de los valores no nulos (de mayor a menor)
+# y, con memoria acotada (sketches de arriba):
+#   approx_distinct  → distintos, duplicados, exacto, error_relativo; exacto
+#                      mientras haya ≤ EXACT_DISTINCT_LIMIT distintos
+#                      (parámetro opcional: ("approx_distinct", límite))
+#   heavy_hitters    → claves_frecuentes (las k claves repetidas más
+#                      frecuentes), frecuencias_exactas, error_frecuencia (ε·N); exacto
+#                      mientras haya ≤ EXACT_DISTINCT_LIMIT distintos; con
+#                      Count-Min solo aparecen las claves con frecuencia > ε·N
+#                      (parámetros opcionales: ("heavy_hitters", k, límite))
+#   quantiles        → cuantiles (p. ej. "p50") por t-digest; parámetro
+#                      opcional: ("quantiles", (0.5, 0.9, ...))
+# Como las funciones de arriba, una columna ausente cuenta como 100 % nula
+# y fuera de rango.
+
+
+def _as_json(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _update_nulls(state, values):
+    state["nulos"] = state.get("nulos", 0) + values.null_count
+
+
+def _update_distinct(state, values):
+    uniques = pc.unique(values)
+    if "unicos" in state:
+        previous = state["unicos"]
+        uniques = pc.unique(pa.concat_arrays([previous, uniques.cast(previous.type)]))
+    state["unicos"] = uniques
+
+
+def _update_min_max(state, values):
+    bounds = pc.min_max(values).as_py()
+    for key, pick in (("min", min), ("max", max)):
+        if bounds[key] is not None:
+            current = state.get(key)
+            state[key] = bounds[key] if current is None else pick(current, bounds[key])
+
+
+def _update_range(state, values, min_val=None, max_val=None):
+    out = 0
+    if min_val is not None:
+        out += pc.sum(pc.less(values, min_val)).as_py() or 0
+    if max_val is not None:
+        out += pc.sum(pc.greater(values, max_val)).as_py() or 0
+    state["fuera_de_rango"] = state.get("fuera_de_rango", 0) + out
+
+
+def _update_isbn_valid(state, values):
+    valid = validate_isbn_array(values.to_pandas())
+    state["isbn_validos"] = state.get("isbn_validos", 0) + int(valid.sum())
+    state["isbn_no_nulos"] = state.get("isbn_no_nulos", 0) + len(values) - values.null_count
+
+
+def _update_value_counts(state, values):
+    counts = state.setdefault("frecuencias", Counter())
+    for item in pc.value_counts(values.drop_null()).to_pylist():
+        counts[_as_json(item["values"])] += item["counts"]
+
+
+def _union_exact(previous, uniques, exact_limit):
+    """Unión de dos conjuntos exactos de distintos; None si alguno se descartó o supera el límite."""
+    if previous is None or uniques is None:
+        return None
+    uniques = pc.unique(pa.concat_arrays([previous, uniques.cast(previous.type)]))
+    return uniques if len(uniques) <= exact_limit else None
+
+
+def _update_approx_distinct(state, values, exact_limit=EXACT_DISTINCT_LIMIT):
+    state.setdefault("hll", HyperLogLog()).add_hashes(hash_values(values))
+    state["nulos_hll"] = state.get("nulos_hll", 0) + values.null_count
+    # Por encima del límite solo queda el HyperLogLog
+    previous = state.get("unicos_exactos", pa.array([], type=values.type))
+    if previous is not None:
+        state["unicos_exactos"] = _union_exact(previous, pc.unique(values.drop_null()), exact_limit)
+
+
+def _prune_candidates(state, k=10):
+    """Re-estima las claves candidatas y deja las k repetidas más frecuentes."""
+    candidates = state["candidatos"]
+    if not candidates:
+        return
+    keys = list(candidates)
+    estimates = state["cms"].estimate_hashes(np.fromiter(candidates.values(), dtype=np.uint64))
+    top = [i for i in np.argsort(-estimates, kind="stable")[:k] if estimates[i] > 1]
+    state["candidatos"] = {keys[i]: candidates[keys[i]] for i in top}
+
+
+def _union_counts(previous, counts, exact_limit):
+    """Suma dos tablas (valor, conteo); None si alguna se descartó o supera el límite."""
+    if previous is None or counts is None:
+        return None
+    counts = counts.cast(previous.schema)
+    total = pa.concat_tables([previous, counts]).group_by("valor").aggregate([("conteo", "sum")])
+    total = total.rename_columns(["valor", "conteo"]).select(["valor", "conteo"])
+    return total if total.num_rows <= exact_limit else None
+
+
+def _update_heavy_hitters(state, values, k=10, exact_limit=EXACT_DISTINCT_LIMIT):
+    values = values.drop_null()
+    cms = state.setdefault("cms", CountMinSketch())
+    cms.add_hashes(hash_values(values))
+
+    # Conteo exacto mientras quepa en el límite
+    if state.get("conteos_exactos", True) is not None:
+        counts = pc.value_counts(values)
+        counts = pa.table({"valor": counts.field("values"), "conteo": counts.field("counts")})
+        previous = state.get("conteos_exactos", counts.slice(0, 0))
+        state["conteos_exactos"] = _union_counts(previous, counts, exact_limit)
+
+    # Candidatas: las k claves del batch con mayor estimación y las que ya lo eran
+    uniques = pc.unique(values)
+    hashes = hash_values(uniques)
+    estimates = cms.estimate_hashes(hashes)
+    top = np.argsort(-estimates, kind="stable")[:k]
+    top = top[estimates[top] > 1]
+    candidates = state.setdefault("candidatos", {})
+    candidates.update(zip(map(_as_json, uniques.take(top).to_pylist()), hashes[top].tolist()))
+    _prune_candidates(state, k)
+
+
+def _update_quantiles(state, values, quantiles=DEFAULT_QUANTILES):
+    values = values.drop_null().cast(pa.float64())
+    state.setdefault("tdigest", TDigest()).add(values.to_numpy(zero_copy_only=False))
+
+
+_UPDATES = {
+    "nulls": _update_nulls,
+    "distinct": _update_distinct,
+    "min_max": _update_min_max,
+    "range": _update_range,
+    "isbn_valid": _update_isbn_valid,
+    "value_counts": _update_value_counts,
+    "approx_distinct": _update_approx_distinct,
+    "heavy_hitters": _update_heavy_hitters,
+    "quantiles": _update_quantiles,
+}
+
+
+def _approx_distinct_result(state, rows, present):
+    exact = state.get("unicos_exactos", pa.array([]))
+    has_nulls = state.get("nulos_hll", 0) > 0
+    if exact is not None:
+        distinct, error = len(exact), 0.0
+    else:
+        distinct, error = int(round(state["hll"].estimate())), state["hll"].relative_error
+    # Como en `duplicated`: el nulo cuenta como un valor más
+    duplicates = max(rows - distinct - has_nulls, 0) if present else 0
+    return {
+        "distintos": distinct,
+        "duplicados": duplicates,
+        "exacto": exact is not None,
+        "error_relativo": error,
+    }
+
+
+def _heavy_hitters_result(state, k=10, exact_limit=EXACT_DISTINCT_LIMIT):
+    exact = state.get("conteos_exactos")
+    if exact is not None:
+        top = exact.filter(pc.greater(exact["conteo"], 1))
+        top = top.sort_by([("conteo", "descending")]).slice(0, k)
+        frequent = dict(zip(map(_as_json, top["valor"].to_pylist()), top["conteo"].to_pylist()))
+        return {"claves_frecuentes": frequent, "frecuencias_exactas": True, "error_frecuencia": 0.0}
+
+    # Solo las claves que, descontado el error ε·N, siguen repetidas
+    cms = state["cms"]
+    candidates = state.get("candidatos", {})
+    estimates = cms.estimate_hashes(np.fromiter(candidates.values(), dtype=np.uint64))
+    frequent = {
+        key: int(estimate)
+        for key, estimate in zip(candidates, estimates)
+        if estimate - cms.max_error > 1
+    }
+    return {
+        "claves_frecuentes": frequent,
+        "frecuencias_exactas": False,
+        "error_frecuencia": cms.max_error,
+    }
+
+
+class QualityProfile:
+    """Checks declarativos por columna evaluados sobre record batches de Arrow."""
+
+    def __init__(self, checks: dict):
+        self.checks = {
+            col: [c if isinstance(c, tuple) else (c,) for c in col_checks]
+            for col, col_checks in checks.items()
+        }
+        unknown = {c[0] for cs in self.checks.values() for c in cs} - set(_UPDATES)
+        if unknown:
+            raise ValueError(f"Checks de calidad desconocidos: {sorted(unknown)}")
+        self.rows = 0
+        self.state = {col: {} for col in self.checks}
+
+    def update(self, data: pa.Table | pa.RecordBatch) -> None:
+        """Evalúa todos los checks sobre cada batch de `data` y acumula."""
+        batches = data.to_batches() if isinstance(data, pa.Table) else [data]
+        for batch in batches:
+            self.rows += batch.num_rows
+            for col, checks in self.checks.items():
+                i = batch.schema.get_field_index(col)
+                if i < 0:
+                    continue
+                values = batch.column(i)
+                if pa.types.is_dictionary(values.type):
+                    values = values.dictionary_decode()
+                state = self.state[col]
+                state["presente"] = True
+                for name, *params in checks:
+                    _UPDATES[name](state, values, *params)
+
+    def merge(self, other: "QualityProfile") -> None:
+        """Suma el estado de otro perfil con los mismos checks (p. ej. de un shard)."""
+        self.rows += other.rows
+        for col, theirs in other.state.items():
+            ours = self.state[col]
+            params = {name: p for name, *p in self.checks[col]}
+            for key, value in theirs.items():
+                if key not in ours:
+                    ours[key] = value
+                elif key == "unicos":
+                    _update_distinct(ours, value)
+                elif key == "unicos_exactos":
+                    limit = (params["approx_distinct"] or [EXACT_DISTINCT_LIMIT])[0]
+                    ours[key] = _union_exact(ours[key], value, limit)
+                elif key in ("min", "max"):
+                    _update_min_max(ours, pa.array([value]))
+                elif key == "conteos_exactos":
+                    limit = (params["heavy_hitters"][1:] or [EXACT_DISTINCT_LIMIT])[0]
+                    ours[key] = _union_counts(ours[key], value, limit)
+                elif key == "candidatos":
+                    ours[key].update(value)
+                elif isinstance(value, (HyperLogLog, CountMinSketch, TDigest)):
+                    ours[key].merge(value)
+                elif key == "presente":
+                    continue
+                else:
+                    ours[key] += value
+            if "cms" in ours:
+                _prune_candidates(ours, *params["heavy_hitters"][:1])
+
+    def result(self) -> dict:
+        """Métricas por columna (serializables a JSON)."""
+        columns = {}
+        for col, checks in self.checks.items():
+            state = self.state[col]
+            present = state.get("presente", False)
+            metrics = {}
+            for name, *params in checks:
+                if name == "nulls":
+                    nulls = state.get("nulos", 0) if present else self.rows
+                    metrics["nulos"] = nulls
+                    metrics["pct_nulos"] = (
+                        (nulls / self.rows if self.rows else float("nan")) if present else 1.0
+                    )
+                elif name == "distinct":
+                    uniques = state.get("unicos", pa.array([]))
+                    metrics["distintos"] = len(uniques) - uniques.null_count
+                    metrics["duplicados"] = self.rows - len(uniques) if present else 0
+                elif name == "min_max":
+                    metrics["min"] = _as_json(state.get("min"))
+                    metrics["max"] = _as_json(state.get("max"))
+                elif name == "range":
+                    metrics["fuera_de_rango"] = state.get("fuera_de_rango", 0)
+                    metrics["en_rango"] = present and metrics["fuera_de_rango"] == 0
+                elif name == "isbn_valid":
+                    non_null = state.get("isbn_no_nulos", 0)
+                    metrics["isbn_validos"] = state.get("isbn_validos", 0)
+                    metrics["pct_isbn_validos"] = (
+                        metrics["isbn_validos"] / non_null if non_null else float("nan")
+                    )
+                elif name == "value_counts":
+                    metrics["frecuencias"] = dict(state.get("frecuencias", Counter()).most_common())
+                elif name == "approx_distinct":
+                    metrics.update(_approx_distinct_result(state, self.rows, present))
+                elif name == "heavy_hitters":
+                    metrics.update(_heavy_hitters_result(state, *params))
+                elif name == "quantiles":
+                    digest = state.get("tdigest", TDigest())
+                    quantiles = params[0] if params else DEFAULT_QUANTILES
+                    metrics["cuantiles"] = {
+                        f"p{100 * q:g}": digest.quantile(q) for q in quantiles
+                    }
+            columns[col] = metrics
+        return {"filas": self.rows, "columnas": columns}
+
+
+# ► Variantes con sketches de las métricas de arriba (memoria acotada)
+
+SERIES_BATCH_ROWS = 1_000_000
+
+
+def _profile_series(values: pd.Series, check) -> dict:
+    profile = QualityProfile({"valor": [check]})
+    for start in range(0, len(values), SERIES_BATCH_ROWS):
+        batch = values.iloc[start : start + SERIES_BATCH_ROWS]
+        profile.update(pa.table({"valor": pa.array(batch, from_pandas=True)}))
+    return profile.result()["columnas"]["valor"]
+
+
+def metric_unique_values_approx(
+    df: pd.DataFrame, col: str, exact_limit: int = EXACT_DISTINCT_LIMIT
+) -> int:
+    """Como `metric_unique_values`; por encima de `exact_limit` distintos, HyperLogLog."""
+    if col not in df.columns:
+        return 0
+    return _profile_series(df[col], ("approx_distinct", exact_limit))["distintos"]
+
+
+def metric_duplicates_approx(
+    df: pd.DataFrame, subset: list[str], exact_limit: int = EXACT_DISTINCT_LIMIT
+) -> int:
+    """Como `metric_duplicates`, contando distintos sobre el hash de las columnas de `subset`."""
+    keys = pd.util.hash_pandas_object(df[subset], index=False)
+    return _profile_series(keys, ("approx_distinct", exact_limit))["duplicados"]
+
+
+def metric_heavy_hitters(df: pd.DataFrame, col: str, k: int = 10) -> dict:
+    """Las k claves repetidas más frecuentes con su frecuencia estimada (Count-Min)."""
+    if col not in df.columns:
+        return {}
+    return _profile_series(df[col], ("heavy_hitters", k))["claves_frecuentes"]
+
+
+def metric_quantiles(df: pd.DataFrame, col: str, quantiles=DEFAULT_QUANTILES) -> dict:
+    """Cuantiles aproximados (t-digest) de una columna numérica."""
+    if col not in df.columns:
+        return {}
+    return _profile_series(df[col], ("quantiles", tuple(quantiles)))["cuantiles"]
@@ -0,0 +1,28 @@
+import re
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from integrate_pipeline import compute_candidate_ids  # noqa: E402
+
+
+def reference_key(title, author, publisher):
+    """Clave de la implementación fila a fila original."""
+    key = f"{title}_{author}_{publisher}"
+    return re.sub(r"\s+", "_", key.lower())
+
+
+def test_fallback_key_lowercases_like_python():
+    titles = ["İstanbul Notları", "ÀÉÎ Õü", "Ǆemal Bijedić", "Plain Title", None]
+    df = pd.DataFrame(
+        {"title": titles, "author_principal": ["Ayşe"] * 5, "publisher": [None] * 5}
+    )
+
+    keys = compute_candidate_ids(df, normalize_isbns=False)
+
+    expected = [reference_key("nan" if t is None else t, "Ayşe", "nan") for t in titles]
+    assert keys.tolist() == expected
+    assert keys[0].startswith("i̇stanbul")
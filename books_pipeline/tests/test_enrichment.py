@@ -0,0 +1,81 @@
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import enrich_googlebooks  # noqa: E402
+from bench_enrichment import make_goodreads_books  # noqa: E402
+from stub_googlebooks import make_volume, start_stub  # noqa: E402
+from utils_metrics import METRICS  # noqa: E402
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server, url = start_stub(latency=0.01)
+    monkeypatch.setattr(enrich_googlebooks, "GOOGLE_BOOKS_BASE_URL", url)
+    monkeypatch.setattr(enrich_googlebooks, "API_KEY", None)
+    METRICS.reset()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def input_json(tmp_path):
+    path = tmp_path / "goodreads_books.json"
+    path.write_text(json.dumps(make_goodreads_books(40)), encoding="utf-8")
+    return path
+
+
+def enrich(input_json, output_csv, workers, rps=0):
+    enrich_googlebooks.enrich_books(
+        workers=workers,
+        requests_per_second=rps,
+        input_path=input_json,
+        output_path=output_csv,
+        cache_path=None,
+    )
+
+
+def test_csv_same_order_and_schema_for_any_concurrency(stub, input_json, tmp_path):
+    enrich(input_json, tmp_path / "w1.csv", workers=1)
+    enrich(input_json, tmp_path / "w8.csv", workers=8)
+
+    assert (tmp_path / "w8.csv").read_bytes() == (tmp_path / "w1.csv").read_bytes()
+
+    with open(tmp_path / "w8.csv", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f, delimiter=";")
+        rows = list(reader)
+    assert reader.fieldnames == enrich_googlebooks.CSV_FIELDS
+
+    # Una fila por libro con resultados, en el orden de goodreads_books.json
+    books = json.loads(input_json.read_text(encoding="utf-8"))
+    volumes = [make_volume(enrich_googlebooks.build_query(book)) for book in books]
+    assert [row["gb_id"] for row in rows] == [v["id"] for v in volumes if v]
+
+
+def test_token_bucket_bounds_request_rate(stub, input_json, tmp_path):
+    rate = 20
+    start = time.perf_counter()
+    enrich(input_json, tmp_path / "out.csv", workers=8, rps=rate)
+    elapsed = time.perf_counter() - start
+
+    # Una petición por query distinta (sin reintentos) y, tras la ráfaga
+    # inicial de `rate` tokens, como mucho `rate` peticiones por segundo
+    assert stub.requests == 40
+    assert METRICS.counters["googlebooks.peticiones"] == 40
+    assert elapsed >= (40 - rate) / rate * 0.9
+
+
+def test_pooled_session_reuses_connections(stub, input_json, tmp_path):
+    workers = 4
+    enrich(input_json, tmp_path / "out.csv", workers=workers)
+
+    assert stub.requests == 40
+    assert len(stub.connections) <= workers
@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from incremental_store import IncrementalStore, _write_table  # noqa: E402
+
+
+class Crash(Exception):
+    pass
+
+
+def make_store(tmp_path, write_dim=None):
+    return IncrementalStore(
+        tmp_path / "dim_book.parquet", tmp_path / "book_source_detail.parquet", write_dim=write_dim
+    )
+
+
+def dim_rows(*book_ids):
+    return pd.DataFrame({"book_id": list(book_ids), "titulo": [f"t-{b}" for b in book_ids]})
+
+
+def detail_rows(*row_hashes):
+    return pd.DataFrame(
+        {"row_hash": list(row_hashes), "book_id_candidato": [f"b{h}" for h in row_hashes]}
+    )
+
+
+@pytest.fixture
+def store_with_fragments(tmp_path):
+    """Base con b1/b2 y dos fragmentos: b3 nuevo y b2 sustituido (fila 2 → 20)."""
+    store = make_store(tmp_path)
+    _write_table(dim_rows("b1", "b2"), store.dim_path)
+    _write_table(detail_rows(1, 2), store.detail_path)
+    store.append(dim_rows("b3"), detail_rows(3), deleted_book_ids=[], superseded_row_hashes=[])
+    store.append(dim_rows("b2"), detail_rows(20), deleted_book_ids=[], superseded_row_hashes=[2])
+    return store
+
+
+def snapshot(store):
+    dim = store.read_dim().sort_values("book_id").reset_index(drop=True)
+    detail = store.read_detail().sort_values("row_hash").reset_index(drop=True)
+    return dim, detail
+
+
+def test_compact_interrupted_between_writes_loses_no_rows(tmp_path, store_with_fragments):
+    expected_dim, expected_detail = snapshot(store_with_fragments)
+
+    def crash_on_dim(df, path, metadata=None):
+        if metadata:  # escritura de la base durante la compactación
+            raise Crash
+        _write_table(df, path, metadata)
+
+    with pytest.raises(Crash):
+        make_store(tmp_path, write_dim=crash_on_dim).compact()
+
+    # El detalle ya está compactado y dim_book no: ninguna tabla pierde ni duplica filas
+    store = make_store(tmp_path)
+    assert store.base_generation(store.detail_path) == 2
+    assert store.base_generation(store.dim_path) == 0
+    for got, expected in zip(snapshot(store), (expected_dim, expected_detail)):
+        pd.testing.assert_frame_equal(got, expected)
+
+    # Reanudar la compactación deja la base completa y sin fragmentos
+    dim, detail = store.compact()
+    assert store.pending_fragments() == []
+    assert sorted(dim["book_id"]) == ["b1", "b2", "b3"]
+    assert sorted(detail["row_hash"]) == [1, 3, 20]
+    for got, expected in zip(snapshot(store), (expected_dim, expected_detail)):
+        pd.testing.assert_frame_equal(got, expected)
@@ -0,0 +1,74 @@
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import integrate_pipeline  # noqa: E402
+
+GOODREADS = [
+    {
+        "title": "Libro A",
+        "author": "Autora A",
+        "rating": 4.13,
+        "ratings_count": 2623,
+        "book_url": "https://example.org/a",
+        "isbn10": "0596009208",
+        "isbn13": "9780596009205",
+    },
+    {
+        "title": "Libro B",
+        "author": "Autor B",
+        "rating": 3.91,
+        "ratings_count": 12,
+        "book_url": None,
+        "isbn10": None,
+        "isbn13": None,
+    },
+]
+
+GOOGLEBOOKS_CSV = (
+    "gb_id;title;subtitle;authors;publisher;pub_date;language;categories;"
+    "isbn13;isbn10;price_amount;price_currency\n"
+    "g1;Libro A;;Autora A;Ed;2005;en;Data;9780596009205;0596009208;19.99;EUR\n"
+    "g2;Libro C;Sub;Autor C | Autor D;;2019-05;es;;;;;\n"
+)
+
+
+def read_all(chunks, path, backend, monkeypatch):
+    monkeypatch.setattr(integrate_pipeline, "INGEST_BACKEND", backend)
+    return pd.concat(list(chunks(path)), ignore_index=True)
+
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+def test_goodreads_backends_give_same_table(tmp_path, monkeypatch, suffix):
+    path = tmp_path / f"goodreads_books{suffix}"
+    if suffix == ".jsonl":
+        path.write_text("".join(json.dumps(r) + "\n" for r in GOODREADS), encoding="utf-8")
+    else:
+        path.write_text(json.dumps(GOODREADS), encoding="utf-8")
+
+    chunks = integrate_pipeline.iter_goodreads_chunks
+    arrow = read_all(chunks, path, "arrow", monkeypatch)
+    pandas = read_all(chunks, path, "pandas", monkeypatch)
+
+    pd.testing.assert_frame_equal(pandas, arrow)
+    assert pandas["isbn10"][0] == "0596009208"
+    assert (integrate_pipeline.row_hashes(pandas) == integrate_pipeline.row_hashes(arrow)).all()
+
+
+def test_googlebooks_backends_give_same_table(tmp_path, monkeypatch):
+    path = tmp_path / "googlebooks_books.csv"
+    path.write_text(GOOGLEBOOKS_CSV, encoding="utf-8")
+
+    chunks = integrate_pipeline.iter_googlebooks_chunks
+    arrow = read_all(chunks, path, "arrow", monkeypatch)
+    pandas = read_all(chunks, path, "pandas", monkeypatch)
+
+    pd.testing.assert_frame_equal(pandas, arrow)
+    assert pandas["isbn13"][0] == "9780596009205"
+    assert (integrate_pipeline.row_hashes(pandas) == integrate_pipeline.row_hashes(arrow)).all()
@@ -0,0 +1,155 @@
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import enrich_googlebooks  # noqa: E402
+from bench_enrichment import make_goodreads_books  # noqa: E402
+from stub_googlebooks import start_faulty_stub  # noqa: E402
+from utils_http import CircuitBreaker, RetryPolicy, make_session  # noqa: E402
+from utils_metrics import METRICS  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    """Reintentos y pausas cortos, sin API key."""
+    monkeypatch.setattr(enrich_googlebooks, "API_KEY", None)
+    monkeypatch.setattr(enrich_googlebooks, "TIMEOUT", 0.3)
+    monkeypatch.setattr(enrich_googlebooks, "RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(enrich_googlebooks, "RETRY_MAX_DELAY", 0.05)
+    monkeypatch.setattr(enrich_googlebooks, "BREAKER_COOLDOWN", 0.3)
+    monkeypatch.setattr(enrich_googlebooks, "BREAKER_MAX_COOLDOWN", 1.0)
+    METRICS.reset()
+
+
+@pytest.fixture
+def faulty_stub(monkeypatch):
+    servers = []
+
+    def start(faults, **options):
+        server, url = start_faulty_stub(faults, **options)
+        monkeypatch.setattr(enrich_googlebooks, "GOOGLE_BOOKS_BASE_URL", url)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def policy(max_attempts=3):
+    return RetryPolicy(max_attempts, base_delay=0.01, max_delay=0.05, max_retry_after=5.0)
+
+
+def test_404_is_terminal_and_not_retried(faulty_stub):
+    server = faulty_stub({"404": 1.0}, faulty_attempts=3)
+
+    with make_session() as session, pytest.raises(requests.HTTPError):
+        enrich_googlebooks.request_google_books("isbn:9780000000001", session, policy=policy())
+
+    assert server.requests == 1
+    assert METRICS.counters["googlebooks.errores.http_404"] == 1
+    assert "googlebooks.reintentos" not in METRICS.counters
+
+
+def test_429_waits_for_retry_after(faulty_stub):
+    server = faulty_stub({"429": 1.0}, retry_after=0.4, faulty_attempts=1)
+
+    start = time.perf_counter()
+    with make_session() as session:
+        volume = enrich_googlebooks.request_google_books(
+            "isbn:9780000000001", session, policy=policy()
+        )
+    elapsed = time.perf_counter() - start
+
+    assert volume is not None
+    assert server.requests == 2
+    assert elapsed >= 0.4
+    assert METRICS.histograms["googlebooks.espera_reintento_ms"].min >= 400
+
+
+def test_breaker_pauses_every_worker():
+    breaker = CircuitBreaker(threshold=3, cooldown=0.3, max_cooldown=1.0)
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.record_failure()  # el tercero seguido lo abre
+
+    waited = []
+    workers = [threading.Thread(target=lambda: waited.append(breaker.wait())) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len(waited) == 4 and min(waited) >= 0.25
+
+    # Un éxito restablece la pausa; si vuelve a abrirse, respeta un Retry-After mayor
+    breaker.record_success()
+    for _ in range(3):
+        opened = breaker.record_failure(retry_after=0.6)
+    assert opened and breaker.open_until - time.monotonic() > 0.5
+
+
+def test_breaker_opens_on_sustained_429_and_pauses_other_workers(faulty_stub, tmp_path):
+    # 429 en todas las peticiones durante el primer medio segundo
+    faulty_stub({}, retry_after=0.1, storm=(0, 0.5))
+    input_json = tmp_path / "goodreads_books.json"
+    input_json.write_text(json.dumps(make_goodreads_books(40)), encoding="utf-8")
+
+    enrich_googlebooks.enrich_books(
+        workers=8,
+        requests_per_second=0,
+        input_path=input_json,
+        output_path=tmp_path / "out.csv",
+        cache_path=None,
+    )
+
+    counters = METRICS.counters
+    assert counters["googlebooks.cortacircuitos_aperturas"] >= 1
+    # Hilos distintos del que lo abrió esperaron a que se cerrara
+    assert METRICS.histograms["googlebooks.pausa_cortacircuitos_ms"].count >= 2
+    assert "googlebooks.consultas_fallidas" not in counters
+
+
+def test_error_counters_match_injected_faults(faulty_stub, tmp_path, monkeypatch):
+    server = faulty_stub(
+        {"429": 0.1, "503": 0.1, "500": 0.1, "timeout": 0.05, "reset": 0.05},
+        retry_after=0.01,
+        timeout_delay=0.6,
+        faulty_attempts=enrich_googlebooks.MAX_RETRIES - 1,
+    )
+    input_json = tmp_path / "goodreads_books.json"
+    input_json.write_text(json.dumps(make_goodreads_books(60)), encoding="utf-8")
+
+    # Sin pausas del cortacircuitos: solo se cuentan los errores
+    monkeypatch.setattr(enrich_googlebooks, "BREAKER_THRESHOLD", 10**6)
+    enrich_googlebooks.enrich_books(
+        workers=4,
+        requests_per_second=0,
+        input_path=input_json,
+        output_path=tmp_path / "out.csv",
+        cache_path=None,
+    )
+
+    counters = METRICS.counters
+    injected = server.injected
+    assert sum(injected.values()) > 0
+    expected = {
+        "http_429": injected["429"],
+        "http_503": injected["503"],
+        "http_500": injected["500"],
+        "timeout": injected["timeout"],
+        "conexion": injected["reset"],
+    }
+    for kind, n in expected.items():
+        assert counters.get(f"googlebooks.errores.{kind}", 0) == n, kind
+    assert counters["googlebooks.errores"] == sum(injected.values())
+    assert counters["googlebooks.reintentos"] == sum(injected.values())
+    assert "googlebooks.consultas_fallidas" not in counters
@@ -0,0 +1,61 @@
+import contextlib
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import scrape_goodreads  # noqa: E402
+from stub_goodreads import start_stub  # noqa: E402
+from utils_metrics import METRICS  # noqa: E402
+
+PAGES = 2
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Stub local con las páginas guardadas en benchmarks/fixtures/goodreads."""
+    server, base_url = start_stub(latency=0.02)
+    monkeypatch.setattr(scrape_goodreads, "GOODREADS_BASE_URL", base_url)
+    monkeypatch.setattr(scrape_goodreads, "BASE_SEARCH_URL", f"{base_url}/search")
+    monkeypatch.setattr(scrape_goodreads, "PAGES_TO_SCRAPE", PAGES)
+    monkeypatch.setattr(scrape_goodreads, "MAX_BOOKS", 20 * PAGES)
+    METRICS.reset()
+    yield server
+    server.shutdown()
+
+
+def scrape(server, output, concurrency, monkeypatch):
+    monkeypatch.setattr(scrape_goodreads, "OUTPUT_PATH", output)
+    server.connections, server.max_in_flight = set(), 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        scrape_goodreads.scrape_goodreads(max_concurrency=concurrency, requests_per_second=0)
+    return output.read_bytes()
+
+
+def test_same_records_for_any_concurrency(stub, tmp_path, monkeypatch):
+    reference = scrape(stub, tmp_path / "c1.jsonl", 1, monkeypatch)
+    for concurrency in (4, 8):
+        content = scrape(stub, tmp_path / f"c{concurrency}.jsonl", concurrency, monkeypatch)
+        assert content == reference, concurrency
+
+    books = [json.loads(line) for line in reference.decode("utf-8").splitlines()]
+    assert len(books) == 20 * PAGES
+    assert all(book["isbn13"] for book in books)
+    # Sin duplicados: cada página del stub reescribe las URLs de las fichas
+    assert len({book["book_url"] for book in books}) == len(books)
+
+
+@pytest.mark.parametrize("concurrency", [1, 3, 6])
+def test_per_host_concurrency_limit(stub, tmp_path, monkeypatch, concurrency):
+    scrape(stub, tmp_path / "out.jsonl", concurrency, monkeypatch)
+
+    assert stub.max_in_flight <= concurrency
+    assert len(stub.connections) <= concurrency
+    # Una búsqueda por página y una ficha por libro
+    assert METRICS.counters["goodreads.peticiones"] == PAGES + 20 * PAGES